@@ -0,0 +1,123 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.technical_indicators import sma_array, ema_array, macd_array, bollinger_array, kd_array, atr_array
+
+
+def synthetic_ohlc(n_series, n_bars, seed=0):
+    # 以隨機漫步產生 (股票 x K棒) 的最高價、最低價與收盤價
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, size=(n_series, n_bars)), axis=1))
+    spread = close * rng.uniform(0.0, 0.02, size=close.shape)
+    high = close + spread * rng.uniform(size=close.shape)
+    low = high - spread
+    return high, low, close
+
+
+def naive_indicators(high, low, close, params):
+    # 逐檔以 pandas 計算，KD 以逐根K棒的迴圈遞推，作為對照
+    results = {name: [] for name in ('sma', 'ema', 'macd', 'bollinger', 'kd', 'atr')}
+    for h, l, c in zip(high, low, close):
+        h, l, c = pd.Series(h), pd.Series(l), pd.Series(c)
+        results['sma'].append([c.rolling(period).mean() for period in params['periods']])
+        results['ema'].append([c.ewm(span=period, adjust=False).mean() for period in params['periods']])
+
+        macd = []
+        for fast, slow in params['macd']:
+            line = c.ewm(span=fast, adjust=False).mean() - c.ewm(span=slow, adjust=False).mean()
+            macd.append(line - line.ewm(span=9, adjust=False).mean())
+        results['macd'].append(macd)
+
+        results['bollinger'].append([c.rolling(period).mean() + 2 * c.rolling(period).std(ddof=0)
+                                     for period in params['periods']])
+
+        kd = []
+        for period in params['kd']:
+            highest = h.rolling(period).max()
+            lowest = l.rolling(period).min()
+            rsv = ((c - lowest) / (highest - lowest) * 100).fillna(50).to_numpy()
+            k_values = np.full(len(c), np.nan)
+            k = 50.0
+            for i in range(period - 1, len(c)):
+                k = k * 2 / 3 + rsv[i] / 3
+                k_values[i] = k
+            kd.append(k_values)
+        results['kd'].append(kd)
+
+        true_range = pd.concat([h - l, (h - c.shift()).abs(), (l - c.shift()).abs()], axis=1).max(axis=1)
+        results['atr'].append([true_range.ewm(alpha=1 / period, adjust=False).mean() for period in params['atr']])
+    return {name: np.swapaxes(np.asarray(values, dtype=float), 0, 1) for name, values in results.items()}
+
+
+def kernel_indicators(high, low, close, params):
+    # 所有股票與參數組合一次計算
+    periods = params['periods']
+    fast, slow = np.array(params['macd']).T
+    return {
+        'sma': sma_array(close, periods),
+        'ema': ema_array(close, periods),
+        'macd': macd_array(close, fast, slow, 9)['histogram'],
+        'bollinger': bollinger_array(close, periods, 2.0)['upper'],
+        'kd': kd_array(high, low, close, period=params['kd'])['k'],
+        'atr': atr_array(high, low, close, period=params['atr'])['atr']
+    }
+
+
+def max_difference(a, b):
+    # NaN 位置必須一致，其餘取最大絕對誤差
+    if not np.array_equal(np.isnan(a), np.isnan(b)):
+        return np.inf
+    valid = ~np.isnan(a)
+    return float(np.max(np.abs(a[valid] - b[valid]))) if valid.any() else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比較向量化技術指標與逐檔 pandas 計算的速度與結果')
+    parser.add_argument('--n_series', type=int, default=200, help='股票數')
+    parser.add_argument('--n_bars', type=int, default=2800, help='K棒數')
+    args = parser.parse_args()
+
+    params = {
+        'periods': [5, 10, 20, 60],
+        'macd': [(12, 26), (5, 35), (8, 17)],
+        'kd': [9, 14],
+        'atr': [14, 20]
+    }
+    high, low, close = synthetic_ohlc(args.n_series, args.n_bars)
+
+    start = time.perf_counter()
+    expected = naive_indicators(high, low, close, params)
+    naive_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = kernel_indicators(high, low, close, params)
+    kernel_time = time.perf_counter() - start
+
+    print(f"股票數 {args.n_series}，K棒數 {args.n_bars}")
+    for name in expected:
+        print(f"{name:>10}: 最大誤差 {max_difference(actual[name], expected[name]):.2e}")
+    print(f"逐檔 pandas: {naive_time:.3f}s")
+    print(f"向量化指標: {kernel_time:.3f}s（{naive_time / kernel_time:.1f} 倍）")
+
+    # 增量更新：只計算最後一根K棒
+    split = args.n_bars - 1
+    start = time.perf_counter()
+    history = macd_array(close[:, :split])
+    latest = macd_array(close[:, split:], state=history['state'])
+    history_kd = kd_array(high[:, :split], low[:, :split], close[:, :split])
+    latest_kd = kd_array(high[:, split - 8:], low[:, split - 8:], close[:, split - 8:], state=history_kd['state'])
+    update_time = time.perf_counter() - start
+    full = macd_array(close)
+    full_kd = kd_array(high, low, close)
+    print(f"增量更新 MACD/KD 最大誤差: {max_difference(latest['macd'][:, -1], full['macd'][:, -1]):.2e} / "
+          f"{max_difference(latest_kd['k'][:, -1], full_kd['k'][:, -1]):.2e}（含歷史計算 {update_time:.3f}s）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.screener import IndicatorScreener
+
+
+def synthetic_close_matrix(n_symbols, n_dates, seed=0):
+    # 以隨機漫步產生 (日期 x 股票) 收盤價矩陣，部分股票較晚上市
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0003, 0.015, size=(n_dates, n_symbols))
+    closes = 100 * np.exp(np.cumsum(returns, axis=0))
+    listing_row = rng.integers(0, n_dates // 2, size=n_symbols)
+    closes[np.arange(n_dates)[:, None] < listing_row] = np.nan
+    dates = pd.bdate_range('2014-01-01', periods=n_dates)
+    return pd.DataFrame(closes, index=dates, columns=[f"S{i:04d}" for i in range(n_symbols)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='量測全市場選股的計算時間')
+    parser.add_argument('--n_symbols', type=int, default=1000, help='股票數')
+    parser.add_argument('--n_dates', type=int, default=2800, help='交易日數')
+    args = parser.parse_args()
+
+    closes = synthetic_close_matrix(args.n_symbols, args.n_dates)
+
+    start = time.perf_counter()
+    screener = IndicatorScreener(closes)
+    prepare_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    screener.indicator('rsi', period=14)
+    rsi_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    oversold = screener.below('rsi', 30, period=14)
+    crossed = screener.crossed_above('rsi', 70, days=5, period=14)
+    query_time = time.perf_counter() - start
+
+    print(f"股票數 {args.n_symbols}，交易日數 {args.n_dates}")
+    print(f"建立矩陣: {prepare_time:.3f}s")
+    print(f"計算全市場 RSI: {rsi_time:.3f}s")
+    print(f"RSI < 30 與近 5 日向上穿越 70 查詢: {query_time:.4f}s（{len(oversold)} / {len(crossed)} 檔）")
+
+
+if __name__ == "__main__":
+    main()
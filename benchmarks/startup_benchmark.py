@@ -0,0 +1,103 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (名稱, 相對於專案根目錄的腳本, 參數, 計時前先執行一次不計時的暖身)
+COMMANDS = [
+    ('fetcher --help', 'fetcher/twse_stock_fetcher.py', ['--help'], False),
+    ('rsi --help', 'strategy/rsi_strategy.py', ['--help'], False),
+    ('rsi 只計算指標', 'strategy/rsi_strategy.py', ['--no_cache', '--no_plot'], False),
+    ('rsi 完整執行', 'strategy/rsi_strategy.py', ['--no_cache'], False),
+    # 前面的執行都不寫入快取，先執行一次填入快取，計時的才是快取命中
+    ('rsi 快取命中', 'strategy/rsi_strategy.py', [], True),
+]
+
+# 命令用到的價格資料（預設的資料檔與比較基準），複製到暫存目錄
+DATA_FILES = ['data/twse/^TWII.csv']
+
+
+def time_command(cmd, cwd, repeat):
+    """
+    Measure the best wall-clock time of a command over several runs.
+
+    Args:
+        cmd (list): Command line to run.
+        cwd (str): Working directory of the command.
+        repeat (int): Number of runs.
+
+    Returns:
+        float | None: Best time in seconds, or None if the command failed.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            return None
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmark(source_root, repeat):
+    # 在暫存目錄執行，避免覆寫專案中的報告；資料以複本提供，指標庫與鎖定檔也只寫入暫存目錄
+    work_dir = tempfile.mkdtemp(prefix='startup_benchmark_')
+    try:
+        for data_file in DATA_FILES:
+            os.makedirs(os.path.dirname(os.path.join(work_dir, data_file)), exist_ok=True)
+            shutil.copyfile(os.path.join(ROOT, data_file), os.path.join(work_dir, data_file))
+        results = {}
+        for name, script, args, warm_up in COMMANDS:
+            cmd = [sys.executable, os.path.join(source_root, script)] + args
+            if warm_up and time_command(cmd, work_dir, 1) is None:
+                results[name] = None
+                continue
+            results[name] = time_command(cmd, work_dir, repeat)
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def export_revision(revision):
+    # 將指定的 git 版本匯出到暫存目錄
+    export_dir = tempfile.mkdtemp(prefix='startup_benchmark_rev_')
+    archive = subprocess.run(['git', 'archive', revision], cwd=ROOT, check=True, stdout=subprocess.PIPE)
+    subprocess.run(['tar', '-x', '-C', export_dir], input=archive.stdout, check=True)
+    return export_dir
+
+
+def format_time(value):
+    return f"{value:.3f}s" if value is not None else "n/a"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='量測命令列程式的啟動時間')
+    parser.add_argument('--repeat', type=int, default=5, help='每個命令執行次數（取最佳值）')
+    parser.add_argument('--baseline', type=str, default=None, help='比較用的 git 版本，例如 HEAD~1')
+    args = parser.parse_args()
+
+    current = run_benchmark(ROOT, args.repeat)
+    baseline = None
+    if args.baseline:
+        export_dir = export_revision(args.baseline)
+        try:
+            baseline = run_benchmark(export_dir, args.repeat)
+        finally:
+            shutil.rmtree(export_dir, ignore_errors=True)
+
+    print(f"{'命令':<16}{'目前版本':>12}" + (f"{args.baseline:>12}" if baseline else ""))
+    for name, _, _, _ in COMMANDS:
+        line = f"{name:<16}{format_time(current[name]):>12}"
+        if baseline:
+            line += f"{format_time(baseline[name]):>12}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
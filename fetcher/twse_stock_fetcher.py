@@ -1,18 +1,23 @@
-import pandas as pd
+import csv
 import requests
 import json
 from datetime import datetime, timedelta
 import time
 import os
+import sys
 import argparse
 
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.atomic_io import atomic_write, file_lock
+
 def get_stock_data(date, stock_no):
     url = f'https://www.twse.com.tw/exchangeReport/STOCK_DAY?response=json&date={date}&stockNo={stock_no}'
     response = requests.get(url)
     if response.status_code == 200:
         content = json.loads(response.text)
         if 'data' in content and 'fields' in content:
-            return pd.DataFrame(data=content['data'], columns=content['fields'])
+            return [dict(zip(content['fields'], row)) for row in content['data']]
     return None
 
 
@@ -23,51 +28,83 @@ def convert_date(tw_date):
     return f'{year}-{month}-{day}'
 
 
-def process_and_save_monthly(date, stock_no, output_file):
-    date_str = date.strftime('%Y%m%d')
-    print(f"正在抓取 {date_str} 的資料...")
+def rewrite_rows(rows, output_file):
+    # 以新資料取代相同日期的舊資料，去除重複日期並依日期排序後整個重寫
+    with open(output_file, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        columns = reader.fieldnames
+        by_date = {row['Date']: row for row in reader}
+    by_date.update({row['Date']: row for row in rows})
 
-    df = get_stock_data(date_str, stock_no)
+    with atomic_write(output_file, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns, lineterminator='\n', extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(by_date[date] for date in sorted(by_date))
 
-    if df is not None:
-        # 轉換欄位名稱並選擇需要的欄位
-        df_processed = pd.DataFrame({
-            'Date': df['日期'].apply(convert_date),
-            'Open': df['開盤價'].str.replace(',', ''),
-            'High': df['最高價'].str.replace(',', ''),
-            'Low': df['最低價'].str.replace(',', ''),
-            'Close': df['收盤價'].str.replace(',', ''),
-            'Volume': df['成交股數'].str.replace(',', '')
-        })
 
+def save_rows(rows, columns, output_file, replace=False):
+    # 寫入暫存檔後再換名，並鎖定檔案避免同時執行的抓取互相覆蓋
+    with file_lock(output_file):
+        if replace and os.path.exists(output_file):
+            rewrite_rows(rows, output_file)
+            print(f"更新 {len(rows)} 筆資料")
         # 如果檔案存在，讀取現有資料並過濾重複日期
-        if os.path.exists(output_file):
-            existing_df = pd.read_csv(output_file)
-            # 找出新資料中不存在的日期
-            new_dates = set(df_processed['Date']) - set(existing_df['Date'])
+        elif os.path.exists(output_file):
+            with open(output_file, 'r', newline='', encoding='utf-8') as f:
+                existing = f.read()
+            existing_dates = {row['Date'] for row in csv.DictReader(existing.splitlines())}
             # 只保留新日期的資料
-            df_processed = df_processed[df_processed['Date'].isin(new_dates)]
-            
-            if len(df_processed) > 0:
-                # 追加新資料
-                df_processed.to_csv(output_file, index=False, mode='a', header=False)
-                print(f"新增 {len(df_processed)} 筆資料")
+            rows = [row for row in rows if row['Date'] not in existing_dates]
+
+            if len(rows) > 0:
+                # 保留原有內容不變，在尾端加上新資料
+                with atomic_write(output_file, 'w', encoding='utf-8', newline='') as f:
+                    f.write(existing if existing.endswith('\n') or not existing else existing + '\n')
+                    csv.DictWriter(f, fieldnames=columns, lineterminator='\n').writerows(rows)
+                print(f"新增 {len(rows)} 筆資料")
             else:
                 print("沒有新資料需要更新")
         else:
             # 如果檔案不存在，寫入所有資料
-            df_processed.to_csv(output_file, index=False, mode='w')
-            print(f"新增 {len(df_processed)} 筆資料")
+            with atomic_write(output_file, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=columns, lineterminator='\n')
+                writer.writeheader()
+                writer.writerows(rows)
+            print(f"新增 {len(rows)} 筆資料")
+
 
+def process_and_save_monthly(date, stock_no, output_file, replace=False):
+    date_str = date.strftime('%Y%m%d')
+    print(f"正在抓取 {date_str} 的資料...")
+
+    data = get_stock_data(date_str, stock_no)
+
+    if data is not None:
+        # 轉換欄位名稱並選擇需要的欄位
+        rows = [{
+            'Date': convert_date(row['日期']),
+            'Open': row['開盤價'].replace(',', ''),
+            'High': row['最高價'].replace(',', ''),
+            'Low': row['最低價'].replace(',', ''),
+            'Close': row['收盤價'].replace(',', ''),
+            'Volume': row['成交股數'].replace(',', '')
+        } for row in data]
+
+        save_rows(rows, ['Date', 'Open', 'High', 'Low', 'Close', 'Volume'], output_file, replace)
         return True
     return False
 
 
 def get_last_date_from_file(output_file):
     if os.path.exists(output_file):
-        # 讀取檔案的最後一行
-        df = pd.read_csv(output_file)
-        last_date = df['Date'].iloc[-1]  # 取得最後一筆日期
+        # 只讀取檔案的最後一行，不需要解析整個檔案
+        with open(output_file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - 1024, 0))
+            lines = f.read().decode('utf-8').strip().splitlines()
+        if len(lines) == 0 or lines[-1].startswith('Date'):
+            return None
+        last_date = lines[-1].split(',')[0]  # 取得最後一筆日期
         last_datetime = datetime.strptime(last_date, '%Y-%m-%d')
         # 返回下一天
         next_day = last_datetime + timedelta(days=1)
@@ -106,45 +143,27 @@ def get_taiwan_index_data(date):
     if response.status_code == 200:
         content = json.loads(response.text)
         if 'data' in content and 'fields' in content:
-            return pd.DataFrame(data=content['data'], columns=content['fields'])
+            return [dict(zip(content['fields'], row)) for row in content['data']]
     return None
 
 
-def process_and_save_taiwan_index(date, output_file):
+def process_and_save_taiwan_index(date, output_file, replace=False):
     date_str = date.strftime('%Y%m%d')
     print(f"正在抓取 {date_str} 的大盤資料...")
 
-    df = get_taiwan_index_data(date_str)
+    data = get_taiwan_index_data(date_str)
 
-    if df is not None:
+    if data is not None:
         # 轉換欄位名稱並選擇需要的欄位
-        df_processed = pd.DataFrame({
-            'Date': df['日期'].apply(convert_date),
-            'Open': df['開盤指數'].str.replace(',', ''),
-            'High': df['最高指數'].str.replace(',', ''),
-            'Low': df['最低指數'].str.replace(',', ''),
-            'Close': df['收盤指數'].str.replace(',', '')
-        })
-
-        # 如果檔案存在，讀取現有資料並過濾重複日期
-        if os.path.exists(output_file):
-            existing_df = pd.read_csv(output_file)
-            # 找出新資料中不存在的日期
-            new_dates = set(df_processed['Date']) - set(existing_df['Date'])
-            # 只保留新日期的資料
-            df_processed = df_processed[df_processed['Date'].isin(new_dates)]
-            
-            if len(df_processed) > 0:
-                # 追加新資料
-                df_processed.to_csv(output_file, index=False, mode='a', header=False)
-                print(f"新增 {len(df_processed)} 筆資料")
-            else:
-                print("沒有新資料需要更新")
-        else:
-            # 如果檔案不存在，寫入所有資料
-            df_processed.to_csv(output_file, index=False, mode='w')
-            print(f"新增 {len(df_processed)} 筆資料")
-
+        rows = [{
+            'Date': convert_date(row['日期']),
+            'Open': row['開盤指數'].replace(',', ''),
+            'High': row['最高指數'].replace(',', ''),
+            'Low': row['最低指數'].replace(',', ''),
+            'Close': row['收盤指數'].replace(',', '')
+        } for row in data]
+
+        save_rows(rows, ['Date', 'Open', 'High', 'Low', 'Close'], output_file, replace)
         return True
     return False
 
@@ -174,18 +193,67 @@ def fetch_taiwan_index_data(start_date, output_file):
         time.sleep(1)  # 避免過快請求
 
 
+def repair_from_queue(queue_file):
+    # 讀取 utils/data_validator.py 產生的補抓清單，只重新抓取有缺漏的月份
+    with open(queue_file, 'r', encoding='utf-8') as f:
+        queue = json.load(f)
+    data_dir = queue.get('data_dir', 'data/twse')
+    refetch = queue.get('refetch', {})
+    verified = queue.setdefault('verified', {})
+
+    for symbol in sorted(set(refetch) | set(queue.get('rewrite', []))):
+        output_file = os.path.join(data_dir, f'{symbol}.csv')
+        remaining = []
+        for month in refetch.get(symbol, []):
+            date = datetime.strptime(month, '%Y-%m')
+            if symbol == '^TWII':
+                success = process_and_save_taiwan_index(date, output_file, replace=True)
+            else:
+                success = process_and_save_monthly(date, symbol, output_file, replace=True)
+            if success:
+                print(f"{symbol} {month} 資料補抓完成")
+                verified.setdefault(symbol, []).append(month)
+            else:
+                print(f"{symbol} {month} 無資料或抓取失敗，保留在補抓清單")
+                remaining.append(month)
+            time.sleep(1)  # 避免過快請求
+
+        # 排序並去除重複日期
+        if os.path.exists(output_file):
+            with file_lock(output_file):
+                rewrite_rows([], output_file)
+        if remaining:
+            refetch[symbol] = remaining
+        else:
+            refetch.pop(symbol, None)
+
+    queue['refetch'] = refetch
+    queue['rewrite'] = []
+    with atomic_write(queue_file, 'w', encoding='utf-8') as f:
+        json.dump(queue, f, ensure_ascii=False, indent=2)
+
+    n_remaining = sum(len(months) for months in refetch.values())
+    print(f"修復完成，補抓清單剩餘 {n_remaining} 個月份")
+
+
 def main():
     # 設定命令列參數
     parser = argparse.ArgumentParser(description='抓取台灣證交所股票歷史資料')
     parser.add_argument('--stock_symbol', type=str, help='指定股票代號，例如 00631L')
     parser.add_argument('--start_date', type=str, default='20140101', help='開始日期，格式 YYYYMMDD，預設 20140101')
     parser.add_argument('--taiwan_index', action='store_true', help='是否抓取大盤指數資料')
+    parser.add_argument('--repair', type=str, nargs='?', const='data/twse/refetch_queue.json', default=None,
+                        help='依 utils/data_validator.py 產生的補抓清單只抓取缺漏月份')
 
     # 解析參數
     args = parser.parse_args()
 
+    if args.repair:
+        repair_from_queue(args.repair)
+        return
+
     if not args.stock_symbol and not args.taiwan_index:
-        parser.error("必須指定 --stock_symbol 或 --taiwan_index")
+        parser.error("必須指定 --stock_symbol、--taiwan_index 或 --repair")
 
     start_date = args.start_date
 
@@ -0,0 +1,454 @@
+import argparse
+import glob
+import inspect
+import itertools
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import utils and strategy
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.backtest_core import load_price_data
+from utils.benchmark import Benchmark, format_relative_metrics
+from utils.indicator_store import IndicatorStore
+from utils.screener import INDICATORS as SCREEN_INDICATORS, IndicatorScreener, load_close_matrix
+from strategy.rsi_strategy import RSIStrategy
+from strategy.rebalance_strategy import RebalanceStrategy
+from strategy.indicator_strategy import IndicatorStrategy
+
+STRATEGIES = {
+    'rsi': RSIStrategy,
+    'rebalance': RebalanceStrategy,
+    'indicator': IndicatorStrategy
+}
+
+
+# 由服務本身決定、不可放在 params 中的建構參數
+RESERVED_PARAMS = ('data_file', 'initial_capital', 'start_date')
+
+
+class RequestError(Exception):
+    """Raised for invalid requests; reported to the client as HTTP 400."""
+
+
+def _coerce_value(name, value, kind):
+    # 轉換為建構參數宣告的型別（例如 "30" -> 30.0）
+    try:
+        if kind is bool:
+            if isinstance(value, str) and value.lower() in ('true', 'false'):
+                return value.lower() == 'true'
+            if not isinstance(value, bool):
+                raise ValueError
+            return value
+        if kind in (int, float):
+            if isinstance(value, bool):
+                raise ValueError
+            number = float(value)
+            if not np.isfinite(number):
+                raise ValueError
+            if kind is int:
+                if not number.is_integer():
+                    raise ValueError
+                return int(number)
+            return number
+        if kind is str:
+            if not isinstance(value, str):
+                raise ValueError
+            return value
+        if kind is tuple:
+            items = value.split(',') if isinstance(value, str) else value
+            if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+                raise ValueError
+            return tuple(items)
+    except (TypeError, ValueError):
+        raise RequestError(f"Invalid value for {name}: {value!r} (expected {kind.__name__})")
+    return value
+
+
+def _positive_int(name, value):
+    # 週期、天數等必須為正整數
+    number = _coerce_value(name, value, int)
+    if number < 1:
+        raise RequestError(f"Invalid value for {name}: {value!r} (expected a positive int)")
+    return number
+
+
+def screen_params(name, params) -> dict:
+    """
+    Validate the parameters of a screener indicator and convert their types.
+
+    Args:
+        name (str): Indicator name registered in `utils.screener.INDICATORS`.
+        params (dict): Parameters from the request, e.g. {"period": 14}.
+
+    Returns:
+        dict: Converted keyword arguments for the indicator.
+
+    Raises:
+        RequestError: On an unknown indicator, unknown parameters or invalid values.
+    """
+    if not isinstance(name, str) or name not in SCREEN_INDICATORS:
+        raise RequestError(f"Unknown indicator: {name}")
+    if not isinstance(params, dict):
+        raise RequestError("params must be an object")
+    # 第一個參數為收盤價矩陣，其餘為指標參數
+    signature = list(inspect.signature(SCREEN_INDICATORS[name]).parameters.values())[1:]
+    allowed = {parameter.name: parameter.default for parameter in signature}
+    coerced = {}
+    for key, value in params.items():
+        if key not in allowed:
+            raise RequestError(f"Unknown parameter for {name}: {key}")
+        if isinstance(allowed[key], int) and not isinstance(allowed[key], bool):
+            coerced[key] = _positive_int(key, value)
+        else:
+            coerced[key] = _coerce_value(key, value, type(allowed[key]))
+    return coerced
+
+
+def coerce_params(strategy_cls, params) -> dict:
+    """
+    Validate request parameters against a strategy's constructor and convert their types.
+
+    Each value is converted to the parameter's annotated type (or the type of its default
+    when it has no annotation), so a JSON string such as "30" becomes the number 30.0.
+
+    Args:
+        strategy_cls (type): BacktestStrategy subclass.
+        params (dict): Parameters from the request.
+
+    Returns:
+        dict: Converted keyword arguments for the constructor.
+
+    Raises:
+        RequestError: On unknown parameters or values that cannot be converted.
+    """
+    if not isinstance(params, dict):
+        raise RequestError("params must be an object")
+    signature = inspect.signature(strategy_cls.__init__).parameters
+    coerced = {}
+    for name, value in params.items():
+        if name in RESERVED_PARAMS or name not in signature or name == 'self':
+            raise RequestError(f"Unknown parameter for {strategy_cls.strategy_name}: {name}")
+        parameter = signature[name]
+        kind = parameter.annotation
+        if kind is inspect.Parameter.empty:
+            kind = None if parameter.default in (None, inspect.Parameter.empty) else type(parameter.default)
+        coerced[name] = _coerce_value(name, value, kind)
+    return coerced
+
+
+def _to_json(value):
+    # 將 numpy / pandas 型別轉為可序列化的值
+    if isinstance(value, np.generic):
+        return _to_json(value.item())
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+class BacktestService:
+    """
+    Keeps price series, indicators and strategy kernels warm in memory between requests.
+
+    Price files are parsed once by `load_price_data` and reparsed automatically when their
+    size or modification time changes, so a fetch running next to the service is picked up
+    by the next request without a restart. The screener matrix is rebuilt the same way.
+    At most `workers` requests run at once, and the runs of a sweep are spread over a pool
+    of `workers` threads.
+    """
+
+    def __init__(self, data_dir='data/twse', workers=4):
+        self.data_dir = data_dir
+        self.store = IndicatorStore(data_dir)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(workers)
+        self._screener = None
+        self._screener_signature = None
+        self._screener_lock = threading.Lock()
+        self._benchmarks = {}
+
+    # ------------------------------------------------------------------
+    # 資料
+    # ------------------------------------------------------------------
+    def symbols(self):
+        return sorted(os.path.splitext(os.path.basename(path))[0]
+                      for path in glob.glob(os.path.join(self.data_dir, '*.csv')))
+
+    def data_file(self, symbol):
+        if not isinstance(symbol, str):
+            raise RequestError(f"Invalid symbol: {symbol!r} (expected str)")
+        data_file = os.path.join(self.data_dir, f"{symbol}.csv")
+        if os.path.basename(symbol) != symbol or not os.path.exists(data_file):
+            raise RequestError(f"Unknown symbol: {symbol}")
+        return data_file
+
+    def _data_signature(self):
+        signature = []
+        for symbol in self.symbols():
+            stat = os.stat(os.path.join(self.data_dir, f"{symbol}.csv"))
+            signature.append((symbol, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def warm_up(self):
+        # 預先讀取所有價格資料與指標，並建立選股矩陣
+        start = time.perf_counter()
+        for symbol in self.symbols():
+            load_price_data(self.data_file(symbol))
+            self.store.get(symbol, 'rsi', period=14)
+        self.screener()
+        return time.perf_counter() - start
+
+    def screener(self):
+        signature = self._data_signature()
+        with self._screener_lock:
+            if signature != self._screener_signature:
+                self._screener = IndicatorScreener(load_close_matrix(self.data_dir), store=self.store)
+                self._screener_signature = signature
+            return self._screener
+
+    def benchmark(self, symbol):
+        # 比較基準在價格檔變動前重複使用，對齊後的報酬也一併保留
+        data_file = self.data_file(symbol)
+        stat = os.stat(data_file)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._benchmarks.get(symbol)
+        if cached is None or cached[0] != signature:
+            cached = (signature, Benchmark(data_file))
+            self._benchmarks[symbol] = cached
+        return cached[1]
+
+    # ------------------------------------------------------------------
+    # 請求處理
+    # ------------------------------------------------------------------
+    def _strategy_cls(self, request):
+        name = request.get('strategy', 'rsi')
+        if not isinstance(name, str) or name not in STRATEGIES:
+            raise RequestError(f"Unknown strategy: {name}")
+        return STRATEGIES[name]
+
+    def _run_strategy(self, strategy_cls, data_file, params, initial_capital, start_date):
+        params = coerce_params(strategy_cls, params)
+        initial_capital = _coerce_value('initial_capital', initial_capital, float)
+        try:
+            strategy = strategy_cls(data_file=data_file, initial_capital=initial_capital,
+                                    start_date=start_date, **params)
+        except (TypeError, ValueError) as e:
+            raise RequestError(str(e))
+        strategy.calculate_portfolio_value()
+        return strategy
+
+    def backtest(self, request):
+        strategy_cls = self._strategy_cls(request)
+        strategy = self._run_strategy(
+            strategy_cls,
+            self.data_file(request.get('symbol', '^TWII')),
+            request.get('params', {}),
+            request.get('initial_capital', 1000000),
+            request.get('start_date')
+        )
+        metrics = strategy.calculate_metrics()
+        if request.get('benchmark'):
+            metrics.update(strategy.benchmark_metrics(self.benchmark(request['benchmark'])))
+        result = {
+            'metrics': metrics,
+            'final_portfolio': strategy.final_portfolio(),
+            'trades': strategy.trades if request.get('include_trades') else len(strategy.trades)
+        }
+        if request.get('include_curve'):
+            portfolio_df = strategy.portfolio_df
+            result['curve'] = {
+                'dates': [date.strftime('%Y-%m-%d') for date in portfolio_df.index],
+                'total_value': portfolio_df['total_value'].tolist()
+            }
+        return result
+
+    def sweep(self, request):
+        strategy_cls = self._strategy_cls(request)
+        data_file = self.data_file(request.get('symbol', '^TWII'))
+        initial_capital = request.get('initial_capital', 1000000)
+        start_date = request.get('start_date')
+
+        # param_grid 為參數組合列表；grid 為 {參數: [值...]}，展開為所有組合
+        if 'grid' in request:
+            grid = request['grid']
+            if not isinstance(grid, dict) or not all(isinstance(values, list) for values in grid.values()):
+                raise RequestError("grid must be an object mapping each parameter to a list of values")
+            keys = sorted(grid)
+            param_grid = [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+        else:
+            param_grid = request.get('param_grid', [])
+            if not isinstance(param_grid, list) or not all(isinstance(params, dict) for params in param_grid):
+                raise RequestError("param_grid must be a list of objects")
+        # 執行前先檢查所有參數組合
+        for params in param_grid:
+            coerce_params(strategy_cls, params)
+
+        def run(params):
+            strategy = self._run_strategy(strategy_cls, data_file, params, initial_capital, start_date)
+            return strategy, {'params': params, 'metrics': strategy.calculate_metrics()}
+
+        results = list(self.executor.map(run, param_grid))
+        runs = [run for _, run in results]
+
+        # 所有參數組合的資產曲線一次與比較基準計算相對績效
+        if request.get('benchmark') and results:
+            dates = results[0][0].df.index
+            values = np.full((len(results), len(dates)), np.nan)
+            for i, (strategy, _) in enumerate(results):
+                curve = strategy.records['total_value']
+                values[i, len(dates) - len(curve):] = curve
+            scores = self.benchmark(request['benchmark']).score(values, dates)
+            for i, run in enumerate(runs):
+                run['metrics'].update(format_relative_metrics(scores, i))
+        return {'runs': runs}
+
+    def screen(self, request):
+        name = request.get('indicator', 'rsi')
+        params = screen_params(name, request.get('params', {'period': 14}))
+        days = _positive_int('days', request.get('days', 5))
+        conditions = [key for key in ('below', 'above', 'crossed_above', 'crossed_below') if key in request]
+        if len(conditions) > 1:
+            raise RequestError(f"Only one condition may be given: {', '.join(conditions)}")
+        level = _coerce_value(conditions[0], request[conditions[0]], float) if conditions else None
+
+        screener = self.screener()
+        if 'below' in request:
+            result = screener.below(name, level, **params)
+        elif 'above' in request:
+            result = screener.above(name, level, **params)
+        elif 'crossed_above' in request:
+            result = screener.crossed_above(name, level, days, **params)
+        elif 'crossed_below' in request:
+            result = screener.crossed_below(name, level, days, **params)
+        else:
+            result = screener.latest(name, **params)
+        if isinstance(result, pd.DataFrame):
+            # 最新數值附上資料日期，落後最新日期的股票標記為 stale
+            return {'results': {symbol: {'value': row[name], 'as_of': row['as_of'], 'stale': bool(row['stale'])}
+                                for symbol, row in result.iterrows()}}
+        return {'results': {symbol: value for symbol, value in result.items()}}
+
+    def health(self, request=None):
+        return {'status': 'ok', 'symbols': self.symbols()}
+
+    def handle(self, path, request):
+        routes = {
+            '/backtest': self.backtest,
+            '/sweep': self.sweep,
+            '/screen': self.screen,
+            '/health': self.health
+        }
+        if path not in routes:
+            raise KeyError(path)
+        if not isinstance(request, dict):
+            raise RequestError("Request body must be a JSON object")
+        with self._slots:
+            return routes[path](request)
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(_to_json(payload), ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _dispatch(self, request):
+            start = time.perf_counter()
+            try:
+                result = service.handle(self.path, request)
+            except KeyError:
+                self._send(404, {'error': f"Unknown path: {self.path}"})
+                return
+            except RequestError as e:
+                self._send(400, {'error': str(e)})
+                return
+            except Exception as e:
+                self._send(500, {'error': f"{type(e).__name__}: {e}"})
+                return
+            result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            self._send(200, result)
+
+        def do_GET(self):
+            self._dispatch({})
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                self._send(400, {'error': 'Request body must be JSON'})
+                return
+            self._dispatch(request)
+
+        def address_string(self):
+            # Unix socket 沒有用戶端位址
+            return self.client_address[0] if self.client_address else 'unix'
+
+    return Handler
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        # 移除前一次執行留下的 socket 檔
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+
+def main():
+    # 設定命令列參數
+    parser = argparse.ArgumentParser(description='常駐回測服務（本機 JSON API）')
+    parser.add_argument('--data_dir', type=str, default='data/twse', help='股票資料目錄')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='HTTP 監聽位址')
+    parser.add_argument('--port', type=int, default=8765, help='HTTP 監聽埠')
+    parser.add_argument('--unix_socket', type=str, default=None, help='改用 Unix socket 監聽（指定路徑）')
+    parser.add_argument('--workers', type=int, default=4, help='處理請求的執行緒數')
+
+    args = parser.parse_args()
+
+    service = BacktestService(args.data_dir, workers=args.workers)
+    print(f"預先載入資料與指標... {service.warm_up():.2f} 秒，共 {len(service.symbols())} 檔股票")
+
+    handler = make_handler(service)
+    if args.unix_socket:
+        server = ThreadingUnixHTTPServer(args.unix_socket, handler)
+        print(f"回測服務已啟動: unix:{args.unix_socket}")
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), handler)
+        print(f"回測服務已啟動: http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.executor.shutdown()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.remove(args.unix_socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import datetime
 import sys
 import os
 
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.plotting import get_pyplot, save_figure
+
 def calculate_future_payment_capacity(row):
     """
     計算未來配息能力
@@ -41,9 +44,8 @@ def analyze_dividend_payment_capacity(stock_symbol):
     # 計算未來配息能力指標
     df['Future_Payment_Capacity'] = df.apply(calculate_future_payment_capacity, axis=1)
     
-    # 設定中文字體
-    plt.rcParams['font.sans-serif'] = ['Noto Sans CJK TC', 'Noto Sans CJK JP', 'Noto Sans CJK KR', 'Noto Sans CJK SC']
-    plt.rcParams['axes.unicode_minus'] = False
+    # 載入 matplotlib 並設定中文字體
+    plt = get_pyplot()
     
     # 創建圖表來視覺化分析結果
     plt.figure(figsize=(12, 6))
@@ -69,7 +71,7 @@ def analyze_dividend_payment_capacity(stock_symbol):
     
     # 儲存分析結果
     output_file = f'report/future_dividend_payment_capacity_{stock_symbol}.png'
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    save_figure(plt, output_file, dpi=300, bbox_inches='tight')
     print(f"分析結果已儲存至 {output_file}")
 
     # 返回分析後的數據框
@@ -0,0 +1,319 @@
+import pandas as pd
+import numpy as np
+import argparse
+import os
+import sys
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.technical_indicators import sma_array, ema_array, macd_array, bollinger_array, kd_array, atr_array
+from utils.backtest_core import BacktestStrategy, run_backtest_cli
+from utils.plotting import get_pyplot, save_figure
+
+# 規則名稱 -> 報告名稱
+RULE_NAMES = {
+    'ma': '均線交叉',
+    'macd': 'MACD',
+    'kd': 'KD',
+    'bollinger': '布林通道',
+    'atr': 'ATR通道'
+}
+
+COMBINE_MODES = ('all', 'any', 'majority')
+
+
+def _hold(enter: np.ndarray, exit_: np.ndarray) -> np.ndarray:
+    # 進場條件成立後持續看多，直到出場條件成立（兩者同時成立時以出場為準）
+    events = np.where(exit_, 0, np.where(enter, 1, -1))
+    last_event = np.where(events >= 0, np.arange(events.shape[-1]), 0)
+    np.maximum.accumulate(last_event, axis=-1, out=last_event)
+    return np.take_along_axis(events, last_event, axis=-1) == 1
+
+
+class IndicatorStrategy(BacktestStrategy):
+    """
+    Combine technical indicator rules into one long/flat position.
+
+    Every rule turns its indicator into a bullish/bearish state for each bar:
+
+    * ma: the fast moving average is above the slow one
+    * macd: the MACD histogram is positive
+    * kd: K is above D
+    * bollinger: bullish from a close below the lower band until a close above the upper band
+    * atr: bullish from a close above the slow average plus `atr_multiplier` ATRs until a
+      close below the average minus `atr_multiplier` ATRs
+
+    The position is long when all, any or the majority of the rules are bullish; buying
+    and selling happen on the bars where the combined state changes. Every indicator is
+    computed by the array kernels in `technical_indicators`, so no rule runs per bar.
+    """
+
+    strategy_name = 'indicator_strategy'
+    record_fields = {'bullish_rules': 'BullishRules'}
+    trade_fields = ('bullish_rules',)
+
+    def __init__(self, data_file, initial_capital: float = 1000000, rules: tuple = ('ma', 'macd'),
+                 combine: str = 'all', fast_period: int = 5, slow_period: int = 20, ma_type: str = 'sma',
+                 macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9, kd_period: int = 9,
+                 bollinger_period: int = 20, bollinger_std: float = 2.0, atr_period: int = 14,
+                 atr_multiplier: float = 1.0, start_date=None):
+        # 讀取資料
+        super().__init__(data_file, initial_capital, start_date)
+
+        if isinstance(rules, str):
+            rules = rules.split(',')
+        unknown = [rule for rule in rules if rule not in RULE_NAMES]
+        if not rules or unknown:
+            raise ValueError(f"Unknown rules: {', '.join(unknown) or '(none)'}")
+        if combine not in COMBINE_MODES:
+            raise ValueError(f"Unknown combine mode: {combine}")
+
+        # 初始化參數
+        self.rules = tuple(rules)
+        self.combine = combine
+        self.fast_period = fast_period
+        self.slow_period = slow_period
+        self.ma_type = ma_type
+        self.macd_fast = macd_fast
+        self.macd_slow = macd_slow
+        self.macd_signal = macd_signal
+        self.kd_period = kd_period
+        self.bollinger_period = bollinger_period
+        self.bollinger_std = bollinger_std
+        self.atr_period = atr_period
+        self.atr_multiplier = atr_multiplier
+
+        # 計算各規則的多空狀態與看多的規則數
+        self.states = self.rule_states(
+            self.df['High'].to_numpy(dtype=float), self.df['Low'].to_numpy(dtype=float), self.close
+        )
+        self.df['BullishRules'] = np.sum(list(self.states.values()), axis=0)
+
+    def warmup_bars(self):
+        # 各規則的指標計算完成前需要跳過的K棒數
+        warmup = {
+            'ma': self.slow_period,
+            'macd': self.macd_slow + self.macd_signal,
+            'kd': self.kd_period,
+            'bollinger': self.bollinger_period,
+            'atr': max(self.slow_period, self.atr_period)
+        }
+        return max(warmup[rule] for rule in self.rules)
+
+    def rule_states(self, high, low, close):
+        """
+        Evaluate every rule on one series, or on (paths x bars) arrays of prices.
+
+        Returns:
+            dict: Rule name -> boolean array shaped like `close`, True where the rule is bullish.
+        """
+        averages = {}
+
+        def moving_average(period):
+            # 均線規則與 ATR 通道共用同一組均線
+            if period not in averages:
+                averages[period] = (sma_array(close, period) if self.ma_type == 'sma'
+                                    else ema_array(close, period))
+            return averages[period]
+
+        states = {}
+        with np.errstate(invalid='ignore'):
+            for rule in self.rules:
+                if rule == 'ma':
+                    states[rule] = moving_average(self.fast_period) > moving_average(self.slow_period)
+                elif rule == 'macd':
+                    macd = macd_array(close, self.macd_fast, self.macd_slow, self.macd_signal)
+                    states[rule] = macd['histogram'] > 0
+                elif rule == 'kd':
+                    kd = kd_array(high, low, close, period=self.kd_period)
+                    states[rule] = kd['k'] > kd['d']
+                elif rule == 'bollinger':
+                    bands = bollinger_array(close, self.bollinger_period, self.bollinger_std)
+                    states[rule] = _hold(close < bands['lower'], close > bands['upper'])
+                elif rule == 'atr':
+                    middle = moving_average(self.slow_period)
+                    band = self.atr_multiplier * atr_array(high, low, close, period=self.atr_period)['atr']
+                    states[rule] = _hold(close > middle + band, close < middle - band)
+        return states
+
+    def position(self, states):
+        # 依組合方式決定每根K棒是否持股
+        bullish = np.sum(list(states.values()), axis=0)
+        if self.combine == 'all':
+            return bullish == len(states)
+        if self.combine == 'any':
+            return bullish > 0
+        return bullish * 2 > len(states)
+
+    def first_bar(self):
+        # 跳過指標尚未計算完成的期間
+        return min(self.warmup_bars(), len(self.df) - 1)
+
+    def signals(self):
+        # 組合狀態轉為看多時買進，轉為看空時賣出
+        holding = self.position(self.states)
+        holding[:self.first_bar()] = False
+        signals = np.zeros(len(holding), dtype=int)
+        signals[1:] = np.diff(holding.astype(int))
+        return signals
+
+    def extra_metrics(self, years):
+        # 持股時間比例
+        holding = self.position(self.states)[self.first_bar():]
+        return {'持股時間比例': f"{holding.mean() * 100:.2f}%" if len(holding) else "0.00%"}
+
+    def plot_results(self, filename):
+        portfolio_df = self.portfolio_df
+        if len(portfolio_df) == 0:
+            print("沒有足夠數據來繪製圖表")
+            return None
+
+        # 載入 matplotlib 並設定中文字體
+        plt = get_pyplot()
+
+        plt.figure(figsize=(12, 12))
+
+        # 繪製總資產價值
+        plt.subplot(3, 1, 1)
+        plt.plot(portfolio_df.index, portfolio_df['total_value'], label='總資產價值')
+        plt.title('資產價值趨勢')
+        plt.xlabel('日期')
+        plt.ylabel('價值')
+        plt.legend()
+        plt.grid(True)
+
+        # 繪製收盤價和買賣訊號
+        plt.subplot(3, 1, 2)
+        plt.plot(portfolio_df.index, self.df['Close'].reindex(portfolio_df.index), label='收盤價')
+        trades_df = pd.DataFrame(self.trades)
+        if len(trades_df) > 0:
+            buy_signals = trades_df[trades_df['type'] == 'buy']
+            sell_signals = trades_df[trades_df['type'] == 'sell']
+
+            if len(buy_signals) > 0:
+                plt.scatter(buy_signals['date'], buy_signals['price'], color='g', marker='^', s=100, label='買入訊號')
+
+            if len(sell_signals) > 0:
+                plt.scatter(sell_signals['date'], sell_signals['price'], color='r', marker='v', s=100, label='賣出訊號')
+
+        plt.title('收盤價和交易訊號')
+        plt.xlabel('日期')
+        plt.ylabel('價格')
+        plt.legend()
+        plt.grid(True)
+
+        # 繪製看多的規則數
+        plt.subplot(3, 1, 3)
+        plt.step(portfolio_df.index, portfolio_df['bullish_rules'], where='post', label='看多規則數')
+        plt.title('看多規則數（' + '、'.join(RULE_NAMES[rule] for rule in self.rules) + '）')
+        plt.xlabel('日期')
+        plt.ylabel('規則數')
+        plt.ylim(-0.2, len(self.rules) + 0.2)
+        plt.legend()
+        plt.grid(True)
+
+        plt.tight_layout()
+
+        save_figure(plt, filename)
+        plt.close()
+        return filename
+
+def main():
+    # 設定命令列參數
+    parser = argparse.ArgumentParser(description='技術指標組合策略分析')
+    parser.add_argument('--data_file', type=str, default='data/twse/^TWII.csv', help='股票資料檔案')
+    parser.add_argument('--initial_capital', type=float, default=1000000, help='初始資金')
+    parser.add_argument('--rules', type=str, default='ma,macd',
+                        help=f"使用的規則，以逗號分隔（可選：{', '.join(RULE_NAMES)}）")
+    parser.add_argument('--combine', type=str, choices=COMBINE_MODES, default='all',
+                        help='規則組合方式：all（全部看多）、any（任一看多）、majority（過半看多）')
+    parser.add_argument('--fast_period', type=int, default=5, help='快速均線周期')
+    parser.add_argument('--slow_period', type=int, default=20, help='慢速均線周期（ATR通道中線）')
+    parser.add_argument('--ma_type', type=str, choices=['sma', 'ema'], default='sma', help='均線種類')
+    parser.add_argument('--macd_fast', type=int, default=12, help='MACD快線周期')
+    parser.add_argument('--macd_slow', type=int, default=26, help='MACD慢線周期')
+    parser.add_argument('--macd_signal', type=int, default=9, help='MACD訊號線周期')
+    parser.add_argument('--kd_period', type=int, default=9, help='KD的RSV周期')
+    parser.add_argument('--bollinger_period', type=int, default=20, help='布林通道周期')
+    parser.add_argument('--bollinger_std', type=float, default=2.0, help='布林通道標準差倍數')
+    parser.add_argument('--atr_period', type=int, default=14, help='ATR周期')
+    parser.add_argument('--atr_multiplier', type=float, default=1.0, help='ATR通道寬度（ATR倍數）')
+    parser.add_argument('--start_date', type=str, default=None, help='開始日期 (YYYY-MM-DD)')
+    parser.add_argument('--no_cache', action='store_true', help='不使用結果快取，強制重新計算')
+    parser.add_argument('--resume', action='store_true', help='從上次的檢查點續跑，只計算新增的資料')
+    parser.add_argument('--no_plot', action='store_true', help='只計算績效指標與報告，不繪製圖表')
+    parser.add_argument('--no_dashboard', action='store_true', help='不加入回測結果總覽（report/dashboard）')
+    parser.add_argument('--benchmark', type=str, default='data/twse/^TWII.csv',
+                        help='比較基準的價格資料檔案（計算 Alpha、Beta 等相對績效）')
+
+    args = parser.parse_args()
+    rules = [rule.strip() for rule in args.rules.split(',') if rule.strip()]
+    unknown = [rule for rule in rules if rule not in RULE_NAMES]
+    if not rules or unknown:
+        parser.error(f"未知的規則: {', '.join(unknown) or args.rules}")
+
+    # 只列出使用到的規則參數
+    rule_parameters = {
+        'ma': [f"均線: {args.ma_type.upper()} {args.fast_period}/{args.slow_period}"],
+        'macd': [f"MACD: {args.macd_fast}/{args.macd_slow}/{args.macd_signal}"],
+        'kd': [f"KD周期: {args.kd_period}"],
+        'bollinger': [f"布林通道: {args.bollinger_period}日 ±{args.bollinger_std}倍標準差"],
+        'atr': [f"ATR通道: {args.ma_type.upper()} {args.slow_period} ±{args.atr_multiplier}倍ATR({args.atr_period})"]
+    }
+
+    # 生成報告檔名
+    stock_code = os.path.splitext(os.path.basename(args.data_file))[0]
+    base_filename = f"indicator_strategy_{stock_code}_{'-'.join(rules)}_{args.combine}"
+    if 'ma' in rules or 'atr' in rules:
+        base_filename += f"_{args.ma_type}{args.fast_period}-{args.slow_period}"
+    if 'macd' in rules:
+        base_filename += f"_macd{args.macd_fast}-{args.macd_slow}-{args.macd_signal}"
+    if 'kd' in rules:
+        base_filename += f"_kd{args.kd_period}"
+    if 'bollinger' in rules:
+        base_filename += f"_bb{args.bollinger_period}-{args.bollinger_std}"
+    if 'atr' in rules:
+        base_filename += f"_atr{args.atr_period}-{args.atr_multiplier}"
+    if args.start_date:
+        base_filename += f"_start{args.start_date.replace('-', '')}"
+
+    # 參數設定
+    parameter_lines = [
+        f"股票資料: {args.data_file}",
+        f"初始資金: {args.initial_capital:,.2f}",
+        f"規則: {'、'.join(RULE_NAMES[rule] for rule in rules)}",
+        f"組合方式: {args.combine}"
+    ]
+    for rule in rules:
+        parameter_lines.extend(rule_parameters[rule])
+    if args.start_date:
+        parameter_lines.append(f"開始日期: {args.start_date}")
+
+    # 執行策略並輸出報告
+    run_backtest_cli(
+        IndicatorStrategy,
+        args,
+        strategy_kwargs={
+            'data_file': args.data_file,
+            'initial_capital': args.initial_capital,
+            'rules': rules,
+            'combine': args.combine,
+            'fast_period': args.fast_period,
+            'slow_period': args.slow_period,
+            'ma_type': args.ma_type,
+            'macd_fast': args.macd_fast,
+            'macd_slow': args.macd_slow,
+            'macd_signal': args.macd_signal,
+            'kd_period': args.kd_period,
+            'bollinger_period': args.bollinger_period,
+            'bollinger_std': args.bollinger_std,
+            'atr_period': args.atr_period,
+            'atr_multiplier': args.atr_multiplier,
+            'start_date': args.start_date
+        },
+        base_filename=base_filename,
+        parameter_lines=parameter_lines
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import numpy as np
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.backtest_core import load_price_data, calculate_batch_metrics
+from utils.atomic_io import atomic_write
+from utils.monte_carlo import run_monte_carlo, TRADING_DAYS_PER_YEAR
+from utils.plotting import get_pyplot, save_figure
+from strategy.rsi_strategy import RSIStrategy
+from strategy.rebalance_strategy import RebalanceStrategy
+
+STRATEGIES = {
+    'rsi': RSIStrategy,
+    'rebalance': RebalanceStrategy
+}
+
+METRIC_NAMES = {
+    'cagr': '年化報酬率',
+    'max_drawdown': '最大回撤',
+    'sharpe': '夏普比率'
+}
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def strategy_params(args):
+    # 依策略取出對應的參數
+    if args.strategy == 'rsi':
+        return {
+            'oversold_threshold': args.oversold_threshold,
+            'overbought_threshold': args.overbought_threshold,
+            'rsi_period': args.rsi_period
+        }
+    return {
+        'cash_ratio': args.cash_ratio,
+        'stock_ratio': args.stock_ratio,
+        'rebalance_threshold': args.rebalance_threshold
+    }
+
+
+def format_metric(key, value):
+    if key == 'sharpe':
+        return f"{value:.2f}"
+    return f"{value:.2f}%"
+
+
+def plot_distributions(results, historical, filename):
+    plt = get_pyplot()
+
+    plt.figure(figsize=(15, 5))
+    for i, (key, name) in enumerate(METRIC_NAMES.items()):
+        plt.subplot(1, 3, i + 1)
+        plt.hist(results[key], bins=50, alpha=0.7)
+        plt.axvline(x=historical[key], color='r', linestyle='--', label='歷史路徑')
+        plt.axvline(x=np.median(results[key]), color='k', linestyle=':', label='中位數')
+        plt.title(name)
+        plt.legend()
+        plt.grid(True)
+
+    plt.tight_layout()
+    save_figure(plt, filename)
+    plt.close()
+    return filename
+
+
+def main():
+    # 設定命令列參數
+    parser = argparse.ArgumentParser(description='策略穩健度分析（區塊自助法 / 市場狀態重組蒙地卡羅模擬）')
+    parser.add_argument('--strategy', type=str, choices=sorted(STRATEGIES), default='rsi', help='策略名稱')
+    parser.add_argument('--data_file', type=str, default='data/twse/^TWII.csv', help='股票資料檔案')
+    parser.add_argument('--initial_capital', type=float, default=1000000, help='初始資金')
+    parser.add_argument('--method', type=str, choices=['block', 'regime'], default='block',
+                        help='路徑產生方式：block（區塊自助法）或 regime（多空區段重組）')
+    parser.add_argument('--n_paths', type=int, default=5000, help='模擬路徑數')
+    parser.add_argument('--years', type=float, default=None, help='每條路徑的年數（預設與歷史資料等長）')
+    parser.add_argument('--block_size', type=int, default=20, help='區塊自助法的區塊長度（交易日）')
+    parser.add_argument('--regime_window', type=int, default=60, help='判斷多空狀態的回溯交易日數')
+    parser.add_argument('--chunk_size', type=int, default=500, help='每批模擬的路徑數（控制記憶體用量）')
+    parser.add_argument('--workers', type=int, default=None, help='平行處理的行程數（預設為 CPU 核心數）')
+    parser.add_argument('--seed', type=int, default=None, help='亂數種子')
+    parser.add_argument('--oversold_threshold', type=float, default=30, help='RSI超賣閾值')
+    parser.add_argument('--overbought_threshold', type=float, default=70, help='RSI超買閾值')
+    parser.add_argument('--rsi_period', type=int, default=14, help='RSI計算周期')
+    parser.add_argument('--cash_ratio', type=float, default=0.5, help='現金比例')
+    parser.add_argument('--stock_ratio', type=float, default=0.5, help='股票比例')
+    parser.add_argument('--rebalance_threshold', type=float, default=0.5, help='再平衡觸發閾值')
+    parser.add_argument('--start_date', type=str, default=None, help='開始日期 (YYYY-MM-DD)')
+    parser.add_argument('--no_plot', action='store_true', help='不繪製分布圖')
+
+    args = parser.parse_args()
+
+    strategy_cls = STRATEGIES[args.strategy]
+    params = strategy_params(args)
+    closes = load_price_data(args.data_file, args.start_date)['Close'].to_numpy(dtype=float)
+    n_bars = int(args.years * TRADING_DAYS_PER_YEAR) if args.years else None
+
+    # 歷史路徑的績效
+    values, _ = strategy_cls.simulate_batch(closes, initial_capital=args.initial_capital, **params)
+    historical = {
+        key: value[0]
+        for key, value in calculate_batch_metrics(values, (values.shape[1] - 1) / TRADING_DAYS_PER_YEAR).items()
+    }
+
+    # 蒙地卡羅模擬
+    start_time = time.perf_counter()
+    results = run_monte_carlo(
+        strategy_cls, closes, params,
+        n_paths=args.n_paths,
+        n_bars=n_bars,
+        method=args.method,
+        block_size=args.block_size,
+        regime_window=args.regime_window,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        seed=args.seed,
+        initial_capital=args.initial_capital
+    )
+    elapsed = time.perf_counter() - start_time
+
+    # 確保輸出目錄存在
+    output_dir = "report"
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    # 生成報告檔名
+    stock_code = os.path.splitext(os.path.basename(args.data_file))[0]
+    param_text = '_'.join(f"{key}{value}" for key, value in params.items())
+    base_filename = f"monte_carlo_{args.strategy}_{stock_code}_{args.method}_paths{args.n_paths}_{param_text}"
+    if args.years:
+        base_filename += f"_years{args.years}"
+    if args.start_date:
+        base_filename += f"_start{args.start_date.replace('-', '')}"
+
+    lines = ["=== 參數設定 ==="]
+    lines.append(f"策略: {args.strategy}")
+    lines.append(f"股票資料: {args.data_file}")
+    lines.append(f"初始資金: {args.initial_capital:,.2f}")
+    for key, value in params.items():
+        lines.append(f"{key}: {value}")
+    lines.append(f"路徑產生方式: {args.method}")
+    lines.append(f"模擬路徑數: {args.n_paths}")
+    lines.append(f"每條路徑交易日數: {n_bars or len(closes) - 1}")
+    if args.start_date:
+        lines.append(f"開始日期: {args.start_date}")
+    lines.append("")
+
+    lines.append("=== 績效分布 ===")
+    lines.append(f"{'指標':<8}{'歷史':>10}{'平均':>10}" + ''.join(f"{f'P{p}':>10}" for p in PERCENTILES))
+    for key, name in METRIC_NAMES.items():
+        percentiles = np.percentile(results[key], PERCENTILES)
+        lines.append(
+            f"{name:<8}{format_metric(key, historical[key]):>10}{format_metric(key, results[key].mean()):>10}"
+            + ''.join(f"{format_metric(key, value):>10}" for value in percentiles)
+        )
+    lines.append("")
+    lines.append(f"年化報酬率為負的機率: {(results['cagr'] < 0).mean() * 100:.2f}%")
+    lines.append(f"模擬耗時: {elapsed:.2f} 秒")
+
+    report_filename = os.path.join(output_dir, base_filename + ".txt")
+    with atomic_write(report_filename, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+    print('\n'.join(lines))
+    print(f"\n報告已儲存為 {report_filename}")
+
+    if not args.no_plot:
+        chart_filename = plot_distributions(results, historical, os.path.join(output_dir, base_filename + ".png"))
+        print(f"圖表已儲存為 {chart_filename}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import pandas as pd
+import numpy as np
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add parent directory to path to import utils and strategy
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.atomic_io import atomic_write
+from utils.backtest_core import BacktestStrategy
+from utils.benchmark import Benchmark, METRIC_NAMES as RELATIVE_METRIC_NAMES
+from utils.plotting import get_pyplot, save_figure
+from utils.portfolio import (REBALANCE_SCHEDULES, sleeve_curve, align_curves, weight_grid, rebalance_bars,
+                             combine_sleeves, evaluate_mixes)
+from strategy.rsi_strategy import RSIStrategy
+from strategy.rebalance_strategy import RebalanceStrategy
+
+
+class BuyAndHoldStrategy(BacktestStrategy):
+    strategy_name = 'buy_and_hold'
+
+    def signals(self):
+        # 第一根K棒全數買入後持有
+        signals = np.zeros(len(self.close), dtype=int)
+        signals[:1] = 1
+        return signals
+
+
+SLEEVE_STRATEGIES = {
+    'rsi': RSIStrategy,
+    'rebalance': RebalanceStrategy,
+    'buy_and_hold': BuyAndHoldStrategy
+}
+
+DEFAULT_SLEEVES = 'rsi:data/twse/^TWII.csv,rebalance:data/twse/00631L.csv,buy_and_hold:data/twse/0050.csv'
+
+# 指標鍵值 -> 報告名稱
+METRIC_NAMES = {
+    'cagr': '年化報酬率',
+    'max_drawdown': '最大回撤',
+    'sharpe': '夏普比率',
+    **RELATIVE_METRIC_NAMES
+}
+
+
+def parse_sleeve(text):
+    """
+    Parse a sleeve given as `strategy:data_file[:param=value...]`.
+
+    Returns:
+        tuple: (sleeve name, strategy class, data file, parameter dict).
+    """
+    parts = text.split(':')
+    if len(parts) < 2 or parts[0] not in SLEEVE_STRATEGIES:
+        raise ValueError(f"Invalid sleeve: {text}")
+    strategy, data_file = parts[0], parts[1]
+    params = {}
+    for item in parts[2:]:
+        key, _, value = item.partition('=')
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+    symbol = os.path.splitext(os.path.basename(data_file))[0]
+    return f"{strategy}_{symbol}", SLEEVE_STRATEGIES[strategy], data_file, params
+
+
+def run_sleeves(sleeves, initial_capital=1000000, start_date=None):
+    """
+    Run every sleeve strategy once.
+
+    Returns:
+        dict: Sleeve name -> equity curve (pd.Series indexed by date).
+    """
+    curves = {}
+    for name, strategy_cls, data_file, params in sleeves:
+        strategy = strategy_cls(data_file=data_file, initial_capital=initial_capital, start_date=start_date, **params)
+        strategy.calculate_portfolio_value()
+        curves[name] = sleeve_curve(strategy)
+    return curves
+
+
+def format_metric(key, value):
+    if key in ('sharpe', 'beta', 'information_ratio'):
+        return f"{value:.2f}"
+    return f"{value:.2f}%"
+
+
+def write_report(filename, parameter_lines, growth, results, sort_by, top):
+    sleeve_names = list(growth.columns)
+    metric_keys = [key for key in METRIC_NAMES if key in results.columns]
+    # 追蹤誤差與下跌捕獲率越低越好，其餘越高越好（最大回撤為負值）
+    ranked = results.sort_values(sort_by, ascending=sort_by in ('tracking_error', 'down_capture'), kind='stable')
+
+    with atomic_write(filename, 'w', encoding='utf-8') as f:
+        # 寫入參數設定
+        f.write("=== 參數設定 ===\n")
+        for line in parameter_lines:
+            f.write(f"{line}\n")
+        f.write("\n")
+
+        # 寫入各策略單獨的績效（權重 100% 且不再平衡）
+        f.write("=== 各策略績效 ===\n")
+        single = results[(results['schedule'] == 'none') & (results[sleeve_names].max(axis=1) == 1)]
+        for name in sleeve_names:
+            row = single[single[name] == 1]
+            if len(row) == 0:
+                continue
+            row = row.iloc[0]
+            metrics = '，'.join(f"{METRIC_NAMES[key]} {format_metric(key, row[key])}" for key in metric_keys)
+            f.write(f"{name}: {metrics}\n")
+        f.write("\n")
+
+        # 寫入排名最前的組合
+        f.write(f"=== 前 {min(top, len(ranked))} 名組合（依{METRIC_NAMES[sort_by]}排序）===\n")
+        table = ranked.head(top).copy()
+        for name in sleeve_names:
+            table[name] = (table[name] * 100).map(lambda value: f"{value:.0f}%")
+        table['final_value'] = table['final_value'].map(lambda value: f"{value:,.0f}")
+        for key in metric_keys:
+            table[key] = [format_metric(key, value) for value in table[key]]
+        table = table[sleeve_names + ['schedule', 'final_value'] + metric_keys]
+        table.columns = sleeve_names + ['再平衡', '最終資產'] + [METRIC_NAMES[key] for key in metric_keys]
+        f.write(table.to_string(index=False))
+        f.write("\n")
+    return ranked
+
+
+def plot_results(filename, growth, best, initial_capital):
+    # 載入 matplotlib 並設定中文字體
+    plt = get_pyplot()
+
+    plt.figure(figsize=(12, 6))
+    for name in growth.columns:
+        plt.plot(growth.index, growth[name] * initial_capital, label=name, alpha=0.6)
+    plt.plot(growth.index, best, label='最佳組合', color='k', linewidth=2)
+    plt.title('各策略與最佳組合的資產價值')
+    plt.xlabel('日期')
+    plt.ylabel('價值')
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+
+    save_figure(plt, filename)
+    plt.close()
+    return filename
+
+
+def main():
+    # 設定命令列參數
+    parser = argparse.ArgumentParser(description='多策略資金配置組合分析')
+    parser.add_argument('--sleeves', type=str, default=DEFAULT_SLEEVES,
+                        help='以逗號分隔的策略，每個格式為 策略:資料檔[:參數=值...]'
+                             f"（策略可選：{', '.join(SLEEVE_STRATEGIES)}）")
+    parser.add_argument('--initial_capital', type=float, default=1000000, help='初始資金')
+    parser.add_argument('--weight_step', type=float, default=0.05, help='配置權重的間隔（例如 0.05 代表 5%%）')
+    parser.add_argument('--schedules', type=str, default='none,monthly,quarterly,yearly',
+                        help=f"以逗號分隔的再平衡週期（{', '.join(REBALANCE_SCHEDULES)} 或間隔交易日數）")
+    parser.add_argument('--sort_by', type=str, default='sharpe', choices=sorted(METRIC_NAMES), help='排序依據')
+    parser.add_argument('--top', type=int, default=20, help='報告列出的組合數')
+    parser.add_argument('--start_date', type=str, default=None, help='開始日期 (YYYY-MM-DD)')
+    parser.add_argument('--benchmark', type=str, default='data/twse/^TWII.csv',
+                        help='比較基準的價格資料檔案（計算 Alpha、Beta 等相對績效）')
+    parser.add_argument('--no_plot', action='store_true', help='只輸出報告，不繪製圖表')
+
+    args = parser.parse_args()
+    try:
+        sleeves = [parse_sleeve(text.strip()) for text in args.sleeves.split(',') if text.strip()]
+    except ValueError as e:
+        parser.error(str(e))
+    schedules = [text.strip() for text in args.schedules.split(',') if text.strip()]
+
+    # 每個策略只回測一次
+    start_time = time.perf_counter()
+    growth = align_curves(run_sleeves(sleeves, args.initial_capital, args.start_date))
+    sleeve_time = time.perf_counter() - start_time
+
+    benchmark = None
+    if args.benchmark and os.path.exists(args.benchmark):
+        benchmark = Benchmark(args.benchmark)
+    elif args.benchmark:
+        print(f"找不到比較基準 {args.benchmark}，略過相對績效")
+    if args.sort_by not in ('cagr', 'max_drawdown', 'sharpe') and benchmark is None:
+        parser.error(f"--sort_by {args.sort_by} 需要比較基準")
+
+    # 所有權重組合與再平衡週期以矩陣運算一次評估
+    start_time = time.perf_counter()
+    weights = weight_grid(len(sleeves), args.weight_step)
+    results = evaluate_mixes(growth, weights, schedules, benchmark, args.initial_capital)
+    mix_time = time.perf_counter() - start_time
+
+    # 生成報告檔名
+    output_dir = "report"
+    os.makedirs(output_dir, exist_ok=True)
+    base_filename = f"portfolio_{'-'.join(growth.columns)}_step{args.weight_step}"
+    if args.start_date:
+        base_filename += f"_start{args.start_date.replace('-', '')}"
+    report_filename = os.path.join(output_dir, base_filename + ".txt")
+    table_filename = os.path.join(output_dir, base_filename + ".csv")
+    chart_filename = os.path.join(output_dir, base_filename + ".png")
+
+    # 參數設定
+    parameter_lines = [f"策略{i + 1}: {name}（{data_file}）" + (f" {params}" if params else "")
+                       for i, (name, _, data_file, params) in enumerate(sleeves)]
+    parameter_lines += [
+        f"初始資金: {args.initial_capital:,.2f}",
+        f"權重間隔: {args.weight_step:g}",
+        f"再平衡週期: {', '.join(schedules)}",
+        f"期間: {growth.index[0].date()} ~ {growth.index[-1].date()}",
+        f"組合數: {len(results):,}"
+    ]
+    if benchmark is not None:
+        parameter_lines.append(f"比較基準: {args.benchmark}")
+
+    ranked = write_report(report_filename, parameter_lines, growth, results, args.sort_by, args.top)
+    with atomic_write(table_filename, 'w', encoding='utf-8', newline='') as f:
+        ranked.to_csv(f, index=False, float_format='%.6g')
+
+    print(f"回測 {len(sleeves)} 個策略: {sleeve_time:.2f}s")
+    print(f"評估 {len(results):,} 個組合: {mix_time:.2f}s")
+    print(f"\n報告已儲存為 {report_filename}")
+    print(f"所有組合的績效已儲存為 {table_filename}")
+
+    if not args.no_plot:
+        # 重新計算最佳組合的資產曲線
+        best = ranked.iloc[0]
+        best_values = combine_sleeves(
+            growth.to_numpy(), best[growth.columns].to_numpy(dtype=float),
+            rebalance_bars(growth.index, best['schedule'])
+        )[0] * args.initial_capital
+        print(f"圖表已儲存為 {plot_results(chart_filename, growth, best_values, args.initial_capital)}")
+
+    # 在終端機顯示最佳組合
+    best = ranked.iloc[0]
+    print(f"\n=== 最佳組合（依{METRIC_NAMES[args.sort_by]}）===")
+    for name in growth.columns:
+        print(f"{name}: {best[name] * 100:.0f}%")
+    print(f"再平衡: {best['schedule']}")
+    print(f"{METRIC_NAMES[args.sort_by]}: {format_metric(args.sort_by, best[args.sort_by])}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+# Add parent directory to path to import service and strategy
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from service.backtest_server import BacktestService, RequestError, coerce_params
+from strategy.rsi_strategy import RSIStrategy
+from strategy.indicator_strategy import IndicatorStrategy
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'twse')
+
+
+@pytest.fixture
+def service(tmp_path):
+    # 以資料複本啟動服務，指標庫只寫入暫存目錄
+    for symbol in ('0050', '2330'):
+        shutil.copyfile(os.path.join(DATA_DIR, f"{symbol}.csv"), tmp_path / f"{symbol}.csv")
+    service = BacktestService(str(tmp_path), workers=1)
+    yield service
+    service.executor.shutdown()
+
+
+def test_coerce_params_converts_to_constructor_types():
+    assert coerce_params(RSIStrategy, {'oversold_threshold': '30', 'rsi_period': 14.0}) == \
+        {'oversold_threshold': 30.0, 'rsi_period': 14}
+    assert coerce_params(IndicatorStrategy, {'rules': 'ma,kd'}) == {'rules': ('ma', 'kd')}
+
+
+@pytest.mark.parametrize('params', [
+    {'oversold_threshold': 'abc'},
+    {'rsi_period': 14.5},
+    {'rsi_period': True},
+    {'bogus': 1},
+    {'data_file': '/etc/passwd'},
+    ['oversold_threshold'],
+])
+def test_coerce_params_rejects_invalid_params(params):
+    with pytest.raises(RequestError):
+        coerce_params(RSIStrategy, params)
+
+
+@pytest.mark.parametrize('path, request_body', [
+    ('/screen', {'params': {'period': 'abc'}}),
+    ('/screen', {'params': {'period': 0}}),
+    ('/screen', {'params': {'bogus': 1}}),
+    ('/screen', {'params': {'../x': 1}}),
+    ('/screen', {'indicator': 'macd'}),
+    ('/screen', {'crossed_above': 70, 'days': 'x'}),
+    ('/screen', {'below': 'low'}),
+    ('/backtest', {'symbol': 5}),
+    ('/backtest', {'strategy': ['rsi']}),
+    ('/backtest', {'benchmark': 5}),
+    ('/sweep', {'symbol': '0050', 'grid': {'rsi_period': 5}}),
+    ('/sweep', {'symbol': '0050', 'grid': [1, 2]}),
+    ('/sweep', {'symbol': '0050', 'param_grid': [5]}),
+    ('/sweep', {'symbol': '0050', 'grid': {'rsi_period': [10, 'x']}}),
+    ('/backtest', ['rsi']),
+])
+def test_invalid_requests_are_rejected(service, path, request_body):
+    with pytest.raises(RequestError):
+        service.handle(path, request_body)
+
+
+def test_screen_coerces_params(service):
+    result = service.handle('/screen', {'below': '101', 'params': {'period': '14'}})
+    assert set(result['results']) <= {'0050', '2330'}
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import dashboard
+from utils.dashboard import RunStore, import_reports
+
+METRICS = {'總報酬率': '12.50%', '夏普比率': '0.80'}
+
+
+def test_corrupt_table_is_not_overwritten(tmp_path):
+    store = RunStore(str(tmp_path))
+    store.add_run('rsi_strategy_2330_a', 'rsi_strategy', '2330', {}, METRICS)
+    with open(store.table_file, 'wb') as f:
+        f.write(b'not a table')
+
+    with pytest.raises(ValueError):
+        store.load()
+    with pytest.raises(ValueError):
+        store.add_run('rsi_strategy_2330_b', 'rsi_strategy', '2330', {}, METRICS)
+    with open(store.table_file, 'rb') as f:
+        assert f.read() == b'not a table'
+
+
+def test_npz_table_migrates_to_parquet(tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    monkeypatch.setattr(dashboard, 'HAS_PARQUET', False)
+    RunStore(str(tmp_path)).add_run('rsi_strategy_2330_a', 'rsi_strategy', '2330', {}, METRICS)
+    assert os.path.exists(tmp_path / 'runs.npz')
+
+    monkeypatch.setattr(dashboard, 'HAS_PARQUET', True)
+    store = RunStore(str(tmp_path))
+    store.add_run('rsi_strategy_2330_b', 'rsi_strategy', '2330', {}, METRICS)
+    assert sorted(store.load().index) == ['rsi_strategy_2330_a', 'rsi_strategy_2330_b']
+    assert not os.path.exists(tmp_path / 'runs.npz')
+
+
+def test_import_reports_maps_filename_prefix_to_strategy(tmp_path):
+    report_dir = tmp_path / 'report'
+    report_dir.mkdir()
+    with open(report_dir / 'rebalance_report_00631L_cash0.5_stock0.5_threshold0.5.txt', 'w', encoding='utf-8') as f:
+        f.write("=== 參數設定 ===\n股票資料: data/twse/00631L.csv\n\n=== 績效指標 ===\n總報酬率: 12.50%\n")
+
+    store = RunStore(str(tmp_path / 'dashboard'))
+    assert import_reports(store, str(report_dir)) == 1
+    runs = store.load()
+    assert runs.loc['rebalance_report_00631L_cash0.5_stock0.5_threshold0.5', 'strategy'] == 'rebalance_strategy'
+    assert runs.loc['rebalance_report_00631L_cash0.5_stock0.5_threshold0.5', 'symbol'] == '00631L'
@@ -0,0 +1,21 @@
+import os
+import sys
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.data_validator import load_price_files, refetch_queue, validate_prices
+
+
+def test_unparseable_dates_are_reported(tmp_path):
+    with open(tmp_path / '2330.csv', 'w', encoding='utf-8') as f:
+        f.write("Date,Open,High,Low,Close,Volume\n"
+                "2024-01-02,100,101,99,100,1000\n"
+                "2024-13-45,100,101,99,100,1000\n"
+                "2024-01-03,100,101,99,100,1000\n")
+
+    issues = validate_prices(load_price_files(str(tmp_path)))
+    invalid = issues[issues['issue'] == 'invalid_date']
+    assert list(invalid['row']) == [1]
+    assert invalid['date'].isna().all()
+    # 日期無法解析的資料列無法補抓
+    assert refetch_queue(issues) == {}
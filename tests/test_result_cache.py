@@ -0,0 +1,61 @@
+import os
+import shutil
+import sys
+
+# Add parent directory to path to import utils and strategy
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import backtest_core, benchmark, dashboard, plotting, rolling_metrics
+from utils.result_cache import ResultCache
+from strategy.rsi_strategy import RSIStrategy
+from strategy.rebalance_strategy import RebalanceStrategy
+from strategy.indicator_strategy import IndicatorStrategy
+from strategy.portfolio_strategy import BuyAndHoldStrategy
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'twse', '0050.csv')
+PARAMS = {'data_file': DATA_FILE, 'oversold_threshold': 30, 'overbought_threshold': 70, 'rsi_period': 14}
+
+
+def test_source_files_cover_utils_modules():
+    source_files = RSIStrategy.source_files()
+    for module in (benchmark, rolling_metrics, plotting, dashboard):
+        assert os.path.abspath(module.__file__) in source_files
+
+
+def test_rolling_metrics_in_code_version_of_every_strategy():
+    # 報告中的滾動績效來自 rolling_metrics，所有策略的快取與檢查點都要隨其修改失效
+    for strategy_cls in (RSIStrategy, RebalanceStrategy, IndicatorStrategy, BuyAndHoldStrategy):
+        assert os.path.abspath(rolling_metrics.__file__) in strategy_cls.source_files()
+
+
+def test_editing_dependency_invalidates_cache(tmp_path, monkeypatch):
+    # 在 utils 套件的複本上修改比較基準模組，原本的快取項目不應再被使用
+    utils_dir = tmp_path / 'utils'
+    shutil.copytree(backtest_core.UTILS_DIR, utils_dir, ignore=shutil.ignore_patterns('__pycache__'))
+    monkeypatch.setattr(backtest_core, 'UTILS_DIR', str(utils_dir))
+
+    cache = ResultCache(str(tmp_path / 'cache'))
+    key = cache.make_key(DATA_FILE, RSIStrategy.strategy_name, PARAMS, RSIStrategy.source_files())
+    cache.put(key, {'total_return': 1.0}, {})
+    assert cache.get(key) is not None
+
+    with open(utils_dir / 'benchmark.py', 'a', encoding='utf-8') as f:
+        f.write("\n# edited\n")
+
+    new_key = cache.make_key(DATA_FILE, RSIStrategy.strategy_name, PARAMS, RSIStrategy.source_files())
+    assert new_key != key
+    assert cache.get(new_key) is None
+
+
+def test_benchmark_data_changes_cache_key(tmp_path):
+    # 比較基準的價格資料改變時，含相對績效的報告需要重新計算
+    benchmark_file = tmp_path / 'benchmark.csv'
+    shutil.copyfile(DATA_FILE, benchmark_file)
+    cache = ResultCache(str(tmp_path / 'cache'))
+    source_files = RSIStrategy.source_files()
+
+    key = cache.make_key(DATA_FILE, RSIStrategy.strategy_name, PARAMS, source_files, str(benchmark_file))
+    assert key != cache.make_key(DATA_FILE, RSIStrategy.strategy_name, PARAMS, source_files)
+
+    with open(benchmark_file, 'a', encoding='utf-8') as f:
+        f.write("2099-01-02,1,1,1,1,1\n")
+    assert key != cache.make_key(DATA_FILE, RSIStrategy.strategy_name, PARAMS, source_files, str(benchmark_file))
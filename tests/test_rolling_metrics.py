@@ -0,0 +1,43 @@
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.rolling_metrics import rolling_sharpe
+
+
+def brute_force_sharpe(values, window, risk_free_rate=0.01):
+    excess = values[1:] / values[:-1] - 1 - risk_free_rate / 252
+    result = np.full(len(values), np.nan)
+    for t in range(window, len(values)):
+        returns = excess[t - window:t]
+        if (returns == returns[0]).all():
+            result[t] = 0.0
+        else:
+            result[t] = np.sqrt(252) * returns.mean() / returns.std(ddof=1)
+    return result
+
+
+def test_constant_cash_window_has_zero_sharpe():
+    # 前後有波動，中間一段全數持有現金，整個視窗都落在現金期間時夏普比率為 0
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.0005, 0.01, 1500)
+    returns[400:1000] = 0.0
+    values = 1e6 * np.cumprod(1 + returns)
+
+    sharpe = rolling_sharpe(values, 252)
+    assert np.all(sharpe[651:1000] == 0.0)
+    assert np.all(np.abs(sharpe[252:]) < 100)
+
+
+def test_matches_brute_force_with_flat_segments():
+    rng = np.random.default_rng(1)
+    for _ in range(5):
+        returns = rng.normal(0.0005, 0.01, 2000)
+        for start in rng.integers(0, 1800, size=4):
+            returns[start:start + rng.integers(50, 500)] = 0.0
+        values = 1e6 * np.cumprod(1 + returns)
+        np.testing.assert_allclose(rolling_sharpe(values, 252), brute_force_sharpe(values, 252),
+                                   rtol=1e-3, atol=1e-6)
@@ -0,0 +1,37 @@
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.indicator_store import IndicatorStore
+from utils.screener import IndicatorScreener, load_close_matrix
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'twse')
+
+
+def test_screener_matches_stored_series(tmp_path):
+    # 沒有缺漏交易日時，選股矩陣與指標庫的單一股票數值完全相同
+    shutil.copyfile(os.path.join(DATA_DIR, '2330.csv'), tmp_path / '2330.csv')
+    closes = load_close_matrix(str(tmp_path))
+    stored = IndicatorStore(str(tmp_path)).get('2330', 'rsi', period=14)
+
+    values = IndicatorScreener(closes).indicator_frame('rsi', period=14)['2330']
+    np.testing.assert_array_equal(values.to_numpy(), stored[~stored.index.duplicated(keep='last')].to_numpy())
+
+
+def test_latest_flags_stale_symbols():
+    dates = pd.bdate_range('2024-01-01', periods=40)
+    closes = pd.DataFrame({
+        'NEW': np.linspace(100, 140, 40),
+        'OLD': np.linspace(100, 60, 40)
+    }, index=dates)
+    closes.loc[dates[-5]:, 'OLD'] = np.nan
+
+    latest = IndicatorScreener(closes).latest('rsi', period=14)
+    assert latest.loc['NEW', 'as_of'] == dates[-1] and not latest.loc['NEW', 'stale']
+    assert latest.loc['OLD', 'as_of'] == dates[-6] and latest.loc['OLD', 'stale']
+    assert list(IndicatorScreener(closes).below('rsi', 30, period=14).index) == ['OLD']
@@ -0,0 +1,28 @@
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.technical_indicators import calculate_rsi, calculate_rsi_array
+
+DATA_FILES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                           'data', 'twse', '*.csv')))
+
+
+@pytest.mark.parametrize('data_file', DATA_FILES, ids=os.path.basename)
+@pytest.mark.parametrize('period', [6, 14])
+def test_rsi_array_equals_rsi_series(data_file, period):
+    closes = pd.read_csv(data_file, usecols=['Date', 'Close'], index_col='Date', parse_dates=True)['Close']
+    expected = calculate_rsi(closes, period=period).to_numpy()
+
+    np.testing.assert_array_equal(calculate_rsi_array(closes.to_numpy(), period=period), expected)
+    # 多檔股票一起計算，以及只計算尾段時，數值也完全相同
+    stacked = calculate_rsi_array(np.column_stack([closes.to_numpy()] * 2), period=period, axis=0)
+    np.testing.assert_array_equal(stacked[:, 1], expected)
+    tail = calculate_rsi_array(closes.to_numpy()[100:], period=period)
+    np.testing.assert_array_equal(tail[period:], expected[100 + period:])
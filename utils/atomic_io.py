@@ -0,0 +1,95 @@
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 沒有 fcntl，此時不加鎖，只保留原子寫入
+    fcntl = None
+
+# 建立暫存檔的旗標（與 tempfile 相同，Windows 需以二進位模式開啟）
+_TMP_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0) | getattr(os, 'O_NOINHERIT', 0)
+
+
+def _create_tmp(directory, basename):
+    # 以 0o666 建立暫存檔，新檔案的權限與一般 open() 相同（由系統套用 umask）
+    while True:
+        tmp_path = os.path.join(directory, f".{basename}.{uuid.uuid4().hex[:12]}.tmp")
+        try:
+            return os.open(tmp_path, _TMP_FLAGS, 0o666), tmp_path
+        except FileExistsError:
+            continue
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', encoding: str = None, newline: str = None):
+    """
+    Open a file for writing so that readers only ever see the old or the complete new content.
+
+    Data is written to a temporary file in the same directory, flushed to disk and then
+    renamed over `path`. If the block raises, `path` is left untouched and the temporary
+    file is removed; a killed process leaves `path` untouched plus a hidden `.tmp` file.
+
+    Args:
+        path (str): Destination file.
+        mode (str): 'w' for text or 'wb' for binary.
+        encoding (str): Text encoding (text mode only).
+        newline (str): Newline handling as in `open` (text mode only).
+
+    Yields:
+        file: File object of the temporary file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = _create_tmp(directory, os.path.basename(path))
+    try:
+        with os.fdopen(fd, mode, encoding=encoding, newline=newline) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # 取代既有檔案時保留其權限
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_copy(src: str, dst: str):
+    """Copy `src` to `dst` through `atomic_write`."""
+    with open(src, 'rb') as source, atomic_write(dst, 'wb') as target:
+        shutil.copyfileobj(source, target)
+
+
+@contextmanager
+def file_lock(path: str, shared: bool = False):
+    """
+    Hold an inter-process lock associated with `path` for the duration of the block.
+
+    The lock is taken on a `{path}.lock` sidecar file rather than on `path` itself, because
+    `atomic_write` replaces `path` with a new file. Writers that read, modify and rewrite a
+    file (e.g. the fetcher merging new rows) hold the exclusive lock so their updates do
+    not overwrite each other; plain readers need no lock since renames are atomic.
+
+    Args:
+        path (str): File to lock.
+        shared (bool): Take a shared instead of an exclusive lock.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    lock_path = f"{path}.lock"
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,681 @@
+import glob
+import inspect
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.atomic_io import atomic_write
+from utils.checkpoint import checkpoint_path, load_checkpoint, save_checkpoint
+from utils.result_cache import ResultCache
+from utils.rolling_metrics import ROLLING_WINDOWS, rolling_metrics
+
+# utils 套件目錄：其中所有模組都納入策略的程式碼版本
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 已讀取的價格資料，以 (路徑, 修改時間, 檔案大小) 為鍵，檔案變動時自動重新讀取
+_price_data_cache = {}
+# 常駐服務會從多個執行緒同時讀取價格資料
+_price_data_lock = threading.Lock()
+
+
+def load_price_data(data_file: str, start_date=None) -> pd.DataFrame:
+    """
+    Read a price CSV into a DataFrame indexed by date.
+
+    Parsed files are kept in memory and reused until the file changes on disk, so sweeps
+    over many parameter combinations only parse each file once.
+
+    Args:
+        data_file (str): Path to the CSV file with a 'Date' column.
+        start_date (str): Optional first date to keep (YYYY-MM-DD).
+
+    Returns:
+        pd.DataFrame: Price data indexed by date. Callers may modify the returned copy.
+    """
+    stat = os.stat(data_file)
+    cache_key = (os.path.abspath(data_file), stat.st_mtime_ns, stat.st_size)
+    with _price_data_lock:
+        df = _price_data_cache.get(cache_key)
+        if df is None:
+            df = pd.read_csv(data_file)
+            df['Date'] = pd.to_datetime(df['Date'])
+            df.set_index('Date', inplace=True)
+            # 移除同一檔案的舊版本
+            for key in [key for key in _price_data_cache if key[0] == cache_key[0]]:
+                del _price_data_cache[key]
+            _price_data_cache[cache_key] = df
+
+    # 如果指定開始日期，過濾資料
+    if start_date:
+        start_date = pd.to_datetime(start_date)
+        return df[df.index >= start_date].copy()
+    return df.copy()
+
+
+class BacktestStrategy:
+    """
+    Shared backtest core owning the bar loop, trade log, metrics and reports.
+
+    Strategies subclass it and describe only their trading rule, either as
+
+    * a vectorized signal array: override `signals()` to return +1 (buy with all cash),
+      -1 (sell all shares) or 0 (hold) for every bar, or
+    * a signal function: override `next_event(start)` to locate the next bar where the
+      strategy may act and `on_bar(i)` to trade on it.
+
+    The core only runs Python code on event bars; the holdings between two events are
+    constant, so the equity curve of those bars is filled in one vectorized step.
+    """
+
+    # 策略名稱，用於快取與檢查點
+    strategy_name = None
+    # 每日記錄中除了 total_value/cash/stocks 之外的欄位，對應到 self.df 的欄位名稱
+    record_fields = {}
+    # 交易記錄中額外記錄的欄位（需存在於 record_fields），報告中四捨五入至小數點後兩位
+    trade_fields = ()
+    # 策略額外依賴的 utils 以外的原始碼檔案（程式碼版本的一部分）
+    extra_source_files = ()
+
+    def __init__(self, data_file, initial_capital=1000000, start_date=None):
+        # 讀取資料
+        self.df = load_price_data(data_file, start_date)
+        self.data_file = data_file
+        self.initial_capital = initial_capital
+
+        # 初始化變數
+        self.close = self.df['Close'].to_numpy(dtype=float)
+        self.current_cash = initial_capital
+        self.current_stocks = 0
+        self.trades = []
+        self.records = {name: [] for name in ('total_value', 'cash', 'stocks') + tuple(self.record_fields)}
+
+        # 從檢查點續跑時，從此索引開始計算
+        self.resume_idx = 0
+
+    # ------------------------------------------------------------------
+    # 策略介面
+    # ------------------------------------------------------------------
+    def first_bar(self):
+        # 第一根開始記錄資產價值的K棒
+        return 0
+
+    def signals(self):
+        # 向量化訊號：1 全數買入、-1 全數賣出、0 不動作
+        raise NotImplementedError
+
+    def next_event(self, start):
+        # 從 start 開始找出下一根策略可能動作的K棒，沒有則回傳 None
+        if not hasattr(self, '_signals'):
+            self._signals = np.asarray(self.signals())
+            self._event_bars = np.flatnonzero(self._signals)
+        pos = np.searchsorted(self._event_bars, start)
+        if pos < len(self._event_bars):
+            return int(self._event_bars[pos])
+        return None
+
+    def on_bar(self, i):
+        # 預設依訊號陣列全數買入或全數賣出
+        price = self.close[i]
+        signal = self._signals[i]
+        if signal > 0 and self.current_cash > 0:
+            shares_to_buy = self.current_cash / price
+            buy_value = shares_to_buy * price
+            self.current_stocks += shares_to_buy
+            self.current_cash -= buy_value
+            self.record_trade(i, 'buy', shares_to_buy, buy_value)
+        elif signal < 0 and self.current_stocks > 0:
+            sell_value = self.current_stocks * price
+            self.record_trade(i, 'sell', self.current_stocks, sell_value)
+            self.current_cash += sell_value
+            self.current_stocks = 0
+
+    def record_trade(self, i, trade_type, shares, value):
+        trade = {
+            'date': self.df.index[i],
+            'type': trade_type,
+            'price': self.close[i]
+        }
+        for field in self.trade_fields:
+            trade[field] = self.df[self.record_fields[field]].iloc[i]
+        trade['shares'] = shares
+        trade['value'] = value
+        self.trades.append(trade)
+
+    def extra_metrics(self, years):
+        # 策略額外的績效指標
+        return {}
+
+    @classmethod
+    def simulate_batch(cls, prices, initial_capital=1000000, **params):
+        """
+        Simulate the strategy over many price paths at once.
+
+        Args:
+            prices (np.ndarray): (paths x bars) array of closing prices.
+            initial_capital (float): Initial capital of every path.
+            **params: Strategy parameters, as accepted by the constructor.
+
+        Returns:
+            tuple: ((paths x bars) array of total portfolio value, index of the first recorded bar).
+        """
+        raise NotImplementedError
+
+    # ------------------------------------------------------------------
+    # 回測迴圈
+    # ------------------------------------------------------------------
+    def _fill(self, start, end):
+        # 區間內持股不變，一次計算所有K棒的資產價值
+        if end <= start:
+            return
+        stock_value = self.current_stocks * self.close[start:end]
+        self.records['total_value'].extend((self.current_cash + stock_value).tolist())
+        self.records['cash'].extend([self.current_cash] * (end - start))
+        self.records['stocks'].extend(stock_value.tolist())
+        for field, values in self._record_values.items():
+            self.records[field].extend(values[start:end].tolist())
+
+    def calculate_portfolio_value(self):
+        self._record_values = {
+            field: self.df[column].to_numpy() for field, column in self.record_fields.items()
+        }
+        i = max(self.first_bar(), self.resume_idx)
+        n = len(self.df)
+        while i < n:
+            event = self.next_event(i)
+            if event is None or event >= n:
+                self._fill(i, n)
+                break
+            self._fill(i, event)
+
+            # 事件K棒：記錄交易前的資產價值與交易後的現金
+            stock_value = self.current_stocks * self.close[event]
+            total_value = self.current_cash + stock_value
+            self.on_bar(event)
+            self.records['total_value'].append(total_value)
+            self.records['cash'].append(self.current_cash)
+            self.records['stocks'].append(stock_value)
+            for field, values in self._record_values.items():
+                self.records[field].append(values[event])
+            i = event + 1
+
+    # ------------------------------------------------------------------
+    # 檢查點
+    # ------------------------------------------------------------------
+    def state_fields(self):
+        # 策略額外需要保存的狀態欄位
+        return ()
+
+    def get_state(self):
+        # 取得策略在最後一根K棒收盤後的狀態，用於建立檢查點
+        state = {
+            'last_date': self.df.index[-1],
+            'current_cash': self.current_cash,
+            'current_stocks': self.current_stocks,
+            'trades': self.trades,
+            'records': {name: list(values) for name, values in self.records.items()}
+        }
+        for field in self.state_fields():
+            state[field] = getattr(self, field)
+        return state
+
+    def resume_from_state(self, state):
+        # 從檢查點狀態續跑，只計算檢查點之後新增的資料
+        last_date = pd.Timestamp(state['last_date'])
+        resume_idx = self.df.index.searchsorted(last_date, side='right')
+        if resume_idx == 0 or self.df.index[resume_idx - 1] != last_date:
+            return False
+        if set(state['records']) != set(self.records):
+            return False
+
+        self.current_cash = state['current_cash']
+        self.current_stocks = state['current_stocks']
+        self.trades = list(state['trades'])
+        self.records = {name: list(values) for name, values in state['records'].items()}
+        for field in self.state_fields():
+            setattr(self, field, state[field])
+        self.resume_idx = resume_idx
+        return True
+
+    @classmethod
+    def source_files(cls):
+        # 策略程式碼版本所依賴的原始碼檔案：策略本身與整個 utils 套件（報告、比較基準、
+        # 圖表等模組的修改也會影響結果），再加上策略額外指定的檔案
+        files = [os.path.abspath(inspect.getfile(cls))]
+        files += sorted(glob.glob(os.path.join(UTILS_DIR, '*.py')))
+        files += [os.path.abspath(path) for path in cls.extra_source_files]
+        return list(dict.fromkeys(files))
+
+    # ------------------------------------------------------------------
+    # 結果
+    # ------------------------------------------------------------------
+    @property
+    def portfolio_df(self):
+        n = len(self.records['total_value'])
+        portfolio_df = pd.DataFrame(self.records, index=self.df.index[len(self.df) - n:])
+        portfolio_df.index.name = 'date'
+        return portfolio_df
+
+    def final_portfolio(self):
+        if len(self.records['total_value']) == 0:
+            return None
+        return {
+            'stocks': float(self.records['stocks'][-1]),
+            'cash': float(self.records['cash'][-1]),
+            'total_value': float(self.records['total_value'][-1])
+        }
+
+    def calculate_metrics(self):
+        if len(self.records['total_value']) == 0:
+            return {
+                '總報酬率': "0.00%",
+                '年化報酬率': "0.00%",
+                '最大回撤': "0.00%",
+                '交易次數': 0,
+                '夏普比率': "0.00"
+            }
+
+        portfolio_df = self.portfolio_df
+
+        # 計算報酬率
+        portfolio_df['returns'] = portfolio_df['total_value'].pct_change()
+        total_return = (portfolio_df['total_value'].iloc[-1] / self.initial_capital - 1) * 100
+
+        # 計算最大回撤
+        portfolio_df['cummax'] = portfolio_df['total_value'].cummax()
+        portfolio_df['drawdown'] = (portfolio_df['total_value'] - portfolio_df['cummax']) / portfolio_df['cummax']
+        max_drawdown = portfolio_df['drawdown'].min() * 100
+
+        # 計算交易次數
+        num_trades = len(self.trades)
+
+        # 計算年化報酬率
+        days = (portfolio_df.index[-1] - portfolio_df.index[0]).days
+        years = max(days / 365, 0.01)  # 避免除以零
+        annual_return = ((1 + total_return/100) ** (1/years) - 1) * 100
+
+        # 計算夏普比率
+        risk_free_rate = 0.01  # 假設無風險利率1%
+        if portfolio_df['returns'].std() > 0:
+            excess_returns = portfolio_df['returns'] - risk_free_rate/252
+            sharpe_ratio = np.sqrt(252) * excess_returns.mean() / excess_returns.std()
+        else:
+            sharpe_ratio = 0
+
+        metrics = {
+            '總報酬率': f"{total_return:.2f}%",
+            '年化報酬率': f"{annual_return:.2f}%",
+            '最大回撤': f"{max_drawdown:.2f}%",
+            '交易次數': num_trades,
+            '夏普比率': f"{sharpe_ratio:.2f}"
+        }
+        metrics.update(self.extra_metrics(years))
+        return metrics
+
+    def rolling_metrics(self, windows=None):
+        """
+        Calculate rolling returns, Sharpe ratios and drawdowns of the equity curve.
+
+        Args:
+            windows (dict): Window name -> bars (default: `ROLLING_WINDOWS`, 1 and 3 years).
+
+        Returns:
+            pd.DataFrame: One row per recorded bar; see `utils.rolling_metrics.rolling_metrics`
+                for the columns.
+        """
+        portfolio_df = self.portfolio_df
+        metrics = rolling_metrics(portfolio_df['total_value'].to_numpy(dtype=float), windows)
+        return pd.DataFrame(metrics, index=portfolio_df.index)
+
+    def benchmark_metrics(self, benchmark):
+        """
+        Compare the equity curve with a benchmark.
+
+        Args:
+            benchmark (Benchmark): Benchmark from `utils.benchmark`.
+
+        Returns:
+            dict: Alpha, beta, tracking error, information ratio and up/down capture,
+                formatted for the report.
+        """
+        from utils.benchmark import format_relative_metrics
+
+        if len(self.records['total_value']) == 0:
+            return {}
+        portfolio_df = self.portfolio_df
+        metrics = benchmark.score(portfolio_df['total_value'].to_numpy(dtype=float), portfolio_df.index)
+        return format_relative_metrics(metrics)
+
+    def rolling_summary_lines(self, windows=None):
+        # 滾動績效摘要：各視窗的報酬率、夏普比率與最大回撤分布，以及水下期間
+        windows = ROLLING_WINDOWS if windows is None else windows
+        if len(self.records['total_value']) == 0:
+            return ["無資產記錄"]
+        rolling = self.rolling_metrics(windows)
+
+        lines = []
+        for name, window in windows.items():
+            label = f"{window / 252:g}年"
+            returns = rolling[f'return_{name}'].dropna()
+            if len(returns) == 0:
+                lines.append(f"滾動{label}: 資料不足")
+                continue
+            sharpe = rolling[f'sharpe_{name}'].dropna()
+            max_drawdown = rolling[f'max_drawdown_{name}'].dropna()
+            lines.append(
+                f"滾動{label}報酬率: 最低 {returns.min():.2f}%，中位數 {returns.median():.2f}%，"
+                f"最高 {returns.max():.2f}%，正報酬比例 {(returns > 0).mean() * 100:.2f}%"
+            )
+            lines.append(
+                f"滾動{label}夏普比率: 最低 {sharpe.min():.2f}，中位數 {sharpe.median():.2f}，最高 {sharpe.max():.2f}"
+            )
+            lines.append(f"滾動{label}最大回撤: 最差 {max_drawdown.min():.2f}%，中位數 {max_drawdown.median():.2f}%")
+
+        underwater = rolling['underwater_days']
+        lines.append(f"最長水下期間: {underwater.max()} 個交易日")
+        lines.append(f"目前水下期間: {underwater.iloc[-1]} 個交易日")
+        return lines
+
+    def get_trade_details(self):
+        trades_df = pd.DataFrame(self.trades)
+        if len(trades_df) > 0:
+            trades_df['date'] = pd.to_datetime(trades_df['date'])
+            trades_df = trades_df.sort_values('date')
+            for column in ('value', 'price', 'shares') + self.trade_fields:
+                trades_df[column] = trades_df[column].round(2)
+            return trades_df
+        return None
+
+    def plot_results(self, filename):
+        raise NotImplementedError
+
+    def write_report(self, report_filename, parameter_lines, metrics):
+        with atomic_write(report_filename, 'w', encoding='utf-8') as f:
+            # 寫入參數設定
+            f.write("=== 參數設定 ===\n")
+            for line in parameter_lines:
+                f.write(f"{line}\n")
+            f.write("\n")
+
+            # 寫入績效指標
+            f.write("=== 績效指標 ===\n")
+            for metric, value in metrics.items():
+                f.write(f"{metric}: {value}\n")
+            f.write("\n")
+
+            # 寫入滾動績效
+            f.write("=== 滾動績效 ===\n")
+            for line in self.rolling_summary_lines():
+                f.write(f"{line}\n")
+            f.write("\n")
+
+            # 寫入交易明細
+            f.write("=== 交易明細 ===\n")
+            trades_df = self.get_trade_details()
+            if trades_df is not None:
+                f.write(trades_df.to_string())
+            else:
+                f.write("無交易記錄")
+            f.write("\n\n")
+
+            # 只有在有資產組合時才寫入最終資產配置
+            final_portfolio = self.final_portfolio()
+            if final_portfolio:
+                total_value = final_portfolio['total_value']
+                f.write("=== 最終資產配置 ===\n")
+                f.write(f"持股價值: {final_portfolio['stocks']:,.2f}\n")
+                f.write(f"現金量: {final_portfolio['cash']:,.2f}\n")
+                f.write(f"總資產: {total_value:,.2f}\n")
+                f.write(f"持股比例: {(final_portfolio['stocks'] / total_value * 100 if total_value > 0 else 0):.2f}%\n")
+                f.write(f"現金比例: {(final_portfolio['cash'] / total_value * 100 if total_value > 0 else 0):.2f}%\n")
+
+
+def calculate_batch_metrics(values, years, risk_free_rate=0.01):
+    """
+    Calculate CAGR, max drawdown and Sharpe ratio for many equity curves at once.
+
+    Uses the same definitions as `BacktestStrategy.calculate_metrics`.
+
+    Args:
+        values (np.ndarray): (runs x bars) array of total portfolio value.
+        years (float): Length of the curves in years.
+        risk_free_rate (float): Annual risk-free rate (default: 1%).
+
+    Returns:
+        dict: Arrays of length `runs` keyed by 'cagr', 'max_drawdown' and 'sharpe', in percent
+            for CAGR and max drawdown.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    years = max(years, 0.01)
+
+    # 年化報酬率
+    total_return = values[:, -1] / values[:, 0]
+    cagr = (total_return ** (1 / years) - 1) * 100
+
+    # 最大回撤
+    cummax = np.maximum.accumulate(values, axis=1)
+    max_drawdown = ((values - cummax) / cummax).min(axis=1) * 100
+
+    # 夏普比率
+    excess_returns = values[:, 1:] / values[:, :-1] - 1 - risk_free_rate / 252
+    if excess_returns.shape[1] > 1:
+        std = excess_returns.std(axis=1, ddof=1)
+    else:
+        std = np.zeros(len(values))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, np.sqrt(252) * excess_returns.mean(axis=1) / std, 0.0)
+
+    return {'cagr': cagr, 'max_drawdown': max_drawdown, 'sharpe': sharpe}
+
+
+def print_final_portfolio(final_portfolio):
+    print("\n=== 最終資產配置 ===")
+    print(f"持股價值: {final_portfolio['stocks']:,.2f}")
+    print(f"現金量: {final_portfolio['cash']:,.2f}")
+    print(f"總資產: {final_portfolio['total_value']:,.2f}")
+    total_value = final_portfolio['total_value']
+    if total_value > 0:
+        print(f"持股比例: {(final_portfolio['stocks'] / total_value * 100):.2f}%")
+        print(f"現金比例: {(final_portfolio['cash'] / total_value * 100):.2f}%")
+    else:
+        print("持股比例: 0.00%")
+        print("現金比例: 0.00%")
+
+
+def run_sweep(strategy_cls, data_file, param_grid, initial_capital=1000000, start_date=None, benchmark=None):
+    """
+    Run a strategy over many parameter combinations of the same data file.
+
+    The price file is parsed once and shared by every run. With a benchmark, the equity
+    curves of all runs are stacked into one matrix on the data file's dates, aligned to the
+    benchmark once and scored together.
+
+    Args:
+        strategy_cls (type): BacktestStrategy subclass.
+        data_file (str): Path to the price data file.
+        param_grid (list): List of keyword argument dicts, one per run.
+        initial_capital (float): Initial capital of every run.
+        start_date (str): Optional first date (YYYY-MM-DD).
+        benchmark (Benchmark | str): Optional benchmark, or path to its price file.
+
+    Returns:
+        pd.DataFrame: One row per run with its parameters and metrics.
+    """
+    rows = []
+    curves = []
+    dates = None
+    for params in param_grid:
+        strategy = strategy_cls(data_file=data_file, initial_capital=initial_capital,
+                                start_date=start_date, **params)
+        strategy.calculate_portfolio_value()
+        rows.append({**params, **strategy.calculate_metrics()})
+        if benchmark is not None:
+            dates = strategy.df.index
+            curves.append(np.asarray(strategy.records['total_value'], dtype=float))
+
+    if benchmark is not None and rows:
+        from utils.benchmark import Benchmark, format_relative_metrics
+
+        if isinstance(benchmark, str):
+            benchmark = Benchmark(benchmark)
+        # 各組參數的資產曲線對齊到相同日期（尚未開始記錄的K棒為 NaN）
+        values = np.full((len(curves), len(dates)), np.nan)
+        for run, curve in enumerate(curves):
+            values[run, len(dates) - len(curve):] = curve
+        scores = benchmark.score(values, dates)
+        for run, row in enumerate(rows):
+            row.update(format_relative_metrics(scores, run))
+    return pd.DataFrame(rows)
+
+
+def record_run(strategy_cls, run_id, params, metrics, curve=None, report=None, chart=None):
+    """
+    Add a run to the dashboard in `report/dashboard/` and refresh its page.
+
+    Args:
+        strategy_cls (type): BacktestStrategy subclass of the run.
+        run_id (str): Report base filename identifying the run.
+        params (dict): Strategy keyword arguments, including 'data_file'.
+        metrics (dict): Report metrics.
+        curve (pd.Series): Total portfolio value by date (None keeps the stored curve).
+        report (str): Path of the text report.
+        chart (str): Path of the chart.
+    """
+    from utils.dashboard import RunStore
+
+    params = dict(params)
+    symbol = os.path.splitext(os.path.basename(params.pop('data_file')))[0]
+    store = RunStore()
+    try:
+        store.add_run(run_id, strategy_cls.strategy_name, symbol, params, metrics, curve, report, chart)
+    except ValueError as e:
+        # 執行記錄表無法讀取時保留原檔，不以空表格覆蓋
+        print(f"無法更新回測結果總覽：{e}")
+        return
+    print(f"回測結果總覽已更新：{store.render()}")
+
+
+def run_backtest_cli(strategy_cls, args, strategy_kwargs, base_filename, parameter_lines):
+    """
+    Run a strategy from its command line entry point.
+
+    Handles the result cache, checkpoint resume, report and chart writing and the terminal
+    summary shared by every strategy script.
+
+    Args:
+        strategy_cls (type): BacktestStrategy subclass.
+        args (argparse.Namespace): Parsed arguments; `no_cache`, `resume`, `no_plot` and
+            `no_dashboard` are read from it.
+        strategy_kwargs (dict): Keyword arguments of the strategy constructor.
+        base_filename (str): Report/chart filename without extension.
+        parameter_lines (list): Lines of the report's parameter section.
+    """
+    # 確保輸出目錄存在
+    output_dir = "report"
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    report_filename = os.path.join(output_dir, base_filename + ".txt")
+    chart_filename = os.path.join(output_dir, base_filename + ".png")
+
+    # 比較基準（檔案不存在時略過）
+    benchmark_file = getattr(args, 'benchmark', None)
+    if benchmark_file and not os.path.exists(benchmark_file):
+        print(f"找不到比較基準 {benchmark_file}，略過相對績效")
+        benchmark_file = None
+    if benchmark_file:
+        parameter_lines = list(parameter_lines) + [f"比較基準: {benchmark_file}"]
+
+    # 檢查結果快取（資料內容、參數或程式碼有變動時會自動重新計算）
+    data_file = strategy_kwargs['data_file']
+    params = dict(strategy_kwargs)
+    cache = None if args.no_cache else ResultCache()
+    if cache:
+        # 比較基準的內容也會影響報告
+        cache_key = cache.make_key(data_file, strategy_cls.strategy_name, params, strategy_cls.source_files(),
+                                   benchmark_file)
+        entry = cache.get(cache_key)
+        # 快取中沒有圖表但這次需要圖表時，視為未命中
+        if entry and (getattr(args, 'no_plot', False) or 'chart' in entry['artifacts']):
+            destinations = {'report': report_filename}
+            if not getattr(args, 'no_plot', False):
+                destinations['chart'] = chart_filename
+            restored = cache.restore_artifacts(cache_key, entry, destinations)
+            print(f"\n使用快取結果，報告已儲存為 {restored['report']}")
+            if restored.get('chart'):
+                print(f"圖表已儲存為 {restored['chart']}")
+            if not getattr(args, 'no_dashboard', False):
+                # 快取中保存了資產曲線時一併加入總覽
+                stored_curve = entry['summary'].get('curve')
+                curve = None
+                if stored_curve:
+                    curve = pd.Series(stored_curve['values'], index=pd.to_datetime(stored_curve['dates']))
+                record_run(strategy_cls, base_filename, params, entry['metrics'], curve,
+                           restored['report'], restored.get('chart'))
+            if entry['summary'].get('final_portfolio'):
+                print_final_portfolio(entry['summary']['final_portfolio'])
+            return
+
+    # 初始化策略
+    strategy = strategy_cls(**strategy_kwargs)
+
+    # 從檢查點續跑（資料僅新增時有效，否則從頭計算）
+    state_file = checkpoint_path(base_filename)
+    if args.resume:
+        state = load_checkpoint(state_file, strategy_cls.strategy_name, params, data_file,
+                                strategy_cls.source_files())
+        if state and strategy.resume_from_state(state):
+            print(f"從檢查點續跑，新增 {len(strategy.df) - strategy.resume_idx} 筆資料")
+        else:
+            print("沒有可用的檢查點，從頭計算")
+
+    # 執行策略
+    strategy.calculate_portfolio_value()
+    save_checkpoint(state_file, strategy_cls.strategy_name, params, data_file, strategy.get_state(),
+                    strategy_cls.source_files())
+
+    # 計算績效指標並寫入報告
+    metrics = strategy.calculate_metrics()
+    if benchmark_file:
+        from utils.benchmark import Benchmark
+
+        metrics.update(strategy.benchmark_metrics(Benchmark(benchmark_file)))
+    strategy.write_report(report_filename, parameter_lines, metrics)
+
+    # 繪製圖表（只需要績效指標時不載入 matplotlib）
+    if getattr(args, 'no_plot', False):
+        chart_filename = None
+    else:
+        chart_filename = strategy.plot_results(chart_filename)
+
+    # 輸出到終端機
+    print(f"\n報告已儲存為 {report_filename}")
+    if chart_filename:
+        print(f"圖表已儲存為 {chart_filename}")
+
+    # 加入回測結果總覽
+    if not getattr(args, 'no_dashboard', False) and len(strategy.records['total_value']) > 0:
+        record_run(strategy_cls, base_filename, params, metrics, strategy.portfolio_df['total_value'],
+                   report_filename, chart_filename)
+
+    # 儲存結果快取
+    final_portfolio = strategy.final_portfolio()
+    if cache:
+        summary = {'final_portfolio': final_portfolio}
+        if final_portfolio:
+            # 資產曲線供回測結果總覽使用
+            portfolio_df = strategy.portfolio_df
+            summary['curve'] = {
+                'dates': portfolio_df.index.strftime('%Y-%m-%d').tolist(),
+                'values': portfolio_df['total_value'].round(4).tolist()
+            }
+        cache.put(
+            cache_key,
+            metrics,
+            {'report': report_filename, 'chart': chart_filename},
+            summary=summary
+        )
+
+    # 同時在終端機顯示最終資產配置
+    if final_portfolio:
+        print_final_portfolio(final_portfolio)
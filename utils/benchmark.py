@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+from utils.backtest_core import load_price_data
+
+DEFAULT_BENCHMARK_FILE = 'data/twse/^TWII.csv'
+
+# 指標鍵值 -> 報告名稱
+METRIC_NAMES = {
+    'alpha': 'Alpha',
+    'beta': 'Beta',
+    'tracking_error': '追蹤誤差',
+    'information_ratio': '資訊比率',
+    'up_capture': '上漲捕獲率',
+    'down_capture': '下跌捕獲率'
+}
+
+
+def relative_metrics(values: np.ndarray, benchmark_returns: np.ndarray, risk_free_rate: float = 0.01,
+                     periods_per_year: int = 252) -> dict:
+    """
+    Score many equity curves against one benchmark in a single pass of matrix operations.
+
+    Bars where a curve has no value (NaN, e.g. before its first recorded bar) or where the
+    benchmark return is unknown are left out of that curve's statistics.
+
+    Args:
+        values (np.ndarray): (runs x bars) array of equity curves aligned to the benchmark.
+        benchmark_returns (np.ndarray): Benchmark return of every bar (NaN when unknown),
+            as returned by `Benchmark.returns_for`.
+        risk_free_rate (float): Annual risk-free rate (default: 1%).
+        periods_per_year (int): Bars per year used to annualize (default: 252).
+
+    Returns:
+        dict: Arrays of length `runs` keyed by 'alpha' (annualized Jensen's alpha, percent),
+            'beta', 'tracking_error' (annualized, percent), 'information_ratio',
+            'up_capture' and 'down_capture' (percent).
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    returns = np.full_like(values, np.nan)
+    returns[:, 1:] = values[:, 1:] / values[:, :-1] - 1
+    benchmark = np.broadcast_to(np.asarray(benchmark_returns, dtype=float), returns.shape)
+
+    valid = ~np.isnan(returns) & ~np.isnan(benchmark)
+    count = valid.sum(axis=1)
+    r = np.where(valid, returns, 0.0)
+    b = np.where(valid, benchmark, 0.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_r = r.sum(axis=1) / count
+        mean_b = b.sum(axis=1) / count
+        dr = np.where(valid, r - mean_r[:, None], 0.0)
+        db = np.where(valid, b - mean_b[:, None], 0.0)
+        var_b = (db ** 2).sum(axis=1) / (count - 1)
+        cov = (dr * db).sum(axis=1) / (count - 1)
+        beta = cov / var_b
+
+        # Jensen's alpha：扣除無風險利率後，超出 beta 倍基準報酬的部分
+        rf = risk_free_rate / periods_per_year
+        alpha = ((mean_r - rf) - beta * (mean_b - rf)) * periods_per_year * 100
+
+        # 主動報酬的波動與資訊比率
+        active = np.where(valid, r - b, 0.0)
+        mean_active = active.sum(axis=1) / count
+        active_std = np.sqrt((np.where(valid, active - mean_active[:, None], 0.0) ** 2).sum(axis=1) / (count - 1))
+        tracking_error = active_std * np.sqrt(periods_per_year) * 100
+        information_ratio = np.where(active_std > 0,
+                                     mean_active * np.sqrt(periods_per_year) / active_std, 0.0)
+
+        # 基準上漲／下跌日的平均報酬比
+        up = valid & (benchmark > 0)
+        down = valid & (benchmark < 0)
+        up_capture = (np.where(up, r, 0.0).sum(axis=1) / np.where(up, b, 0.0).sum(axis=1)) * 100
+        down_capture = (np.where(down, r, 0.0).sum(axis=1) / np.where(down, b, 0.0).sum(axis=1)) * 100
+
+    return {
+        'alpha': alpha,
+        'beta': beta,
+        'tracking_error': tracking_error,
+        'information_ratio': information_ratio,
+        'up_capture': up_capture,
+        'down_capture': down_capture
+    }
+
+
+def format_relative_metrics(metrics: dict, index: int = 0) -> dict:
+    """Format one run of `relative_metrics` for a report, keyed by report names."""
+    formatted = {}
+    for key, name in METRIC_NAMES.items():
+        value = metrics[key][index]
+        if key in ('beta', 'information_ratio'):
+            formatted[name] = f"{value:.2f}"
+        else:
+            formatted[name] = f"{value:.2f}%"
+    return formatted
+
+
+class Benchmark:
+    """
+    Benchmark price series aligned once per set of dates and reused for every run on them.
+
+    Example:
+        benchmark = Benchmark('data/twse/^TWII.csv')
+        returns = benchmark.returns_for(portfolio_df.index)   # aligned once, then cached
+        relative_metrics(values, returns)
+    """
+
+    def __init__(self, data_file: str = DEFAULT_BENCHMARK_FILE):
+        self.data_file = data_file
+        closes = load_price_data(data_file)['Close']
+        self.closes = closes[~closes.index.duplicated(keep='last')].sort_index()
+        self._aligned = {}
+
+    def returns_for(self, dates: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Get the benchmark's daily returns on the given dates.
+
+        Dates the benchmark did not trade on carry its previous close (a zero return);
+        dates before its first close are NaN. The result is cached per set of dates, so a
+        sweep over runs sharing a price file aligns only once.
+
+        Args:
+            dates (pd.DatetimeIndex): Dates of the equity curves.
+
+        Returns:
+            np.ndarray: Return of every date; the first date is NaN.
+        """
+        dates = pd.DatetimeIndex(dates)
+        key = dates.asi8.tobytes()
+        if key not in self._aligned:
+            aligned = self.closes.reindex(self.closes.index.union(dates)).ffill().reindex(dates)
+            closes = aligned.to_numpy(dtype=float)
+            returns = np.full(len(dates), np.nan)
+            returns[1:] = closes[1:] / closes[:-1] - 1
+            self._aligned[key] = returns
+        return self._aligned[key]
+
+    def score(self, values: np.ndarray, dates: pd.DatetimeIndex, risk_free_rate: float = 0.01) -> dict:
+        """
+        Score (runs x bars) equity curves on `dates` against the benchmark.
+
+        Returns:
+            dict: See `relative_metrics`.
+        """
+        return relative_metrics(values, self.returns_for(dates), risk_free_rate)
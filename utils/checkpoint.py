@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.atomic_io import atomic_write
+from utils.result_cache import code_version
+
+DEFAULT_CHECKPOINT_DIR = '.cache/checkpoints'
+
+
+def prefix_hash(file_path: str, size: int) -> str:
+    """
+    Calculate the SHA-256 hash of the first `size` bytes of a file.
+
+    The fetcher only appends rows, so the prefix of a price file that a checkpoint was
+    built from stays byte-identical until the history itself is rewritten.
+
+    Args:
+        file_path (str): Path to the file.
+        size (int): Number of leading bytes to hash.
+
+    Returns:
+        str: Hex digest of the prefix.
+    """
+    digest = hashlib.sha256()
+    remaining = size
+    with open(file_path, 'rb') as f:
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1 << 20))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def _encode(value):
+    if isinstance(value, pd.Timestamp):
+        return {'__timestamp__': value.isoformat()}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if '__timestamp__' in value:
+            return pd.Timestamp(value['__timestamp__'])
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+def checkpoint_path(base_filename: str, checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR) -> str:
+    """
+    Build the checkpoint path of a strategy run.
+
+    Args:
+        base_filename (str): Report base filename encoding the strategy parameters.
+        checkpoint_dir (str): Directory holding the checkpoints.
+
+    Returns:
+        str: Path to the checkpoint JSON file.
+    """
+    return os.path.join(checkpoint_dir, base_filename + '.json')
+
+
+def save_checkpoint(path: str, strategy_name: str, params: dict, data_file: str, state: dict,
+                    source_files: list = ()):
+    """
+    Save the end state of a strategy run.
+
+    Args:
+        path (str): Checkpoint file path.
+        strategy_name (str): Name of the strategy, e.g. 'rsi_strategy'.
+        params (dict): Strategy parameters the state was produced with.
+        data_file (str): Price data file the state was produced from.
+        state (dict): Strategy state returned by `get_state()`.
+        source_files (list): Source files whose content defines the code version.
+    """
+    data_size = os.path.getsize(data_file)
+    checkpoint = {
+        'strategy': strategy_name,
+        'params': params,
+        'code': code_version(*source_files),
+        'data_size': data_size,
+        'data_prefix_hash': prefix_hash(data_file, data_size),
+        'state': _encode(state)
+    }
+
+    with atomic_write(path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, ensure_ascii=False)
+
+
+def load_checkpoint(path: str, strategy_name: str, params: dict, data_file: str,
+                    source_files: list = ()):
+    """
+    Load a strategy checkpoint if it is still valid for the given run.
+
+    A checkpoint is valid when the strategy, parameters and code version match and the data file still
+    starts with the exact bytes the checkpoint was built from (rows were only appended).
+
+    Args:
+        path (str): Checkpoint file path.
+        strategy_name (str): Name of the strategy.
+        params (dict): Strategy parameters of the current run.
+        data_file (str): Price data file of the current run.
+        source_files (list): Source files whose content defines the code version.
+
+    Returns:
+        dict | None: The saved strategy state, or None when missing or stale.
+    """
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if checkpoint.get('strategy') != strategy_name:
+        return None
+    if checkpoint.get('params') != json.loads(json.dumps(params)):
+        return None
+    if checkpoint.get('code') != code_version(*source_files):
+        return None
+
+    data_size = checkpoint['data_size']
+    if os.path.getsize(data_file) < data_size:
+        return None
+    if prefix_hash(data_file, data_size) != checkpoint['data_prefix_hash']:
+        return None
+
+    return _decode(checkpoint['state'])
@@ -0,0 +1,513 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.atomic_io import atomic_write, file_lock
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PARQUET = True
+except ImportError:
+    # 沒有 pyarrow 時改以 .npz 欄式檔案儲存
+    HAS_PARQUET = False
+
+DEFAULT_DASHBOARD_DIR = 'report/dashboard'
+
+# 每條資產曲線最多保留的點數
+MAX_CURVE_POINTS = 500
+
+# 執行記錄的固定欄位，其餘欄位為績效指標
+INFO_COLUMNS = ['run_id', 'strategy', 'symbol', 'params', 'report', 'chart', 'curve', 'updated']
+
+# 報告檔名前綴 -> 策略名稱（與回測程式寫入的 strategy_name 一致）
+REPORT_PREFIXES = {
+    'rsi_strategy': 'rsi_strategy',
+    'rebalance_report': 'rebalance_strategy',
+    'indicator_strategy': 'indicator_strategy'
+}
+
+
+def parse_metric(value):
+    """
+    Convert a report metric such as '13.93%', '0.78', '1,234' or 68 to a float.
+
+    Returns:
+        tuple: (value, whether it is a percentage); the value is NaN for text such as '資料不足'.
+    """
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value), False
+    text = str(value).strip()
+    percent = text.endswith('%')
+    try:
+        return float(text.rstrip('%').replace(',', '')), percent
+    except ValueError:
+        return np.nan, percent
+
+
+def downsample(values: np.ndarray, max_points: int = MAX_CURVE_POINTS) -> np.ndarray:
+    """
+    Pick the bars to draw so a long equity curve keeps its shape with few points.
+
+    The curve is cut into `max_points / 2` buckets and the lowest and highest bar of every
+    bucket is kept, so peaks and drawdown troughs survive; the first and last bars are
+    always kept.
+
+    Args:
+        values (np.ndarray): Equity curve.
+        max_points (int): Upper bound of the number of points kept.
+
+    Returns:
+        np.ndarray: Sorted indices of the kept bars.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+
+    n_buckets = max(max_points // 2 - 1, 1)
+    size = -(-n // n_buckets)
+    padded = np.pad(values, (0, n_buckets * size - n), mode='edge').reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    kept = np.concatenate([[0, n - 1], offsets + padded.argmin(axis=1), offsets + padded.argmax(axis=1)])
+    return np.unique(np.minimum(kept, n - 1))
+
+
+def read_report(filename):
+    """
+    Read the parameters and metrics of a text report written by `BacktestStrategy.write_report`.
+
+    Returns:
+        tuple: (parameter dict, metric dict), both keyed by report names; None when the file
+            has no metrics section.
+    """
+    sections = {}
+    current = None
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            match = re.match(r'^=== (.+) ===$', line)
+            if match:
+                current = sections.setdefault(match.group(1), {})
+            elif current is not None and ': ' in line:
+                key, _, value = line.partition(': ')
+                current[key.strip()] = value.strip()
+    if '績效指標' not in sections:
+        return None
+    return sections.get('參數設定', {}), sections['績效指標']
+
+
+class RunStore:
+    """
+    Indexed columnar store of backtest runs and the static dashboard rendered from it.
+
+    Every run is one row keyed by `run_id` (the report's base filename) holding its strategy,
+    symbol, parameters and numeric metrics. The table is saved as `runs.parquet` when pyarrow
+    is installed and as a `runs.npz` archive of columns otherwise; an existing `runs.npz` is
+    migrated to Parquet on the first write after pyarrow is installed. Equity curves are
+    downsampled and written once per run to `curves/{digest}.js`, which the dashboard page
+    loads only when a run is opened. Adding runs rewrites the table and the new curves;
+    existing curve files and the page itself are only rewritten when they change.
+
+    Example:
+        store = RunStore()
+        store.add_run('rsi_strategy_2330_...', 'rsi_strategy', '2330', params, metrics, curve)
+        store.render()   # report/dashboard/index.html
+    """
+
+    def __init__(self, dashboard_dir: str = DEFAULT_DASHBOARD_DIR):
+        self.dashboard_dir = dashboard_dir
+        self.curve_dir = os.path.join(dashboard_dir, 'curves')
+        self.parquet_file = os.path.join(dashboard_dir, 'runs.parquet')
+        self.npz_file = os.path.join(dashboard_dir, 'runs.npz')
+        self.table_file = self.parquet_file if HAS_PARQUET else self.npz_file
+
+    # ------------------------------------------------------------------
+    # 執行記錄表
+    # ------------------------------------------------------------------
+    def load(self) -> pd.DataFrame:
+        """
+        Load the run table, indexed by run_id (empty when there are no runs yet).
+
+        Raises:
+            ValueError: If the table exists but cannot be read; it is left untouched so no
+                runs are lost by the next write.
+        """
+        if not HAS_PARQUET and os.path.exists(self.parquet_file):
+            raise ValueError(f"Run table {self.parquet_file} needs pyarrow to be read")
+        # 安裝 pyarrow 前留下的 runs.npz 在下次寫入時轉存為 Parquet
+        table_file = self.table_file if os.path.exists(self.table_file) else self.npz_file
+        if not os.path.exists(table_file):
+            return pd.DataFrame(columns=INFO_COLUMNS).set_index('run_id')
+        try:
+            if table_file == self.parquet_file:
+                return pd.read_parquet(table_file)
+            with np.load(table_file, allow_pickle=False) as archive:
+                columns = [str(column) for column in archive['columns']]
+                df = pd.DataFrame({column: archive[f'column{i}'] for i, column in enumerate(columns)})
+            return df.set_index('run_id')
+        except (OSError, ValueError, KeyError) as e:
+            raise ValueError(f"Cannot read run table {table_file}: {e}") from e
+
+    def _save(self, df: pd.DataFrame):
+        os.makedirs(self.dashboard_dir, exist_ok=True)
+        with atomic_write(self.table_file, 'wb') as f:
+            if HAS_PARQUET:
+                df.to_parquet(f)
+            else:
+                table = df.reset_index()
+                columns = {f'column{i}': table[column].to_numpy(dtype=float if column not in INFO_COLUMNS else str)
+                           for i, column in enumerate(table.columns)}
+                np.savez(f, columns=np.array(table.columns, dtype=str), **columns)
+        # 已轉存為 Parquet 的舊表格
+        if HAS_PARQUET and os.path.exists(self.npz_file):
+            os.remove(self.npz_file)
+
+    def _meta_file(self):
+        return os.path.join(self.dashboard_dir, 'units.json')
+
+    def _load_units(self):
+        try:
+            with open(self._meta_file(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def add_runs(self, runs: list):
+        """
+        Insert or replace runs in the store.
+
+        Args:
+            runs (list): Dicts with 'run_id', 'strategy', 'symbol', 'params' (dict), 'metrics'
+                (dict of report name -> value, e.g. from `calculate_metrics`) and optionally
+                'curve' (pd.Series of total value indexed by date), 'report' and 'chart'
+                (paths of the run's text report and chart).
+        """
+        with file_lock(self.table_file):
+            df = self.load()
+            units = self._load_units()
+            rows = []
+            for run in runs:
+                row = {
+                    'run_id': run['run_id'],
+                    'strategy': run['strategy'],
+                    'symbol': run['symbol'],
+                    'params': json.dumps(run.get('params', {}), ensure_ascii=False, sort_keys=True, default=str),
+                    'report': self._link(run.get('report')),
+                    'chart': self._link(run.get('chart')),
+                    'curve': '',
+                    'updated': time.strftime('%Y-%m-%d %H:%M:%S')
+                }
+                # 保留先前寫入的資產曲線（例如從快取取回結果時沒有曲線）
+                if run.get('curve') is not None:
+                    row['curve'] = self._write_curve(run['run_id'], run['curve'])
+                elif run['run_id'] in df.index:
+                    row['curve'] = df.at[run['run_id'], 'curve']
+                for name, value in run['metrics'].items():
+                    row[name], percent = parse_metric(value)
+                    units[name] = units.get(name, False) or percent
+                rows.append(row)
+
+            new = pd.DataFrame(rows).set_index('run_id')
+            df = pd.concat([df[~df.index.isin(new.index)], new])
+            metric_columns = [column for column in df.columns if column not in INFO_COLUMNS]
+            df[metric_columns] = df[metric_columns].astype(float)
+            df[INFO_COLUMNS[1:]] = df[INFO_COLUMNS[1:]].fillna('').astype(str)
+            self._save(df.sort_index())
+            with atomic_write(self._meta_file(), 'w', encoding='utf-8') as f:
+                json.dump(units, f, ensure_ascii=False, indent=2)
+
+    def add_run(self, run_id, strategy, symbol, params, metrics, curve=None, report=None, chart=None):
+        """Insert or replace one run; see `add_runs`."""
+        self.add_runs([{
+            'run_id': run_id, 'strategy': strategy, 'symbol': symbol, 'params': params,
+            'metrics': metrics, 'curve': curve, 'report': report, 'chart': chart
+        }])
+
+    def _link(self, path):
+        # 報告與圖表以相對於儀表板的路徑連結
+        if not path or not os.path.exists(path):
+            return ''
+        return os.path.relpath(path, self.dashboard_dir).replace(os.sep, '/')
+
+    def _write_curve(self, run_id, curve: pd.Series) -> str:
+        # 降低取樣後寫成以 <script> 載入的檔案（瀏覽器直接開啟本機檔案時無法以 fetch 讀取 JSON）
+        values = curve.to_numpy(dtype=float)
+        peak = np.maximum.accumulate(values)
+        drawdown = (values / peak - 1) * 100
+        kept = np.union1d(downsample(values), downsample(drawdown))
+        payload = json.dumps({
+            'dates': np.datetime_as_string(curve.index.to_numpy(dtype='datetime64[ns]')[kept], unit='D').tolist(),
+            'values': np.round(values[kept], 2).tolist(),
+            'drawdown': np.round(drawdown[kept], 2).tolist()
+        }, separators=(',', ':'))
+
+        name = hashlib.sha1(run_id.encode('utf-8')).hexdigest()[:16]
+        self._write_if_changed(os.path.join(self.curve_dir, f"{name}.js"),
+                               f"dashboardCurve({json.dumps(name)}, {payload});\n")
+        return name
+
+    @staticmethod
+    def _write_if_changed(path, text):
+        # 內容相同時不重寫，只有變動的檔案會更新
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                if f.read() == text:
+                    return False
+        except OSError:
+            pass
+        with atomic_write(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return True
+
+    # ------------------------------------------------------------------
+    # 儀表板
+    # ------------------------------------------------------------------
+    def render(self) -> str:
+        """
+        Write the dashboard page and the run table it displays.
+
+        Returns:
+            str: Path of `index.html`.
+        """
+        with file_lock(self.table_file, shared=True):
+            df = self.load()
+            units = self._load_units()
+
+        metric_columns = [column for column in df.columns if column not in INFO_COLUMNS]
+        table = df.reset_index()
+        rows = [[None if isinstance(value, float) and np.isnan(value) else value for value in record]
+                for record in table.itertuples(index=False, name=None)]
+        data = {
+            'columns': list(table.columns),
+            'metrics': metric_columns,
+            'percent': [column for column in metric_columns if units.get(column)],
+            'rows': rows,
+            'updated': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        self._write_if_changed(os.path.join(self.dashboard_dir, 'runs.js'),
+                               f"dashboardRuns({json.dumps(data, ensure_ascii=False, default=str)});\n")
+
+        index_file = os.path.join(self.dashboard_dir, 'index.html')
+        self._write_if_changed(index_file, DASHBOARD_HTML)
+        return index_file
+
+
+DASHBOARD_HTML = """<!DOCTYPE html>
+<html lang="zh-Hant">
+<head>
+<meta charset="utf-8">
+<title>回測結果總覽</title>
+<style>
+body { font-family: sans-serif; margin: 1.5em; color: #222; }
+input { padding: 4px 8px; width: 24em; margin-bottom: 0.8em; }
+table { border-collapse: collapse; font-size: 13px; }
+th, td { border-bottom: 1px solid #ddd; padding: 4px 8px; white-space: nowrap; }
+th { background: #f4f4f4; cursor: pointer; position: sticky; top: 0; user-select: none; }
+th.asc::after { content: " \\25B2"; } th.desc::after { content: " \\25BC"; }
+td.num { text-align: right; font-variant-numeric: tabular-nums; }
+tr.run:hover { background: #f0f6ff; cursor: pointer; }
+tr.detail td { background: #fafafa; white-space: normal; }
+.params { color: #666; max-width: 28em; overflow: hidden; text-overflow: ellipsis; }
+.neg { color: #c0392b; }
+svg { display: block; margin: 6px 0; }
+</style>
+</head>
+<body>
+<h2>回測結果總覽</h2>
+<input id="filter" placeholder="篩選（策略、股票、參數）">
+<span id="summary"></span>
+<table><thead id="head"></thead><tbody id="body"></tbody></table>
+<script>
+var runs = null, sortColumn = null, sortAscending = false, loading = {};
+
+function dashboardRuns(data) { runs = data; }
+
+function dashboardCurve(name, curve) {
+  (loading[name] || []).forEach(function (cell) { drawCurve(cell, curve); });
+  loading[name] = curve;
+}
+
+function loadCurve(name, cell) {
+  // 資產曲線只在展開時載入
+  var state = loading[name];
+  if (state && !Array.isArray(state)) { drawCurve(cell, state); return; }
+  if (state) { state.push(cell); return; }
+  loading[name] = [cell];
+  var script = document.createElement('script');
+  script.src = 'curves/' + name + '.js';
+  script.onerror = function () { cell.textContent = '無法載入資產曲線'; };
+  document.head.appendChild(script);
+}
+
+function path(times, values, width, height, low, high) {
+  // 降低取樣後的點在時間上並非等距，橫軸以日期計算
+  var start = times[0], span = (times[times.length - 1] - start) || 1;
+  return values.map(function (value, i) {
+    var x = (times[i] - start) / span * width;
+    var y = height - (value - low) / ((high - low) || 1) * height;
+    return (i ? 'L' : 'M') + x.toFixed(1) + ',' + y.toFixed(1);
+  }).join('');
+}
+
+function drawCurve(cell, curve) {
+  var width = 900, height = 220, ddHeight = 80;
+  var times = curve.dates.map(function (date) { return Date.parse(date); });
+  var low = Math.min.apply(null, curve.values), high = Math.max.apply(null, curve.values);
+  var worst = Math.min.apply(null, curve.drawdown);
+  cell.innerHTML =
+    '<div>' + curve.dates[0] + ' ~ ' + curve.dates[curve.dates.length - 1] +
+    '，最低 ' + low.toLocaleString() + '，最高 ' + high.toLocaleString() + '，最大回撤 ' + worst.toFixed(2) + '%</div>' +
+    '<svg width="' + width + '" height="' + height + '"><path fill="none" stroke="#2c7be5" d="' +
+    path(times, curve.values, width, height, low, high) + '"/></svg>' +
+    '<svg width="' + width + '" height="' + ddHeight + '"><path fill="none" stroke="#c0392b" d="' +
+    path(times, curve.drawdown, width, ddHeight, worst, 0) + '"/></svg>' + cell.dataset.links;
+}
+
+function format(value, column) {
+  if (value === null || value === undefined) return '';
+  if (runs.metrics.indexOf(column) < 0) return String(value);
+  var text = Math.abs(value) >= 1000 ? value.toLocaleString(undefined, {maximumFractionDigits: 0}) : value.toFixed(2);
+  return runs.percent.indexOf(column) >= 0 ? text + '%' : text;
+}
+
+function escape(text) {
+  return String(text).replace(/[&<>"]/g, function (c) { return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]; });
+}
+
+var shown = ['run_id', 'strategy', 'symbol', 'params'];
+
+function render() {
+  var index = {};
+  runs.columns.forEach(function (column, i) { index[column] = i; });
+  var columns = shown.concat(runs.metrics);
+  document.getElementById('head').innerHTML = '<tr>' + columns.map(function (column) {
+    var cls = column === sortColumn ? (sortAscending ? 'asc' : 'desc') : '';
+    return '<th class="' + cls + '" data-column="' + escape(column) + '">' + escape(column) + '</th>';
+  }).join('') + '</tr>';
+
+  var terms = document.getElementById('filter').value.toLowerCase().split(/\\s+/).filter(Boolean);
+  var rows = runs.rows.filter(function (row) {
+    var text = shown.map(function (column) { return row[index[column]]; }).join(' ').toLowerCase();
+    return terms.every(function (term) { return text.indexOf(term) >= 0; });
+  });
+  if (sortColumn !== null) {
+    var i = index[sortColumn];
+    rows.sort(function (a, b) {
+      var x = a[i], y = b[i];
+      if (x === null || x === '') return 1;
+      if (y === null || y === '') return -1;
+      var order = typeof x === 'number' ? x - y : String(x).localeCompare(String(y));
+      return sortAscending ? order : -order;
+    });
+  }
+
+  document.getElementById('summary').textContent = '共 ' + rows.length + ' / ' + runs.rows.length + ' 筆，更新於 ' + runs.updated;
+  document.getElementById('body').innerHTML = rows.map(function (row) {
+    var links = [row[index.report] ? '<a href="' + escape(row[index.report]) + '">報告</a>' : '',
+                 row[index.chart] ? '<a href="' + escape(row[index.chart]) + '">圖表</a>' : '']
+                .filter(Boolean).join(' ');
+    return '<tr class="run" data-curve="' + escape(row[index.curve]) + '" data-links="' + escape(links) + '">' +
+      columns.map(function (column) {
+        var value = row[index[column]];
+        var numeric = runs.metrics.indexOf(column) >= 0;
+        var cls = numeric ? 'num' + (value < 0 ? ' neg' : '') : (column === 'params' ? 'params' : '');
+        return '<td class="' + cls + '" title="' + (numeric ? '' : escape(value)) + '">' + escape(format(value, column)) + '</td>';
+      }).join('') + '</tr>';
+  }).join('');
+}
+
+document.getElementById('head').addEventListener('click', function (event) {
+  var column = event.target.dataset.column;
+  if (!column) return;
+  sortAscending = column === sortColumn ? !sortAscending : runs.metrics.indexOf(column) < 0;
+  sortColumn = column;
+  render();
+});
+
+document.getElementById('body').addEventListener('click', function (event) {
+  var row = event.target.closest('tr.run');
+  if (!row) return;
+  var next = row.nextElementSibling;
+  if (next && next.classList.contains('detail')) { next.remove(); return; }
+  var detail = document.createElement('tr');
+  detail.className = 'detail';
+  var cell = document.createElement('td');
+  cell.colSpan = row.children.length;
+  cell.dataset.links = row.dataset.links;
+  detail.appendChild(cell);
+  row.after(detail);
+  if (row.dataset.curve) { cell.textContent = '載入中…'; loadCurve(row.dataset.curve, cell); }
+  else { cell.innerHTML = '無資產曲線 ' + row.dataset.links; }
+});
+
+document.getElementById('filter').addEventListener('input', render);
+</script>
+<script src="runs.js"></script>
+<script>
+if (runs) { render(); } else { document.getElementById('summary').textContent = '沒有執行記錄'; }
+</script>
+</body>
+</html>
+"""
+
+
+def import_reports(store: RunStore, report_dir: str = 'report'):
+    """
+    Add text reports in `report_dir` that are not in the store yet (metrics only, without curves).
+
+    Returns:
+        int: Number of reports added.
+    """
+    df = store.load()
+    # 舊版以檔名前綴作為策略名稱匯入的記錄重新匯入
+    stale = df['strategy'].isin([prefix for prefix, name in REPORT_PREFIXES.items() if prefix != name])
+    existing = set(df.index[~stale])
+    runs = []
+    for filename in sorted(glob.glob(os.path.join(report_dir, '*.txt'))):
+        # 已由回測程式寫入的執行記錄資訊較完整，不以文字報告覆蓋
+        if os.path.splitext(os.path.basename(filename))[0] in existing:
+            continue
+        parsed = read_report(filename)
+        if parsed is None:
+            continue
+        params, metrics = parsed
+        run_id = os.path.splitext(os.path.basename(filename))[0]
+        symbol = os.path.splitext(os.path.basename(params.get('股票資料', '')))[0]
+        # 報告檔名為「策略名稱_股票代碼_參數」
+        prefix = run_id.split(f"_{symbol}_")[0] if symbol and f"_{symbol}_" in run_id else run_id.split('_')[0]
+        strategy = REPORT_PREFIXES.get(prefix, prefix)
+        chart = os.path.splitext(filename)[0] + '.png'
+        runs.append({
+            'run_id': run_id, 'strategy': strategy, 'symbol': symbol, 'params': params,
+            'metrics': metrics, 'report': filename, 'chart': chart if os.path.exists(chart) else None
+        })
+    if runs:
+        store.add_runs(runs)
+    return len(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='彙整回測結果並產生 HTML 總覽頁面')
+    parser.add_argument('--dashboard_dir', type=str, default=DEFAULT_DASHBOARD_DIR, help='總覽頁面與執行記錄的目錄')
+    parser.add_argument('--import_reports', type=str, nargs='?', const='report', default=None,
+                        help='匯入既有的文字報告（預設：report）')
+    args = parser.parse_args()
+
+    store = RunStore(args.dashboard_dir)
+    if args.import_reports:
+        print(f"匯入 {import_reports(store, args.import_reports)} 份報告")
+    index_file = store.render()
+    print(f"共 {len(store.load())} 筆執行記錄（{'Parquet' if HAS_PARQUET else 'npz'}），總覽頁面已儲存為 {index_file}")
+
+
+if __name__ == "__main__":
+    main()
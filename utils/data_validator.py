@@ -0,0 +1,261 @@
+import argparse
+import glob
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.atomic_io import atomic_write
+
+DEFAULT_QUEUE_FILE = 'data/twse/refetch_queue.json'
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+# 問題類型 -> 說明
+ISSUE_NAMES = {
+    'missing_session': '缺少交易日',
+    'invalid_date': '日期無法解析',
+    'duplicate_date': '日期重複',
+    'non_monotonic': '日期未遞增',
+    'missing_price': '價格缺漏或非正數',
+    'ohlc_inconsistent': '開高低收不一致'
+}
+
+
+def load_price_files(data_dir: str = 'data/twse', symbols: list = None) -> pd.DataFrame:
+    """
+    Read many price files into one long DataFrame, keeping their rows exactly as stored.
+
+    Args:
+        data_dir (str): Directory holding one `{symbol}.csv` per symbol.
+        symbols (list): Symbols to read (default: every CSV in `data_dir`).
+
+    Returns:
+        pd.DataFrame: Columns 'symbol', 'row' (0-based data row in its file), 'Date' and the OHLC
+            prices. Prices that are not numbers (e.g. '--' on suspended days) become NaN, and
+            dates that cannot be parsed become NaT.
+    """
+    if symbols is None:
+        files = sorted(glob.glob(os.path.join(data_dir, '*.csv')))
+    else:
+        files = [os.path.join(data_dir, f"{symbol}.csv") for symbol in symbols]
+
+    frames = []
+    for file_path in files:
+        df = pd.read_csv(file_path, usecols=lambda column: column in ['Date'] + PRICE_COLUMNS, dtype=str)
+        df.insert(0, 'symbol', os.path.splitext(os.path.basename(file_path))[0])
+        df.insert(1, 'row', np.arange(len(df)))
+        frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=['symbol', 'row', 'Date'] + PRICE_COLUMNS)
+    rows = pd.concat(frames, ignore_index=True)
+    rows['Date'] = pd.to_datetime(rows['Date'], errors='coerce')
+    for column in PRICE_COLUMNS:
+        rows[column] = pd.to_numeric(rows[column], errors='coerce') if column in rows else np.nan
+    return rows
+
+
+def trading_calendar(dates: pd.Series) -> pd.DatetimeIndex:
+    """
+    Build the trading calendar from the dates found across all price files.
+
+    A date is a session if any file has a row for it. Months inside the covered range
+    with no session in any file (a month every fetch failed on) would otherwise be
+    invisible, so their weekdays are added as sessions.
+
+    Args:
+        dates (pd.Series): Dates of all rows of all files.
+
+    Returns:
+        pd.DatetimeIndex: Sorted session dates.
+    """
+    sessions = pd.DatetimeIndex(dates.dropna().unique()).sort_values()
+    if len(sessions) == 0:
+        return sessions
+
+    weekdays = pd.bdate_range(sessions[0], sessions[-1])
+    covered_months = sessions.to_period('M').unique()
+    empty_month = ~weekdays.to_period('M').isin(covered_months)
+    return sessions.union(weekdays[empty_month])
+
+
+def validate_prices(rows: pd.DataFrame, calendar: pd.DatetimeIndex = None) -> pd.DataFrame:
+    """
+    Check all price rows at once for gaps and inconsistencies.
+
+    Every check is a vectorized operation over the combined rows of all files; missing
+    sessions are found with one (sessions x symbols) presence matrix, limited to the
+    range between each symbol's first and last row. Rows whose date cannot be parsed
+    cannot be placed on the calendar and are reported as 'invalid_date' instead.
+
+    Args:
+        rows (pd.DataFrame): Rows as returned by `load_price_files`.
+        calendar (pd.DatetimeIndex): Trading sessions (default: `trading_calendar` of the rows).
+
+    Returns:
+        pd.DataFrame: One row per problem with columns 'symbol', 'date', 'issue' (a key of
+            `ISSUE_NAMES`) and 'row' (data row in the file, -1 for missing sessions). The
+            date is NaT for rows whose date cannot be parsed.
+    """
+    if calendar is None:
+        calendar = trading_calendar(rows['Date'])
+    issues = []
+
+    def add(mask, issue):
+        found = rows.loc[mask, ['symbol', 'Date', 'row']].rename(columns={'Date': 'date'})
+        found['issue'] = issue
+        issues.append(found)
+
+    # 日期無法解析的資料列無法對應到交易日曆，單獨列出
+    add(rows['Date'].isna(), 'invalid_date')
+
+    # 同一檔案中重複的日期（保留第一筆，其餘標記）
+    add(rows.duplicated(['symbol', 'Date']) & rows['Date'].notna(), 'duplicate_date')
+
+    # 日期比前一列早
+    same_symbol = rows['symbol'].eq(rows['symbol'].shift())
+    add(same_symbol & (rows['Date'] < rows['Date'].shift()), 'non_monotonic')
+
+    # 價格缺漏、非正數，或最高/最低價與開盤、收盤價矛盾
+    prices = rows[PRICE_COLUMNS].to_numpy(dtype=float)
+    missing_price = np.isnan(prices).any(axis=1) | (prices <= 0).any(axis=1)
+    open_, high, low, close = prices.T
+    inconsistent = (high < np.maximum(open_, close)) | (low > np.minimum(open_, close)) | (high < low)
+    add(missing_price, 'missing_price')
+    add(~missing_price & inconsistent, 'ohlc_inconsistent')
+
+    # 缺少的交易日：日曆 x 股票的存在矩陣，只看每檔股票第一筆到最後一筆之間
+    dated = rows[rows['Date'].notna()]
+    symbols, symbol_codes = np.unique(dated['symbol'].to_numpy(), return_inverse=True)
+    date_codes = calendar.get_indexer(dated['Date'])
+    on_calendar = date_codes >= 0
+    present = np.zeros((len(calendar), len(symbols)), dtype=bool)
+    present[date_codes[on_calendar], symbol_codes[on_calendar]] = True
+
+    first = np.full(len(symbols), len(calendar))
+    last = np.full(len(symbols), -1)
+    np.minimum.at(first, symbol_codes[on_calendar], date_codes[on_calendar])
+    np.maximum.at(last, symbol_codes[on_calendar], date_codes[on_calendar])
+    positions = np.arange(len(calendar))[:, None]
+    missing = ~present & (positions >= first) & (positions <= last)
+
+    date_idx, symbol_idx = np.nonzero(missing)
+    issues.append(pd.DataFrame({
+        'symbol': symbols[symbol_idx],
+        'date': calendar[date_idx],
+        'row': -1,
+        'issue': 'missing_session'
+    }))
+
+    result = pd.concat(issues, ignore_index=True)
+    return result.sort_values(['symbol', 'date', 'issue'], kind='stable').reset_index(drop=True)[
+        ['symbol', 'date', 'issue', 'row']]
+
+
+def refetch_queue(issues: pd.DataFrame, verified: dict = None) -> dict:
+    """
+    Turn detected problems into the months that need to be fetched again.
+
+    Missing sessions and bad prices are repaired by refetching their month; duplicate
+    and out-of-order rows only need the file rewritten, which the fetcher's repair mode
+    does for every symbol it touches. Months the fetcher already refetched successfully
+    (`verified`) are left out: a gap that survives a refetch is a real trading halt.
+
+    Args:
+        issues (pd.DataFrame): Problems as returned by `validate_prices`.
+        verified (dict): Symbol -> months already refetched by the repair mode.
+
+    Returns:
+        dict: Symbol -> sorted list of months ('YYYY-MM') to refetch.
+    """
+    refetch = issues[issues['issue'].isin(['missing_session', 'missing_price', 'ohlc_inconsistent'])
+                     & issues['date'].notna()]
+    months = refetch.assign(month=refetch['date'].dt.strftime('%Y-%m'))[['symbol', 'month']].drop_duplicates()
+    verified = verified or {}
+    queue = {}
+    for symbol, group in months.groupby('symbol'):
+        pending = sorted(set(group['month']) - set(verified.get(symbol, [])))
+        if pending:
+            queue[symbol] = pending
+    return queue
+
+
+def unordered_symbols(issues: pd.DataFrame) -> list:
+    """Return symbols whose files have duplicate or out-of-order dates."""
+    return sorted(issues.loc[issues['issue'].isin(['duplicate_date', 'non_monotonic']), 'symbol'].unique())
+
+
+def load_queue(queue_file: str = DEFAULT_QUEUE_FILE) -> dict:
+    """Load a refetch queue file, or an empty queue if it does not exist."""
+    queue = {'refetch': {}, 'rewrite': [], 'verified': {}}
+    if os.path.exists(queue_file):
+        with open(queue_file, 'r', encoding='utf-8') as f:
+            queue.update(json.load(f))
+    return queue
+
+
+def save_queue(queue: dict, queue_file: str = DEFAULT_QUEUE_FILE):
+    """
+    Save the refetch queue for `twse_stock_fetcher.py --repair`.
+
+    Args:
+        queue (dict): 'data_dir', 'refetch' (symbol -> months to refetch), 'rewrite'
+            (symbols whose files only need to be sorted and deduplicated) and 'verified'
+            (symbol -> months already refetched).
+        queue_file (str): Path of the JSON queue file.
+    """
+    with atomic_write(queue_file, 'w', encoding='utf-8') as f:
+        json.dump(queue, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    # 設定命令列參數
+    parser = argparse.ArgumentParser(description='檢查股票資料的完整性（缺漏交易日、重複日期、順序、開高低收）')
+    parser.add_argument('--data_dir', type=str, default='data/twse', help='股票資料目錄')
+    parser.add_argument('--symbols', type=str, nargs='*', default=None, help='只檢查指定股票（預設：全部）')
+    parser.add_argument('--queue_file', type=str, default=None,
+                        help='補抓清單檔案（預設：{data_dir}/refetch_queue.json）')
+    parser.add_argument('--verbose', action='store_true', help='列出每一筆問題')
+
+    args = parser.parse_args()
+
+    rows = load_price_files(args.data_dir, args.symbols)
+    # 交易日曆一律以目錄中所有檔案建立，只檢查部分股票時也不會漏掉交易日
+    calendar = trading_calendar(load_price_files(args.data_dir)['Date'] if args.symbols else rows['Date'])
+    issues = validate_prices(rows, calendar)
+
+    print(f"=== 資料檢查：{rows['symbol'].nunique()} 檔股票，{len(rows)} 筆資料，{len(calendar)} 個交易日 ===")
+    if len(issues) == 0:
+        print("沒有發現問題")
+    else:
+        counts = issues.groupby(['symbol', 'issue']).size().unstack(fill_value=0)
+        counts.columns = [ISSUE_NAMES[column] for column in counts.columns]
+        print(counts.to_string())
+        if args.verbose:
+            print()
+            print(issues.assign(issue=issues['issue'].map(ISSUE_NAMES)).to_string(index=False))
+
+    queue_file = args.queue_file or os.path.join(args.data_dir, 'refetch_queue.json')
+    queue = load_queue(queue_file)
+    queue['data_dir'] = args.data_dir
+    queue['refetch'] = refetch_queue(issues, queue['verified'])
+    queue['rewrite'] = rewrite = unordered_symbols(issues)
+    save_queue(queue, queue_file)
+
+    n_months = sum(len(months) for months in queue['refetch'].values())
+    n_invalid = int((issues['issue'] == 'invalid_date').sum())
+    if n_invalid:
+        print(f"\n{n_invalid} 筆資料的日期無法解析，修復程式不會處理，請以 --verbose 查看資料列並手動修正")
+    print(f"\n需要補抓 {n_months} 個月份，需要重新排序 {len(rewrite)} 個檔案")
+    print(f"補抓清單已儲存為 {queue_file}")
+    if n_months or rewrite:
+        print(f"執行 python fetcher/twse_stock_fetcher.py --repair {queue_file} 進行修復")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.atomic_io import atomic_write, file_lock
+from utils.backtest_core import load_price_data
+from utils.checkpoint import prefix_hash
+from utils.technical_indicators import calculate_rsi_array
+
+
+def _rsi_matrix(closes: np.ndarray, period: int = 14) -> np.ndarray:
+    return calculate_rsi_array(closes, period=period, axis=0)
+
+
+def _rsi(closes: pd.Series, period: int = 14) -> pd.Series:
+    # 單一股票與全市場矩陣使用同一個計算函式
+    return pd.Series(_rsi_matrix(closes.to_numpy(dtype=float), period=period), index=closes.index)
+
+
+# 指標名稱 -> (單一股票計算函式, (日期 x 股票) 矩陣計算函式, 計算新資料所需的前置K棒數)
+INDICATORS = {
+    'rsi': (_rsi, _rsi_matrix, lambda period=14: period),
+}
+
+# 全市場指標矩陣的存放目錄名稱（位於 indicators/ 之下）
+MATRIX_DIR = '_matrix'
+
+
+class IndicatorStore:
+    """
+    On-disk store of precomputed indicators, one columnar file per symbol, indicator and parameters.
+
+    Files live next to the price data in `{data_dir}/indicators/{symbol}/` as `.npz` archives
+    holding a `dates` and a `values` column plus metadata about the price file they were
+    built from. When the fetcher appends rows, only the new tail is computed, starting from
+    the warm-up window the indicator needs; if the history itself changed, the indicator
+    is rebuilt from scratch.
+
+    Indicators of a whole universe are kept as one (dates x symbols) matrix per indicator
+    and parameters in `{data_dir}/indicators/_matrix/`, computed on the forward-filled close
+    matrix so they match a direct `calculate_rsi_array` pass over the same closes.
+    """
+
+    def __init__(self, data_dir: str = 'data/twse'):
+        self.data_dir = data_dir
+        self.store_dir = os.path.join(data_dir, 'indicators')
+
+    @staticmethod
+    def supports(name: str) -> bool:
+        return name in INDICATORS
+
+    def _path(self, symbol, name, params):
+        param_text = '_'.join(f"{key}{value}" for key, value in sorted(params.items()))
+        filename = f"{name}_{param_text}.npz" if param_text else f"{name}.npz"
+        return os.path.join(self.store_dir, symbol, filename)
+
+    @staticmethod
+    def _stat(data_file):
+        stat = os.stat(data_file)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _load(self, path):
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                return {
+                    'dates': archive['dates'],
+                    'values': archive['values'],
+                    'meta': json.loads(str(archive['meta']))
+                }
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save(self, path, dates, values, meta):
+        with atomic_write(path, 'wb') as f:
+            np.savez(f, dates=dates, values=values, meta=np.array(json.dumps(meta)))
+
+    def _is_current(self, stored, data_file):
+        if stored is None:
+            return False
+        data_size, data_mtime = self._stat(data_file)
+        if stored['meta']['data_size'] != data_size:
+            return False
+        # 大小與修改時間都相同時不需重新計算雜湊，只有修改時間改變才比對內容
+        if stored['meta'].get('data_mtime_ns') == data_mtime:
+            return True
+        return stored['meta']['data_hash'] == prefix_hash(data_file, data_size)
+
+    def get(self, symbol: str, name: str, data_file: str = None, **params) -> pd.Series:
+        """
+        Read an indicator of a symbol, refreshing the stored copy first if needed.
+
+        Args:
+            symbol (str): Symbol the indicator is stored under.
+            name (str): Indicator name registered in `INDICATORS`.
+            data_file (str): Price file of the symbol (default: `{data_dir}/{symbol}.csv`).
+            **params: Indicator parameters, e.g. period=14.
+
+        Returns:
+            pd.Series: Indicator values indexed by date.
+        """
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator: {name}")
+        compute, _, warmup = INDICATORS[name]
+
+        if data_file is None:
+            data_file = os.path.join(self.data_dir, f"{symbol}.csv")
+        path = self._path(symbol, name, params)
+        stored = self._load(path)
+
+        # 價格檔與上次相同，直接讀取
+        if self._is_current(stored, data_file):
+            return pd.Series(stored['values'], index=pd.DatetimeIndex(stored['dates']), name=name)
+
+        # 鎖定指標檔避免多個行程同時更新，並在抓取程式寫入價格檔期間等待
+        with file_lock(path), file_lock(data_file, shared=True):
+            # 等待鎖定期間可能已被其他行程更新
+            stored = self._load(path)
+            if self._is_current(stored, data_file):
+                return pd.Series(stored['values'], index=pd.DatetimeIndex(stored['dates']), name=name)
+
+            data_size, data_mtime = self._stat(data_file)
+            closes = load_price_data(data_file)['Close']
+            dates = closes.index.to_numpy()
+            n_stored = len(stored['values']) if stored else 0
+            warmup_bars = warmup(**params)
+
+            # 只新增資料時，從前置視窗開始計算新的尾段
+            appended = (
+                stored is not None
+                and data_size > stored['meta']['data_size']
+                and stored['meta']['data_hash'] == prefix_hash(data_file, stored['meta']['data_size'])
+                and n_stored <= len(closes)
+                and n_stored > warmup_bars
+            )
+            if appended:
+                tail_start = n_stored - warmup_bars
+                tail = compute(closes.iloc[tail_start:], **params).to_numpy(dtype=float)
+                values = np.concatenate([stored['values'], tail[warmup_bars:]])
+            else:
+                values = compute(closes, **params).to_numpy(dtype=float)
+
+            meta = {
+                'indicator': name,
+                'params': params,
+                'data_size': data_size,
+                'data_mtime_ns': data_mtime,
+                'data_hash': prefix_hash(data_file, data_size)
+            }
+            self._save(path, dates, values, meta)
+        return pd.Series(values, index=closes.index, name=name)
+
+    def get_matrix(self, closes: pd.DataFrame, name: str, **params) -> np.ndarray:
+        """
+        Read an indicator for a whole universe from one stored (dates x symbols) matrix.
+
+        The indicator is computed on the forward-filled close matrix, so a symbol's missing
+        sessions count as unchanged prices. The stored matrix is reused as long as the
+        forward-filled closes it was built from are unchanged; when new dates are appended,
+        only the new rows are computed, starting from the indicator's warm-up window.
+
+        Args:
+            closes (pd.DataFrame): (dates x symbols) closing prices, e.g. from
+                `utils.screener.load_close_matrix`.
+            name (str): Indicator name registered in `INDICATORS`.
+            **params: Indicator parameters.
+
+        Returns:
+            np.ndarray: (dates x symbols) indicator values.
+        """
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator: {name}")
+        _, compute, warmup = INDICATORS[name]
+
+        close_values = closes.ffill().to_numpy(dtype=float)
+        dates = closes.index.to_numpy(dtype='datetime64[ns]')
+        symbols = np.asarray(closes.columns, dtype=str)
+        path = self._path(MATRIX_DIR, name, params)
+
+        with file_lock(path):
+            n_stored = 0
+            try:
+                with np.load(path, allow_pickle=False) as archive:
+                    # 股票相同且已存的日期與收盤價是目前矩陣的開頭，才能沿用
+                    stored_dates = archive['dates']
+                    n = len(stored_dates)
+                    if np.array_equal(archive['symbols'], symbols) and n <= len(dates) \
+                            and np.array_equal(stored_dates, dates[:n]) \
+                            and np.array_equal(archive['closes'], close_values[:n], equal_nan=True):
+                        stored_values = archive['values']
+                        n_stored = n
+            except (OSError, ValueError, KeyError):
+                pass
+
+            if n_stored == len(dates):
+                return stored_values
+
+            # 只新增日期時，從前置視窗開始計算新的尾段
+            warmup_bars = warmup(**params)
+            if n_stored > warmup_bars:
+                tail = compute(close_values[n_stored - warmup_bars:], **params)
+                values = np.concatenate([stored_values, tail[warmup_bars:]])
+            else:
+                values = compute(close_values, **params)
+
+            with atomic_write(path, 'wb') as f:
+                np.savez(f, dates=dates, symbols=symbols, closes=close_values, values=values)
+        return values
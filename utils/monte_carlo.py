@@ -0,0 +1,181 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.backtest_core import calculate_batch_metrics
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def log_returns(closes: np.ndarray) -> np.ndarray:
+    """
+    Calculate daily log returns of a closing price series.
+
+    Args:
+        closes (np.ndarray): 1-D array of closing prices.
+
+    Returns:
+        np.ndarray: Array of length `len(closes) - 1`.
+    """
+    closes = np.asarray(closes, dtype=float)
+    return np.diff(np.log(closes))
+
+
+def block_bootstrap_returns(returns: np.ndarray, n_paths: int, n_bars: int, block_size: int,
+                            rng: np.random.Generator) -> np.ndarray:
+    """
+    Build synthetic return paths by concatenating randomly chosen blocks of history.
+
+    Blocks keep the short-term autocorrelation and volatility clustering of the data.
+
+    Args:
+        returns (np.ndarray): 1-D array of historical log returns.
+        n_paths (int): Number of paths.
+        n_bars (int): Number of returns per path.
+        block_size (int): Length of each block in bars.
+        rng (np.random.Generator): Random number generator.
+
+    Returns:
+        np.ndarray: (n_paths x n_bars) array of log returns.
+    """
+    block_size = max(1, min(block_size, len(returns)))
+    n_blocks = -(-n_bars // block_size)
+    starts = rng.integers(0, len(returns) - block_size + 1, size=(n_paths, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block_size)).reshape(n_paths, -1)[:, :n_bars]
+    return returns[idx]
+
+
+def regime_segments(returns: np.ndarray, regime_window: int) -> np.ndarray:
+    """
+    Label each bar with the id of its market regime segment.
+
+    A bar is bullish when the trailing `regime_window` bar return is positive and bearish
+    otherwise; consecutive bars with the same label form one segment.
+
+    Args:
+        returns (np.ndarray): 1-D array of historical log returns.
+        regime_window (int): Trailing window used to classify the regime.
+
+    Returns:
+        np.ndarray: Segment id of every bar, increasing from 0.
+    """
+    cumulative = np.concatenate([[0.0], np.cumsum(returns)])
+    trailing = cumulative[1:] - cumulative[np.maximum(np.arange(1, len(cumulative)) - regime_window, 0)]
+    bullish = trailing > 0
+    return np.concatenate([[0], np.cumsum(bullish[1:] != bullish[:-1])])
+
+
+def regime_shuffled_returns(returns: np.ndarray, n_paths: int, n_bars: int, regime_window: int,
+                            rng: np.random.Generator) -> np.ndarray:
+    """
+    Build synthetic return paths by shuffling the order of whole regime segments.
+
+    Each path keeps every bull and bear segment of history intact but visits them in a
+    random order. Paths longer than the history chain several independent shuffles.
+
+    Args:
+        returns (np.ndarray): 1-D array of historical log returns.
+        n_paths (int): Number of paths.
+        n_bars (int): Number of returns per path.
+        regime_window (int): Trailing window used to classify the regime.
+        rng (np.random.Generator): Random number generator.
+
+    Returns:
+        np.ndarray: (n_paths x n_bars) array of log returns.
+    """
+    segment_ids = regime_segments(returns, regime_window)
+    n_segments = segment_ids[-1] + 1
+    n = len(returns)
+
+    shuffles = []
+    for _ in range(-(-n_bars // n)):
+        # 每條路徑隨機排列區段順序，再依 (區段名次, 原始位置) 排序取得K棒索引
+        segment_rank = np.argsort(rng.random((n_paths, n_segments)), axis=1)
+        bar_key = segment_rank[:, segment_ids] * n + np.arange(n)
+        shuffles.append(np.argsort(bar_key, axis=1))
+    idx = np.concatenate(shuffles, axis=1)[:, :n_bars]
+    return returns[idx]
+
+
+def synthetic_prices(start_price: float, path_returns: np.ndarray) -> np.ndarray:
+    """
+    Turn log return paths into price paths starting from `start_price`.
+
+    Args:
+        start_price (float): Price of the first bar of every path.
+        path_returns (np.ndarray): (paths x bars) array of log returns.
+
+    Returns:
+        np.ndarray: (paths x (bars + 1)) array of prices.
+    """
+    log_prices = np.zeros((path_returns.shape[0], path_returns.shape[1] + 1))
+    np.cumsum(path_returns, axis=1, out=log_prices[:, 1:])
+    return start_price * np.exp(log_prices)
+
+
+def _simulate_chunk(task):
+    # 在子行程中產生一批路徑並回測，只回傳績效指標以節省記憶體
+    strategy_cls, closes, method, n_paths, n_bars, block_size, regime_window, seed, initial_capital, params = task
+    rng = np.random.default_rng(seed)
+    returns = log_returns(closes)
+    if method == 'block':
+        path_returns = block_bootstrap_returns(returns, n_paths, n_bars, block_size, rng)
+    elif method == 'regime':
+        path_returns = regime_shuffled_returns(returns, n_paths, n_bars, regime_window, rng)
+    else:
+        raise ValueError(f"Unknown resampling method: {method}")
+
+    prices = synthetic_prices(closes[0], path_returns)
+    values, first_bar = strategy_cls.simulate_batch(prices, initial_capital=initial_capital, **params)
+    years = (values.shape[1] - 1) / TRADING_DAYS_PER_YEAR
+    return calculate_batch_metrics(values, years)
+
+
+def run_monte_carlo(strategy_cls, closes, params, n_paths=5000, n_bars=None, method='block',
+                    block_size=20, regime_window=60, chunk_size=500, workers=None, seed=None,
+                    initial_capital=1000000):
+    """
+    Run a strategy over thousands of resampled price paths.
+
+    Paths are generated and simulated in chunks of `chunk_size` so memory stays bounded,
+    and chunks are spread over a process pool. Each chunk gets its own random stream
+    derived from `seed`, so results are reproducible for a given seed and chunk size.
+
+    Args:
+        strategy_cls (type): BacktestStrategy subclass implementing `simulate_batch`.
+        closes (np.ndarray): Historical closing prices.
+        params (dict): Strategy parameters passed to `simulate_batch`.
+        n_paths (int): Number of synthetic paths (default: 5000).
+        n_bars (int): Number of returns per path (default: length of history).
+        method (str): 'block' for block bootstrap, 'regime' for regime-shuffled paths.
+        block_size (int): Block length of the block bootstrap (default: 20 bars).
+        regime_window (int): Trailing window used to classify regimes (default: 60 bars).
+        chunk_size (int): Number of paths simulated per task (default: 500).
+        workers (int): Number of worker processes (default: CPU count, 1 runs in-process).
+        seed (int): Random seed.
+        initial_capital (float): Initial capital of every path.
+
+    Returns:
+        dict: Arrays of length `n_paths` keyed by 'cagr', 'max_drawdown' and 'sharpe'.
+    """
+    closes = np.asarray(closes, dtype=float)
+    if n_bars is None:
+        n_bars = len(closes) - 1
+    workers = workers or os.cpu_count() or 1
+
+    chunk_sizes = [min(chunk_size, n_paths - start) for start in range(0, n_paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    tasks = [
+        (strategy_cls, closes, method, size, n_bars, block_size, regime_window, chunk_seed,
+         initial_capital, params)
+        for size, chunk_seed in zip(chunk_sizes, seeds)
+    ]
+
+    if workers == 1 or len(tasks) == 1:
+        results = [_simulate_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            results = list(executor.map(_simulate_chunk, tasks))
+
+    return {key: np.concatenate([result[key] for result in results]) for key in results[0]}
@@ -0,0 +1,49 @@
+import os
+
+from utils.atomic_io import atomic_write
+
+CJK_FONTS = ['Noto Sans CJK TC', 'Noto Sans CJK JP', 'Noto Sans CJK KR', 'Noto Sans CJK SC', 'SimHei', 'Arial Unicode MS']
+
+_pyplot = None
+
+
+def get_pyplot():
+    """
+    Import matplotlib.pyplot on first use and configure it for report charts.
+
+    matplotlib is the slowest import of every entry point, so modules call this only when
+    a chart is actually produced. The first call selects the non-interactive Agg backend
+    and resolves the installed CJK fonts once, instead of letting every text element
+    search for fonts that are not installed.
+
+    Returns:
+        module: The configured matplotlib.pyplot module.
+    """
+    global _pyplot
+    if _pyplot is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        from matplotlib import font_manager
+
+        # 只保留系統中實際安裝的中文字體
+        installed = {font.name for font in font_manager.fontManager.ttflist}
+        available = [font for font in CJK_FONTS if font in installed]
+        plt.rcParams['font.sans-serif'] = available + list(plt.rcParams['font.sans-serif'])
+        plt.rcParams['axes.unicode_minus'] = False
+        _pyplot = plt
+    return _pyplot
+
+
+def save_figure(plt, filename, **kwargs):
+    """
+    Save the current figure through `atomic_write`, so a killed run never leaves a truncated image.
+
+    Args:
+        plt (module): matplotlib.pyplot returned by `get_pyplot`.
+        filename (str): Output path; its extension selects the image format.
+        **kwargs: Extra arguments passed to `plt.savefig`.
+    """
+    image_format = os.path.splitext(filename)[1].lstrip('.') or None
+    with atomic_write(filename, 'wb') as f:
+        plt.savefig(f, format=image_format, **kwargs)
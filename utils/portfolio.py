@@ -0,0 +1,178 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from utils.backtest_core import calculate_batch_metrics
+
+# 再平衡週期 -> 將日期分組的 pandas 週期代碼（'none' 表示買進後不再平衡）
+REBALANCE_SCHEDULES = {
+    'none': None,
+    'monthly': 'M',
+    'quarterly': 'Q',
+    'yearly': 'Y'
+}
+
+
+def sleeve_curve(strategy) -> pd.Series:
+    """
+    Get the equity curve of a strategy that has run, on every bar of its data.
+
+    Bars before the strategy's first recorded bar hold the initial capital in cash.
+
+    Args:
+        strategy (BacktestStrategy): Strategy after `calculate_portfolio_value()`.
+
+    Returns:
+        pd.Series: Total portfolio value indexed by date.
+    """
+    values = np.full(len(strategy.df), float(strategy.initial_capital))
+    recorded = np.asarray(strategy.records['total_value'], dtype=float)
+    if len(recorded):
+        values[len(values) - len(recorded):] = recorded
+    curve = pd.Series(values, index=strategy.df.index)
+    return curve[~curve.index.duplicated(keep='last')]
+
+
+def align_curves(curves: dict) -> pd.DataFrame:
+    """
+    Align sleeve equity curves on common dates, rebased to 1 on the first common date.
+
+    The curves are joined on the union of their dates; a sleeve keeps its previous value
+    on dates its market did not trade. Dates before every sleeve has started are dropped.
+
+    Args:
+        curves (dict): Sleeve name -> equity curve (pd.Series indexed by date).
+
+    Returns:
+        pd.DataFrame: (dates x sleeves) growth of 1 in every sleeve.
+    """
+    df = pd.DataFrame(curves).sort_index().ffill().dropna()
+    if len(df) == 0:
+        raise ValueError("Sleeves have no dates in common")
+    return df / df.iloc[0]
+
+
+def weight_grid(n_sleeves: int, step: float = 0.1) -> np.ndarray:
+    """
+    Enumerate every allocation of the capital to `n_sleeves` sleeves in multiples of `step`.
+
+    Args:
+        n_sleeves (int): Number of sleeves.
+        step (float): Weight increment; 1 / step must be a whole number.
+
+    Returns:
+        np.ndarray: (mixes x sleeves) array of weights summing to 1.
+    """
+    units = int(round(1 / step))
+    if not np.isclose(units * step, 1.0):
+        raise ValueError(f"1 / step must be a whole number: {step}")
+    # 以「隔板法」列舉所有總和為 units 的非負整數組合
+    mixes = []
+    for bars in itertools.combinations(range(units + n_sleeves - 1), n_sleeves - 1):
+        edges = (-1,) + bars + (units + n_sleeves - 1,)
+        mixes.append([edges[i + 1] - edges[i] - 1 for i in range(n_sleeves)])
+    return np.asarray(mixes, dtype=float) / units
+
+
+def rebalance_bars(dates: pd.DatetimeIndex, schedule) -> np.ndarray:
+    """
+    Find the bars at whose close the portfolio is rebalanced back to its target weights.
+
+    Args:
+        dates (pd.DatetimeIndex): Dates of the aligned curves.
+        schedule (str | int): A name in `REBALANCE_SCHEDULES` (rebalance on the last bar of
+            every month, quarter or year, or never), or a number of bars between rebalances.
+
+    Returns:
+        np.ndarray: Sorted bar indices, excluding the last bar.
+    """
+    n = len(dates)
+    if isinstance(schedule, (int, np.integer)) or str(schedule).isdigit():
+        every = int(schedule)
+        if every <= 0:
+            raise ValueError(f"Rebalance interval must be positive: {schedule}")
+        return np.arange(every, n - 1, every)
+    if schedule not in REBALANCE_SCHEDULES:
+        raise ValueError(f"Unknown rebalance schedule: {schedule}")
+    if REBALANCE_SCHEDULES[schedule] is None:
+        return np.array([], dtype=int)
+    periods = pd.DatetimeIndex(dates).to_period(REBALANCE_SCHEDULES[schedule]).asi8
+    return np.flatnonzero(periods[1:] != periods[:-1])
+
+
+def combine_sleeves(growth: np.ndarray, weights: np.ndarray, rebalance: np.ndarray) -> np.ndarray:
+    """
+    Calculate the equity curves of many allocation mixes over the same sleeve curves.
+
+    Between two rebalances every sleeve grows on its own, so a portfolio's value on bar t
+    is its value at the previous rebalance times the weighted growth of the sleeves since
+    then. The growth since the previous rebalance is shared by every mix, which leaves one
+    matrix product per schedule plus a cumulative product over the rebalance bars.
+
+    Args:
+        growth (np.ndarray): (bars x sleeves) sleeve values, e.g. from `align_curves`.
+        weights (np.ndarray): (mixes x sleeves) target weights.
+        rebalance (np.ndarray): Bars at whose close the weights are restored, from
+            `rebalance_bars`.
+
+    Returns:
+        np.ndarray: (mixes x bars) portfolio values starting at 1.
+    """
+    growth = np.asarray(growth, dtype=float)
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    n = len(growth)
+
+    # 每根K棒所屬的區段起點：上一次再平衡（或第一根K棒）
+    anchors = np.concatenate([[0], np.asarray(rebalance, dtype=int)])
+    segment = np.searchsorted(anchors, np.arange(n), side='left') - 1
+    segment[0] = 0
+    # 區段起點當根K棒屬於前一個區段（收盤時才再平衡）
+    since_anchor = growth / growth[anchors[segment]]
+
+    # (K棒數 x 組合數)：區段內的加權成長
+    factor = since_anchor @ weights.T
+    # 各區段起點的資產價值 = 前面各區段結束時成長倍數的累積乘積
+    anchor_values = np.cumprod(factor[anchors], axis=0)
+    return (anchor_values[segment] * factor).T
+
+
+def evaluate_mixes(growth: pd.DataFrame, weights: np.ndarray, schedules=('none',), benchmark=None,
+                   initial_capital: float = 1000000, chunk_size: int = 2000) -> pd.DataFrame:
+    """
+    Score every combination of allocation mix and rebalance schedule.
+
+    Args:
+        growth (pd.DataFrame): (dates x sleeves) sleeve values from `align_curves`.
+        weights (np.ndarray): (mixes x sleeves) target weights, e.g. from `weight_grid`.
+        schedules (sequence): Rebalance schedules, see `rebalance_bars`.
+        benchmark (Benchmark): Optional benchmark to score the mixes against.
+        initial_capital (float): Initial capital of every portfolio.
+        chunk_size (int): Mixes evaluated per matrix product (controls memory use).
+
+    Returns:
+        pd.DataFrame: One row per mix and schedule with the weights (one column per sleeve),
+            'schedule', 'final_value' and the metrics of `calculate_batch_metrics`
+            (plus `relative_metrics` with a benchmark).
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    values_matrix = growth.to_numpy(dtype=float)
+    years = max((growth.index[-1] - growth.index[0]).days / 365, 0.01)
+
+    frames = []
+    for schedule in schedules:
+        rebalance = rebalance_bars(growth.index, schedule)
+        for start in range(0, len(weights), chunk_size):
+            chunk = weights[start:start + chunk_size]
+            values = combine_sleeves(values_matrix, chunk, rebalance) * initial_capital
+
+            frame = pd.DataFrame(chunk, columns=growth.columns)
+            frame['schedule'] = str(schedule)
+            frame['final_value'] = values[:, -1]
+            for key, metric in calculate_batch_metrics(values, years).items():
+                frame[key] = metric
+            if benchmark is not None:
+                for key, metric in benchmark.score(values, growth.index).items():
+                    frame[key] = metric
+            frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from utils.atomic_io import atomic_copy, file_lock
+
+DEFAULT_CACHE_DIR = '.cache/results'
+DEFAULT_MAX_SIZE_MB = 200
+
+
+def file_hash(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Calculate the SHA-256 hash of a file's content.
+
+    Args:
+        file_path (str): Path to the file.
+        chunk_size (int): Number of bytes read per chunk (default: 1 MiB).
+
+    Returns:
+        str: Hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_version(*source_files: str) -> str:
+    """
+    Build a version string from the content of the source files a strategy depends on.
+
+    Any edit to one of the files produces a new version, so stale results are never reused.
+
+    Args:
+        *source_files (str): Paths to the Python source files.
+
+    Returns:
+        str: Short hex digest identifying the code version.
+    """
+    digest = hashlib.sha256()
+    for source_file in sorted(source_files):
+        digest.update(file_hash(source_file).encode())
+    return digest.hexdigest()[:16]
+
+
+class ResultCache:
+    """
+    Disk cache for strategy results keyed by (data hash, strategy, parameters, code version).
+
+    Each entry is a directory holding `meta.json` (metrics and summary values) and a copy of
+    every artifact (report, chart). The cache is bounded in size and evicts the least
+    recently used entries first.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_size_mb: float = DEFAULT_MAX_SIZE_MB):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+
+    def make_key(self, data_file: str, strategy_name: str, params: dict, source_files: list,
+                 benchmark_file: str = None) -> str:
+        """
+        Build the cache key of a strategy run.
+
+        Args:
+            data_file (str): Path to the price data file; its content (not its name) is hashed.
+            strategy_name (str): Name of the strategy, e.g. 'rsi_strategy'.
+            params (dict): Strategy parameters. Values must be JSON serializable.
+            source_files (list): Source files whose content defines the code version.
+            benchmark_file (str): Optional price file of the benchmark the report is scored
+                against; its content is hashed like `data_file`.
+
+        Returns:
+            str: Hex digest used as the entry name.
+        """
+        payload = json.dumps({
+            'data': file_hash(data_file),
+            'benchmark': file_hash(benchmark_file) if benchmark_file else None,
+            'strategy': strategy_name,
+            'params': params,
+            'code': code_version(*source_files)
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key: str):
+        """
+        Look up a cache entry and mark it as recently used.
+
+        Args:
+            key (str): Key returned by `make_key`.
+
+        Returns:
+            dict | None: The stored entry, or None on a cache miss.
+        """
+        meta_file = os.path.join(self._entry_dir(key), 'meta.json')
+        if not os.path.exists(meta_file):
+            return None
+
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            # 損毀的快取項目直接移除
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            return None
+
+        # 確認所有產出檔案都還在
+        for artifact in entry['artifacts'].values():
+            if not os.path.exists(os.path.join(self._entry_dir(key), artifact)):
+                shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+                return None
+
+        # 更新存取時間作為 LRU 依據
+        os.utime(meta_file)
+        return entry
+
+    def put(self, key: str, metrics: dict, artifacts: dict, summary: dict = None):
+        """
+        Store the result of a strategy run.
+
+        Args:
+            key (str): Key returned by `make_key`.
+            metrics (dict): Performance metrics of the run.
+            artifacts (dict): Mapping of artifact name (e.g. 'report', 'chart') to file path.
+                Paths that are None or do not exist are skipped.
+            summary (dict): Extra JSON serializable values needed to reproduce the terminal output.
+        """
+        entry_dir = self._entry_dir(key)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix=f".{key}.", suffix='.tmp')
+
+        stored_artifacts = {}
+        for name, path in artifacts.items():
+            if path and os.path.exists(path):
+                stored_name = name + os.path.splitext(path)[1]
+                shutil.copyfile(path, os.path.join(tmp_dir, stored_name))
+                stored_artifacts[name] = stored_name
+
+        entry = {
+            'key': key,
+            'created_at': time.time(),
+            'metrics': metrics,
+            'artifacts': stored_artifacts,
+            'summary': summary or {}
+        }
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2, default=str)
+
+        # 先寫入暫存目錄再換名，避免留下不完整的項目；鎖定避免與其他行程同時寫入或清除
+        with file_lock(self.cache_dir):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+            self.evict()
+
+    def restore_artifacts(self, key: str, entry: dict, destinations: dict) -> dict:
+        """
+        Copy the stored artifacts of an entry to their output locations.
+
+        Args:
+            key (str): Key of the entry.
+            entry (dict): Entry returned by `get`.
+            destinations (dict): Mapping of artifact name to output path.
+
+        Returns:
+            dict: Mapping of artifact name to the restored path (None when not stored).
+        """
+        restored = {}
+        for name, path in destinations.items():
+            stored_name = entry['artifacts'].get(name)
+            if stored_name is None:
+                restored[name] = None
+                continue
+            atomic_copy(os.path.join(self._entry_dir(key), stored_name), path)
+            restored[name] = path
+        return restored
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            # 略過寫入中的暫存目錄
+            if name.startswith('.'):
+                continue
+            entry_dir = os.path.join(self.cache_dir, name)
+            meta_file = os.path.join(entry_dir, 'meta.json')
+            if not os.path.isdir(entry_dir) or not os.path.exists(meta_file):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(entry_dir, f))
+                for f in os.listdir(entry_dir)
+            )
+            entries.append((os.path.getmtime(meta_file), size, entry_dir))
+        return entries
+
+    def size(self) -> int:
+        """Return the total size of all cache entries in bytes."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in `max_size_bytes`."""
+        entries = sorted(self._entries())
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in entries:
+            if total_size <= self.max_size_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+
+    def clear(self):
+        """Remove every cache entry."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
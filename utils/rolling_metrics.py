@@ -0,0 +1,196 @@
+import numpy as np
+
+# 滾動視窗名稱 -> 交易日數
+ROLLING_WINDOWS = {
+    '1y': 252,
+    '3y': 756
+}
+
+
+def _as_runs(values):
+    # 轉為 (runs x bars) 陣列，並記住是否為單一曲線
+    values = np.asarray(values, dtype=float)
+    return np.atleast_2d(values), values.ndim == 1
+
+
+def _restore(result, single):
+    return result[0] if single else result
+
+
+def rolling_return(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Calculate the return over the trailing `window` bars of every bar.
+
+    Args:
+        values (np.ndarray): Equity curve, or (runs x bars) array of equity curves.
+        window (int): Number of bars (returns) per window.
+
+    Returns:
+        np.ndarray: Returns in percent, same shape as `values`; NaN for the first `window` bars.
+    """
+    values, single = _as_runs(values)
+    result = np.full_like(values, np.nan)
+    result[:, window:] = (values[:, window:] / values[:, :-window] - 1) * 100
+    return _restore(result, single)
+
+
+def rolling_sharpe(values: np.ndarray, window: int, risk_free_rate: float = 0.01,
+                   periods_per_year: int = 252) -> np.ndarray:
+    """
+    Calculate the annualized Sharpe ratio of the trailing `window` daily returns of every bar.
+
+    Uses the same definition as `BacktestStrategy.calculate_metrics`. Window sums of the
+    excess returns and their squares come from cumulative sums, so the cost does not
+    depend on the window length.
+
+    Args:
+        values (np.ndarray): Equity curve, or (runs x bars) array of equity curves.
+        window (int): Number of daily returns per window.
+        risk_free_rate (float): Annual risk-free rate (default: 1%).
+        periods_per_year (int): Bars per year used to annualize (default: 252).
+
+    Returns:
+        np.ndarray: Sharpe ratios, same shape as `values`; NaN for the first `window` bars
+            and 0 where the window has no volatility.
+    """
+    if window < 2:
+        raise ValueError("rolling Sharpe ratio needs a window of at least 2 returns")
+    values, single = _as_runs(values)
+    excess = values[:, 1:] / values[:, :-1] - 1 - risk_free_rate / periods_per_year
+
+    # 先減去各曲線的平均值，降低累積和相減造成的誤差
+    shift = excess.mean(axis=1, keepdims=True)
+    centered = excess - shift
+    cum = np.zeros((len(values), excess.shape[1] + 1))
+    cum_sq = np.zeros_like(cum)
+    np.cumsum(centered, axis=1, out=cum[:, 1:])
+    np.cumsum(centered ** 2, axis=1, out=cum_sq[:, 1:])
+
+    window_sum = cum[:, window:] - cum[:, :-window]
+    window_sq = cum_sq[:, window:] - cum_sq[:, :-window]
+    mean = window_sum / window + shift
+    variance = np.maximum((window_sq - window_sum ** 2 / window) / (window - 1), 0.0)
+
+    # 視窗內報酬完全相同（例如全數持有現金）時，以整數累積和精確判斷，不受浮點誤差影響
+    changes = np.zeros((len(values), excess.shape[1]), dtype=np.int64)
+    changes[:, 1:] = excess[:, 1:] != excess[:, :-1]
+    cum_changes = np.cumsum(changes, axis=1)
+    constant = cum_changes[:, window - 1:] - cum_changes[:, :excess.shape[1] - window + 1] == 0
+
+    result = np.full_like(values, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 其餘與累積和相減的誤差同量級的變異數也視為沒有波動
+        flat = constant | (variance <= 1e-20 + 1e-10 * mean ** 2)
+        result[:, window:] = np.where(flat, 0.0, np.sqrt(periods_per_year) * mean / np.sqrt(variance))
+    return _restore(result, single)
+
+
+def drawdown(values: np.ndarray) -> np.ndarray:
+    """
+    Calculate the drawdown of every bar from the highest value so far.
+
+    Returns:
+        np.ndarray: Drawdown in percent (0 at a new high, negative below it).
+    """
+    values, single = _as_runs(values)
+    peak = np.maximum.accumulate(values, axis=1)
+    return _restore((values / peak - 1) * 100, single)
+
+
+def underwater_duration(values: np.ndarray) -> np.ndarray:
+    """
+    Count the bars since the equity curve was last at its highest value so far.
+
+    Returns:
+        np.ndarray: Integer array, 0 on bars that set or match a new high.
+    """
+    values, single = _as_runs(values)
+    peak = np.maximum.accumulate(values, axis=1)
+    bars = np.arange(values.shape[1])
+    last_high = np.maximum.accumulate(np.where(values >= peak, bars, 0), axis=1)
+    return _restore(bars - last_high, single)
+
+
+def rolling_max_drawdown(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Calculate the maximum drawdown inside the trailing `window` bars of every bar.
+
+    The drawdown of a window only counts peaks inside the window. It is found in O(n)
+    per curve with the van Herk/Gil-Werman block decomposition: the series is cut into
+    blocks of the window length, and each window is the suffix of one block joined with
+    the prefix of the next. Within a block the running peak, trough and maximum drawdown
+    of every prefix and suffix are cumulative max/min scans, and two pieces combine as
+    min(left drawdown, right drawdown, right trough / left peak - 1).
+
+    Args:
+        values (np.ndarray): Equity curve, or (runs x bars) array of equity curves.
+        window (int): Number of returns per window; windows span `window + 1` bars.
+
+    Returns:
+        np.ndarray: Maximum drawdown in percent (<= 0), same shape as `values`; NaN for
+            the first `window` bars.
+    """
+    values, single = _as_runs(values)
+    n_runs, n = values.shape
+    length = window + 1
+    result = np.full_like(values, np.nan)
+    if n < length:
+        return _restore(result, single)
+
+    # 補齊為區塊長度的整數倍（補上的值只影響超出資料範圍的視窗）
+    n_blocks = -(-n // length)
+    padded = np.pad(values, ((0, 0), (0, n_blocks * length - n)), mode='edge')
+    blocks = padded.reshape(n_runs, n_blocks, length)
+
+    # 區塊內前綴：由區塊起點到各位置
+    prefix_peak = np.maximum.accumulate(blocks, axis=2)
+    prefix_trough = np.minimum.accumulate(blocks, axis=2)
+    prefix_dd = np.minimum.accumulate(blocks / prefix_peak - 1, axis=2)
+
+    # 區塊內後綴：由各位置到區塊終點
+    reversed_blocks = blocks[:, :, ::-1]
+    suffix_peak = np.maximum.accumulate(reversed_blocks, axis=2)[:, :, ::-1]
+    suffix_trough = np.minimum.accumulate(reversed_blocks, axis=2)[:, :, ::-1]
+    # 以起點為高點的回撤，再由後往前取最小值
+    suffix_dd = np.minimum.accumulate((suffix_trough / blocks - 1)[:, :, ::-1], axis=2)[:, :, ::-1]
+
+    prefix_peak, prefix_trough, prefix_dd = (a.reshape(n_runs, -1) for a in (prefix_peak, prefix_trough, prefix_dd))
+    suffix_peak, suffix_dd = (a.reshape(n_runs, -1) for a in (suffix_peak, suffix_dd))
+
+    # 視窗 [t - window, t]：start 的後綴與 t 的前綴組合
+    end = np.arange(window, n)
+    start = end - window
+    combined = np.minimum(
+        np.minimum(suffix_dd[:, start], prefix_dd[:, end]),
+        prefix_trough[:, end] / suffix_peak[:, start] - 1
+    )
+    # 視窗剛好是一個完整區塊時，後綴即為整個視窗
+    aligned = start % length == 0
+    combined[:, aligned] = suffix_dd[:, start[aligned]]
+
+    result[:, window:] = combined * 100
+    return _restore(result, single)
+
+
+def rolling_metrics(values: np.ndarray, windows: dict = None, risk_free_rate: float = 0.01) -> dict:
+    """
+    Calculate every rolling metric of one or many equity curves.
+
+    Args:
+        values (np.ndarray): Equity curve, or (runs x bars) array of equity curves.
+        windows (dict): Window name -> bars (default: `ROLLING_WINDOWS`, 1 and 3 years).
+        risk_free_rate (float): Annual risk-free rate of the Sharpe ratio (default: 1%).
+
+    Returns:
+        dict: Arrays shaped like `values`, keyed by 'return_{name}', 'sharpe_{name}' and
+            'max_drawdown_{name}' for every window plus 'drawdown' and 'underwater_days'.
+    """
+    windows = ROLLING_WINDOWS if windows is None else windows
+    metrics = {}
+    for name, window in windows.items():
+        metrics[f'return_{name}'] = rolling_return(values, window)
+        metrics[f'sharpe_{name}'] = rolling_sharpe(values, window, risk_free_rate)
+        metrics[f'max_drawdown_{name}'] = rolling_max_drawdown(values, window)
+    metrics['drawdown'] = drawdown(values)
+    metrics['underwater_days'] = underwater_duration(values)
+    return metrics
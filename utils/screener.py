@@ -0,0 +1,222 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.indicator_store import INDICATORS as STORE_INDICATORS, IndicatorStore
+
+# 指標名稱對應到 (日期 x 股票) 收盤價矩陣的向量化計算函式，與指標庫共用同一個計算函式
+INDICATORS = {name: matrix for name, (_, matrix, _) in STORE_INDICATORS.items()}
+
+
+def load_close_matrix(data_dir: str = 'data/twse', symbols: list = None) -> pd.DataFrame:
+    """
+    Load the closing prices of many symbols into one aligned (dates x symbols) matrix.
+
+    Args:
+        data_dir (str): Directory holding one `{symbol}.csv` per symbol.
+        symbols (list): Symbols to load (default: every CSV in `data_dir`).
+
+    Returns:
+        pd.DataFrame: Closing prices indexed by the union of all dates, one column per symbol.
+            Dates a symbol did not trade on are NaN.
+    """
+    if symbols is None:
+        files = sorted(glob.glob(os.path.join(data_dir, '*.csv')))
+    else:
+        files = [os.path.join(data_dir, f"{symbol}.csv") for symbol in symbols]
+
+    columns = {}
+    for file_path in files:
+        symbol = os.path.splitext(os.path.basename(file_path))[0]
+        df = pd.read_csv(file_path, usecols=['Date', 'Close'], index_col='Date', parse_dates=True)
+        # 重複日期只保留最後一筆
+        columns[symbol] = df['Close'][~df.index.duplicated(keep='last')]
+
+    if not columns:
+        return pd.DataFrame()
+    return pd.concat(columns, axis=1).sort_index()
+
+
+class IndicatorScreener:
+    """
+    Screen a whole universe of symbols on technical indicators.
+
+    Indicators are computed for every symbol in one vectorized pass over the aligned
+    (dates x symbols) close matrix, with missing sessions forward-filled. When an
+    `IndicatorStore` is given and supports the indicator, the same matrix is read from the
+    store instead. Either way they are kept for later queries.
+
+    Example:
+        screener = IndicatorScreener(load_close_matrix('data/twse'))
+        screener.below('rsi', 30)                   # RSI < 30 today
+        screener.crossed_above('rsi', 70, days=5)   # RSI crossed 70 in the last 5 days
+    """
+
+    def __init__(self, closes: pd.DataFrame, store: IndicatorStore = None):
+        self.closes = closes
+        self.store = store
+        self.symbols = np.asarray(closes.columns)
+        self.dates = closes.index
+
+        # 缺少資料的日期沿用前一日收盤價，讓指標只反映實際價格變動
+        self._close_values = closes.ffill().to_numpy(dtype=float)
+
+        # 每檔股票最後一筆實際資料的位置，之後的日期不計算指標
+        has_data = closes.notna().to_numpy()
+        n_dates = len(closes)
+        self._last_row = np.where(has_data.any(axis=0), n_dates - 1 - np.argmax(has_data[::-1], axis=0), -1)
+        self._listed = ~np.isnan(self._close_values) & (np.arange(n_dates)[:, None] <= self._last_row)
+
+        self._indicators = {}
+
+    def indicator(self, name: str, **params) -> np.ndarray:
+        """
+        Get an indicator for every symbol, computing it on first use.
+
+        Args:
+            name (str): Indicator name registered in `INDICATORS`.
+            **params: Indicator parameters, e.g. period=14.
+
+        Returns:
+            np.ndarray: (dates x symbols) array of indicator values.
+        """
+        key = (name, tuple(sorted(params.items())))
+        if key not in self._indicators:
+            if self.store is not None and self.store.supports(name):
+                # 從指標庫一次讀取全市場指標矩陣（與直接計算同樣以補值後的收盤價為準）
+                values = self.store.get_matrix(self.closes, name, **params)
+            elif name in INDICATORS:
+                values = INDICATORS[name](self._close_values, **params)
+            else:
+                raise ValueError(f"Unknown indicator: {name}")
+            self._indicators[key] = np.where(self._listed, values, np.nan)
+        return self._indicators[key]
+
+    def indicator_frame(self, name: str, **params) -> pd.DataFrame:
+        """Return an indicator as a (dates x symbols) DataFrame."""
+        return pd.DataFrame(self.indicator(name, **params), index=self.dates, columns=self.symbols)
+
+    def latest(self, name: str, **params) -> pd.DataFrame:
+        """
+        Get each symbol's indicator value on its most recent trading day.
+
+        Symbols whose data ends before the last date of the matrix keep their last value
+        but are flagged as stale, so an old reading is not mistaken for today's.
+
+        Returns:
+            pd.DataFrame: One row per symbol with the indicator value (column `name`), the
+                date it was taken on ('as_of') and whether that date is behind the last
+                date of the matrix ('stale').
+        """
+        values = self.indicator(name, **params)
+        valid = self._last_row >= 0
+        latest = np.full(len(self.symbols), np.nan)
+        latest[valid] = values[self._last_row[valid], np.flatnonzero(valid)]
+        as_of = pd.Series(pd.NaT, index=self.symbols, dtype='datetime64[ns]')
+        as_of[valid] = self.dates[self._last_row[valid]]
+        return pd.DataFrame({
+            name: latest,
+            'as_of': as_of,
+            'stale': valid & (self._last_row < len(self.dates) - 1)
+        }, index=self.symbols)
+
+    def below(self, name: str, threshold: float, **params) -> pd.DataFrame:
+        """Return symbols whose latest indicator value is below `threshold`, lowest first (see `latest`)."""
+        latest = self.latest(name, **params)
+        return latest[latest[name] < threshold].sort_values(name, kind='stable')
+
+    def above(self, name: str, threshold: float, **params) -> pd.DataFrame:
+        """Return symbols whose latest indicator value is above `threshold`, highest first (see `latest`)."""
+        latest = self.latest(name, **params)
+        return latest[latest[name] > threshold].sort_values(name, ascending=False, kind='stable')
+
+    def _crossings(self, name, level, days, direction, params):
+        values = self.indicator(name, **params)
+        # 只看每檔股票最後 days 筆資料（以整體日期軸計算）
+        window = values[-(days + 1):]
+        previous, current = window[:-1], window[1:]
+        if direction > 0:
+            crossed = (previous < level) & (current >= level)
+        else:
+            crossed = (previous > level) & (current <= level)
+
+        hit = crossed.any(axis=0)
+        # 最近一次穿越的日期
+        last_cross = len(current) - 1 - np.argmax(crossed[::-1], axis=0)
+        cross_dates = self.dates[len(self.dates) - len(current):][last_cross]
+        return pd.Series(cross_dates[hit], index=self.symbols[hit], name='cross_date').sort_values(ascending=False)
+
+    def crossed_above(self, name: str, level: float, days: int = 5, **params) -> pd.Series:
+        """
+        Find symbols whose indicator crossed above `level` within the last `days` dates.
+
+        Returns:
+            pd.Series: Date of the most recent crossing per matching symbol.
+        """
+        return self._crossings(name, level, days, 1, params)
+
+    def crossed_below(self, name: str, level: float, days: int = 5, **params) -> pd.Series:
+        """
+        Find symbols whose indicator crossed below `level` within the last `days` dates.
+
+        Returns:
+            pd.Series: Date of the most recent crossing per matching symbol.
+        """
+        return self._crossings(name, level, days, -1, params)
+
+
+def main():
+    # 設定命令列參數
+    parser = argparse.ArgumentParser(description='全市場技術指標選股')
+    parser.add_argument('--data_dir', type=str, default='data/twse', help='股票資料目錄')
+    parser.add_argument('--indicator', type=str, default='rsi', choices=sorted(INDICATORS), help='技術指標')
+    parser.add_argument('--period', type=int, default=14, help='指標計算周期')
+    parser.add_argument('--below', type=float, default=None, help='篩選最新指標值低於此值的股票')
+    parser.add_argument('--above', type=float, default=None, help='篩選最新指標值高於此值的股票')
+    parser.add_argument('--crossed_above', type=float, default=None, help='篩選近期向上穿越此值的股票')
+    parser.add_argument('--crossed_below', type=float, default=None, help='篩選近期向下穿越此值的股票')
+    parser.add_argument('--days', type=int, default=5, help='穿越條件的回溯天數')
+    parser.add_argument('--no_store', action='store_true', help='不使用指標庫，直接從收盤價計算指標')
+
+    args = parser.parse_args()
+
+    load_start = time.perf_counter()
+    store = None if args.no_store else IndicatorStore(args.data_dir)
+    screener = IndicatorScreener(load_close_matrix(args.data_dir), store=store)
+    load_time = time.perf_counter() - load_start
+
+    screen_start = time.perf_counter()
+    params = {'period': args.period}
+    if args.below is not None:
+        title = f"{args.indicator} < {args.below}"
+        result = screener.below(args.indicator, args.below, **params)
+    elif args.above is not None:
+        title = f"{args.indicator} > {args.above}"
+        result = screener.above(args.indicator, args.above, **params)
+    elif args.crossed_above is not None:
+        title = f"{args.indicator} 近 {args.days} 日向上穿越 {args.crossed_above}"
+        result = screener.crossed_above(args.indicator, args.crossed_above, args.days, **params)
+    elif args.crossed_below is not None:
+        title = f"{args.indicator} 近 {args.days} 日向下穿越 {args.crossed_below}"
+        result = screener.crossed_below(args.indicator, args.crossed_below, args.days, **params)
+    else:
+        title = f"{args.indicator} 最新數值"
+        result = screener.latest(args.indicator, **params).sort_values(args.indicator, kind='stable')
+    screen_time = time.perf_counter() - screen_start
+
+    print(f"=== {title} ===")
+    print(result.to_string() if len(result) > 0 else "沒有符合條件的股票")
+    if 'stale' in result and result['stale'].any():
+        print(f"\nstale 為 True 的股票資料只到 as_of 日期，落後最新日期 {screener.dates[-1].date()}")
+    print(f"\n股票數: {len(screener.symbols)}，讀取耗時 {load_time:.3f} 秒，篩選耗時 {screen_time:.3f} 秒")
+
+
+if __name__ == "__main__":
+    main()
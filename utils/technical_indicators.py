@@ -2,10 +2,31 @@ import pandas as pd
 import os # Import os for path manipulation
 import numpy as np
 
+def _fixed_window_sum(values: np.ndarray, window: int, axis: int = -1) -> np.ndarray:
+    # Sum of each trailing window along `axis`, adding the window's values in the same
+    # order for every bar. The result of a bar depends only on its own window, so it is
+    # bit-identical for 1-D and stacked inputs and for a series and any tail of it.
+    axis = axis % values.ndim
+    n = values.shape[axis]
+    out = np.full(values.shape, np.nan)
+    if n < window:
+        return out
+
+    def take(start, stop):
+        return values[(slice(None),) * axis + (slice(start, stop),)]
+
+    total = take(0, n - window + 1).copy()
+    for offset in range(1, window):
+        total += take(offset, n - window + 1 + offset)
+    out[(slice(None),) * axis + (slice(window - 1, None),)] = total
+    return out
+
 def calculate_rsi(prices: pd.Series, period: int = 14) -> pd.Series:
     """
     Calculate the Relative Strength Index (RSI) for a given price series.
 
+    Uses the same kernel as `calculate_rsi_array`, so both give exactly equal values.
+
     Args:
         prices (pd.Series): Series of prices (typically closing prices).
         period (int): The lookback period for RSI calculation (default: 14).
@@ -13,25 +34,419 @@ def calculate_rsi(prices: pd.Series, period: int = 14) -> pd.Series:
     Returns:
         pd.Series: Series containing RSI values rounded to 2 decimal places.
     """
-    # Calculate price changes
-    delta = prices.diff()
+    rsi = calculate_rsi_array(prices.to_numpy(dtype=float), period=period)
+    return pd.Series(rsi, index=prices.index, name=prices.name)
+
+def calculate_rsi_array(prices: np.ndarray, period: int = 14, axis: int = -1) -> np.ndarray:
+    """
+    Calculate the RSI of many price series at once with NumPy.
+
+    Uses simple moving averages of gains and losses, with missing changes counted as zero.
+    Each bar's averages are summed over its own window in a fixed order, so the values do
+    not depend on how much history precedes the window and rounding ties resolve the same
+    way in every caller (`calculate_rsi`, the indicator store and the screener).
+
+    Args:
+        prices (np.ndarray): Array of prices; each series runs along `axis`.
+        period (int): The lookback period for RSI calculation (default: 14).
+        axis (int): Axis along which time runs (default: last axis).
+
+    Returns:
+        np.ndarray: Array of the same shape with RSI values rounded to 2 decimal places.
+            The first `period - 1` values of each series are NaN.
+    """
+    prices = np.asarray(prices, dtype=float)
+
+    # Calculate price changes along the time axis, missing changes count as zero
+    delta = np.zeros_like(prices)
+    delta[(slice(None),) * (axis % prices.ndim) + (slice(1, None),)] = np.diff(prices, axis=axis)
+    delta = np.nan_to_num(delta, nan=0.0)
+
+    # Average gain and loss over each window, summed in the array's own memory layout
+    avg_gain = _fixed_window_sum(np.where(delta > 0, delta, 0.0), period, axis) / period
+    avg_loss = _fixed_window_sum(np.where(delta < 0, -delta, 0.0), period, axis) / period
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+    return np.round(rsi, 2)
+
+def _batched(kernel, params: dict, state=None):
+    """
+    Run an indicator kernel for one or many parameter sets.
+
+    Scalar parameters give one result. Sequences are broadcast against each other and
+    every output (and every entry of 'state') gains a leading axis with one entry per
+    parameter set; a stacked `state` from such a call is split the same way.
+    """
+    if all(np.ndim(value) == 0 for value in params.values()):
+        return kernel(state=state, **params)
+
+    columns = np.broadcast_arrays(*(np.atleast_1d(value) for value in params.values()))
+    results = []
+    for i in range(len(columns[0])):
+        run_params = {key: column[i].item() for key, column in zip(params, columns)}
+        run_state = None if state is None else {key: value[i] for key, value in state.items()}
+        results.append(kernel(state=run_state, **run_params))
+
+    stacked = {key: np.stack([result[key] for result in results]) for key in results[0] if key != 'state'}
+    stacked['state'] = {key: np.stack([result['state'][key] for result in results])
+                        for key in results[0]['state']}
+    return stacked
+
+
+def _ema(values: np.ndarray, alpha: float, initial=None, block: int = 128) -> np.ndarray:
+    """
+    Exponential smoothing y[t] = alpha * x[t] + (1 - alpha) * y[t-1] along the last axis.
+
+    The recursion is evaluated block by block: inside a block every output is a fixed
+    weighted sum of the block's inputs plus the decayed carry from the previous block, so
+    each block is one matrix product instead of a Python step per bar.
+
+    Args:
+        values (np.ndarray): Inputs without NaN; time runs along the last axis.
+        alpha (float): Smoothing factor in (0, 1].
+        initial: y[-1], the value before the first input (default: the first input,
+            so y[0] = x[0] as in pandas `ewm(adjust=False)`).
+        block (int): Bars per block.
+
+    Returns:
+        np.ndarray: Smoothed values, same shape as `values`.
+    """
+    values = np.asarray(values, dtype=float)
+    n = values.shape[-1]
+    out = np.empty_like(values)
+    if n == 0:
+        return out
+
+    decay = 1.0 - alpha
+    lags = np.arange(block)
+    # weights[i, j]: weight of input j on output i of a block (zero for j > i)
+    weights = np.tril(alpha * decay ** np.maximum(lags[:, None] - lags[None, :], 0))
+    carry_weights = decay ** (lags + 1)
+
+    previous = values[..., 0] if initial is None else np.broadcast_to(np.asarray(initial, dtype=float), values.shape[:-1])
+    for start in range(0, n, block):
+        chunk = values[..., start:start + block]
+        size = chunk.shape[-1]
+        smoothed = chunk @ weights[:size, :size].T + previous[..., None] * carry_weights[:size]
+        out[..., start:start + size] = smoothed
+        previous = smoothed[..., -1]
+    return out
+
+
+def _rolling_extreme(values: np.ndarray, window: int, accumulate) -> np.ndarray:
+    """
+    Rolling max or min along the last axis in O(n) with the van Herk/Gil-Werman algorithm.
+
+    Each window of `window` bars is the suffix of one block of `window` bars joined with
+    the prefix of the next, and block prefixes/suffixes are cumulative scans.
+
+    Args:
+        values (np.ndarray): Inputs; time runs along the last axis.
+        window (int): Window length in bars.
+        accumulate: `np.maximum.accumulate` or `np.minimum.accumulate`.
+
+    Returns:
+        np.ndarray: Same shape as `values`; the first `window - 1` bars are NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    n = values.shape[-1]
+    out = np.full_like(values, np.nan)
+    if n < window:
+        return out
+
+    n_blocks = -(-n // window)
+    pad = [(0, 0)] * (values.ndim - 1) + [(0, n_blocks * window - n)]
+    blocks = np.pad(values, pad, mode='edge').reshape(values.shape[:-1] + (n_blocks, window))
+    prefix = accumulate(blocks, axis=-1).reshape(values.shape[:-1] + (-1,))
+    suffix = accumulate(blocks[..., ::-1], axis=-1)[..., ::-1].reshape(values.shape[:-1] + (-1,))
+
+    end = np.arange(window - 1, n)
+    start = end - window + 1
+    combine = np.maximum if accumulate == np.maximum.accumulate else np.minimum
+    out[..., window - 1:] = combine(suffix[..., start], prefix[..., end])
+    return out
+
+
+def _window_sums(values: np.ndarray):
+    # Cumulative sums of the values and their squares, centred on each series' mean to
+    # limit cancellation, shared by every window length
+    shift = np.mean(values, axis=-1, keepdims=True) if values.shape[-1] else np.zeros(values.shape[:-1] + (1,))
+    centred = values - shift
+    zeros = np.zeros(values.shape[:-1] + (1,))
+    cum = np.concatenate([zeros, np.cumsum(centred, axis=-1)], axis=-1)
+    cum_sq = np.concatenate([zeros, np.cumsum(centred ** 2, axis=-1)], axis=-1)
+    return shift, cum, cum_sq
 
-    # Separate gains and losses
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
 
-    # Calculate average gain and loss over the specified period
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
+def _rolling_mean_std(sums, window: int, with_std: bool = True):
+    # Rolling mean and population standard deviation from `_window_sums`; the first
+    # `window - 1` bars are NaN
+    shift, cum, cum_sq = sums
+    shape = cum.shape[:-1] + (cum.shape[-1] - 1,)
+    mean = np.full(shape, np.nan)
+    std = np.full(shape, np.nan) if with_std else None
+    if shape[-1] < window:
+        return mean, std
 
-    # Calculate relative strength (RS)
-    rs = avg_gain / avg_loss
+    window_mean = (cum[..., window:] - cum[..., :-window]) / window
+    mean[..., window - 1:] = window_mean + shift
+    if with_std:
+        window_sq = (cum_sq[..., window:] - cum_sq[..., :-window]) / window
+        std[..., window - 1:] = np.sqrt(np.maximum(window_sq - window_mean ** 2, 0.0))
+    return mean, std
 
-    # Calculate RSI
-    rsi = 100 - (100 / (1 + rs))
-    
-    # Round to 2 decimal places
-    return rsi.round(2)
+
+def sma_array(prices: np.ndarray, period=20, axis: int = -1) -> np.ndarray:
+    """
+    Calculate simple moving averages with cumulative sums.
+
+    Args:
+        prices (np.ndarray): Array of prices; each series runs along `axis`.
+        period (int | sequence): Window length, or several lengths to compute at once.
+        axis (int): Axis along which time runs (default: last axis).
+
+    Returns:
+        np.ndarray: Same shape as `prices` (with a leading axis per period when `period`
+            is a sequence). The first `period - 1` values of each series are NaN.
+            Appending bars only needs the last `period - 1` earlier bars as warm-up.
+    """
+    prices = np.moveaxis(np.asarray(prices, dtype=float), axis, -1)
+    sums = _window_sums(prices)
+
+    def kernel(period, state=None):
+        mean, _ = _rolling_mean_std(sums, int(period), with_std=False)
+        return {'sma': mean, 'state': {}}
+
+    result = _batched(kernel, {'period': period})['sma']
+    return np.moveaxis(result, -1, axis)
+
+
+def ema_array(prices: np.ndarray, span=20, initial=None, axis: int = -1) -> np.ndarray:
+    """
+    Calculate exponential moving averages (alpha = 2 / (span + 1)), as pandas `ewm(span, adjust=False)`.
+
+    Args:
+        prices (np.ndarray): Array of prices without NaN; each series runs along `axis`.
+        span (int | sequence): EMA span, or several spans to compute at once.
+        initial: EMA of the bar before the first price, e.g. the last value of a previous
+            call, to continue a series incrementally (default: start at the first price).
+        axis (int): Axis along which time runs (default: last axis).
+
+    Returns:
+        np.ndarray: Same shape as `prices` (with a leading axis per span when `span` is a
+            sequence).
+    """
+    prices = np.moveaxis(np.asarray(prices, dtype=float), axis, -1)
+
+    def kernel(span, state=None):
+        ema = _ema(prices, 2.0 / (span + 1), None if state is None else state['ema'])
+        return {'ema': ema, 'state': {'ema': ema[..., -1]}}
+
+    state = None if initial is None else {'ema': np.asarray(initial, dtype=float)}
+    result = _batched(kernel, {'span': span}, state)['ema']
+    return np.moveaxis(result, -1, axis)
+
+
+def ma_crossover_signals(prices: np.ndarray, fast=5, slow=20, kind: str = 'sma', axis: int = -1) -> np.ndarray:
+    """
+    Find moving average crossovers: +1 where the fast average crosses above the slow one,
+    -1 where it crosses below, 0 elsewhere.
+
+    Averages shared by several (fast, slow) pairs are computed once.
+
+    Args:
+        prices (np.ndarray): Array of prices; each series runs along `axis`.
+        fast (int | sequence): Fast period(s).
+        slow (int | sequence): Slow period(s), broadcast against `fast`.
+        kind (str): 'sma' or 'ema'.
+        axis (int): Axis along which time runs (default: last axis).
+
+    Returns:
+        np.ndarray: Signals shaped like `prices` (with a leading axis per pair when a
+            period is a sequence).
+    """
+    if kind not in ('sma', 'ema'):
+        raise ValueError(f"Unknown moving average: {kind}")
+    prices = np.moveaxis(np.asarray(prices, dtype=float), axis, -1)
+    scalar = np.ndim(fast) == 0 and np.ndim(slow) == 0
+    fast, slow = np.broadcast_arrays(np.atleast_1d(fast), np.atleast_1d(slow))
+
+    averages = {}
+    for period in np.unique(np.concatenate([fast, slow])):
+        averages[period] = sma_array(prices, int(period)) if kind == 'sma' else ema_array(prices, int(period))
+
+    signals = []
+    for fast_period, slow_period in zip(fast, slow):
+        above = averages[fast_period] > averages[slow_period]
+        valid = ~np.isnan(averages[slow_period]) & ~np.isnan(averages[fast_period])
+        crossed = np.zeros(prices.shape, dtype=int)
+        both_valid = valid[..., 1:] & valid[..., :-1]
+        crossed[..., 1:] = np.where(both_valid, above[..., 1:].astype(int) - above[..., :-1].astype(int), 0)
+        signals.append(crossed)
+
+    result = signals[0] if scalar else np.stack(signals)
+    return np.moveaxis(result, -1, axis)
+
+
+def macd_array(prices: np.ndarray, fast=12, slow=26, signal=9, state: dict = None, axis: int = -1) -> dict:
+    """
+    Calculate MACD: the fast EMA minus the slow EMA, its signal line and the histogram.
+
+    Args:
+        prices (np.ndarray): Array of prices without NaN; each series runs along `axis`.
+        fast (int | sequence): Fast EMA span(s).
+        slow (int | sequence): Slow EMA span(s).
+        signal (int | sequence): Signal line span(s); all three are broadcast together.
+        state (dict): 'state' of a previous result, to continue it with new bars only.
+        axis (int): Axis along which time runs (default: last axis).
+
+    Returns:
+        dict: 'macd', 'signal' and 'histogram' arrays shaped like `prices` (with a leading
+            axis per parameter set when a span is a sequence), and 'state' with the last
+            fast, slow and signal EMA values.
+    """
+    prices = np.moveaxis(np.asarray(prices, dtype=float), axis, -1)
+
+    def kernel(fast, slow, signal, state=None):
+        state = state or {}
+        fast_ema = _ema(prices, 2.0 / (fast + 1), state.get('fast'))
+        slow_ema = _ema(prices, 2.0 / (slow + 1), state.get('slow'))
+        macd = fast_ema - slow_ema
+        signal_line = _ema(macd, 2.0 / (signal + 1), state.get('signal'))
+        return {
+            'macd': macd,
+            'signal': signal_line,
+            'histogram': macd - signal_line,
+            'state': {'fast': fast_ema[..., -1], 'slow': slow_ema[..., -1], 'signal': signal_line[..., -1]}
+        }
+
+    result = _batched(kernel, {'fast': fast, 'slow': slow, 'signal': signal}, state)
+    return {key: value if key == 'state' else np.moveaxis(value, -1, axis) for key, value in result.items()}
+
+
+def bollinger_array(prices: np.ndarray, period=20, num_std=2.0, axis: int = -1) -> dict:
+    """
+    Calculate Bollinger Bands: the simple moving average and bands `num_std` population
+    standard deviations above and below it.
+
+    Args:
+        prices (np.ndarray): Array of prices; each series runs along `axis`.
+        period (int | sequence): Window length(s).
+        num_std (float | sequence): Band width(s) in standard deviations, broadcast
+            against `period`.
+        axis (int): Axis along which time runs (default: last axis).
+
+    Returns:
+        dict: 'middle', 'upper' and 'lower' arrays shaped like `prices` (with a leading
+            axis per parameter set when a parameter is a sequence). The first `period - 1`
+            values are NaN; appending bars only needs the last `period - 1` earlier bars
+            as warm-up.
+    """
+    prices = np.moveaxis(np.asarray(prices, dtype=float), axis, -1)
+    sums = _window_sums(prices)
+
+    def kernel(period, num_std, state=None):
+        middle, std = _rolling_mean_std(sums, int(period))
+        return {'middle': middle, 'upper': middle + num_std * std, 'lower': middle - num_std * std, 'state': {}}
+
+    result = _batched(kernel, {'period': period, 'num_std': num_std})
+    result.pop('state')
+    return {key: np.moveaxis(value, -1, axis) for key, value in result.items()}
+
+
+def kd_array(high: np.ndarray, low: np.ndarray, close: np.ndarray, period=9, k_smooth=3, d_smooth=3,
+             state: dict = None, axis: int = -1) -> dict:
+    """
+    Calculate the KD stochastic oscillator as quoted in Taiwan.
+
+    RSV = (close - lowest low) / (highest high - lowest low) * 100 over `period` bars,
+    K = K[-1] * (1 - 1/k_smooth) + RSV / k_smooth and D likewise from K, both starting
+    from 50. A flat window (highest high equal to lowest low) counts as RSV 50.
+
+    Args:
+        high, low, close (np.ndarray): Price arrays of the same shape without NaN; each
+            series runs along `axis`.
+        period (int | sequence): RSV window length(s).
+        k_smooth (int | sequence): K smoothing(s).
+        d_smooth (int | sequence): D smoothing(s); all three are broadcast together.
+        state (dict): 'state' of a previous result. To continue it, pass the last
+            `period - 1` bars of the previous input before the new bars.
+        axis (int): Axis along which time runs (default: last axis).
+
+    Returns:
+        dict: 'k' and 'd' arrays shaped like the prices (with a leading axis per parameter
+            set when a parameter is a sequence), NaN for the first `period - 1` bars, and
+            'state' with the last K and D values.
+    """
+    high, low, close = (np.moveaxis(np.asarray(a, dtype=float), axis, -1) for a in (high, low, close))
+
+    def kernel(period, k_smooth, d_smooth, state=None):
+        period = int(period)
+        highest = _rolling_extreme(high, period, np.maximum.accumulate)
+        lowest = _rolling_extreme(low, period, np.minimum.accumulate)
+        price_range = highest - lowest
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsv = np.where(price_range > 0, (close - lowest) / price_range * 100, 50.0)
+
+        k = np.full_like(close, np.nan)
+        d = np.full_like(close, np.nan)
+        start_k = 50.0 if state is None else state['k']
+        start_d = 50.0 if state is None else state['d']
+        if close.shape[-1] >= period:
+            k[..., period - 1:] = _ema(rsv[..., period - 1:], 1.0 / k_smooth, start_k)
+            d[..., period - 1:] = _ema(k[..., period - 1:], 1.0 / d_smooth, start_d)
+            start_k, start_d = k[..., -1], d[..., -1]
+        return {
+            'k': k,
+            'd': d,
+            'state': {'k': np.broadcast_to(start_k, close.shape[:-1]), 'd': np.broadcast_to(start_d, close.shape[:-1])}
+        }
+
+    result = _batched(kernel, {'period': period, 'k_smooth': k_smooth, 'd_smooth': d_smooth}, state)
+    return {key: value if key == 'state' else np.moveaxis(value, -1, axis) for key, value in result.items()}
+
+
+def atr_array(high: np.ndarray, low: np.ndarray, close: np.ndarray, period=14, state: dict = None,
+              axis: int = -1) -> dict:
+    """
+    Calculate the Average True Range with Wilder's smoothing (alpha = 1 / period).
+
+    True range is max(high - low, |high - previous close|, |low - previous close|); the
+    first bar has no previous close and uses high - low, and the ATR starts at that value
+    as pandas `ewm(alpha=1/period, adjust=False)` does.
+
+    Args:
+        high, low, close (np.ndarray): Price arrays of the same shape without NaN; each
+            series runs along `axis`.
+        period (int | sequence): Smoothing period(s).
+        state (dict): 'state' of a previous result. To continue it, pass the last bar of
+            the previous input before the new bars; its output is NaN.
+        axis (int): Axis along which time runs (default: last axis).
+
+    Returns:
+        dict: 'atr' shaped like the prices (with a leading axis per period when `period`
+            is a sequence) and 'state' with the last ATR value.
+    """
+    high, low, close = (np.moveaxis(np.asarray(a, dtype=float), axis, -1) for a in (high, low, close))
+    true_range = high - low
+    true_range[..., 1:] = np.maximum(
+        true_range[..., 1:],
+        np.maximum(np.abs(high[..., 1:] - close[..., :-1]), np.abs(low[..., 1:] - close[..., :-1]))
+    )
+
+    def kernel(period, state=None):
+        if state is None:
+            atr = _ema(true_range, 1.0 / period)
+        else:
+            # The first bar only provides the previous close
+            atr = np.full_like(true_range, np.nan)
+            atr[..., 1:] = _ema(true_range[..., 1:], 1.0 / period, state['atr'])
+        return {'atr': atr, 'state': {'atr': atr[..., -1]}}
+
+    result = _batched(kernel, {'period': period}, state)
+    return {key: value if key == 'state' else np.moveaxis(value, -1, axis) for key, value in result.items()}
 
 def analyze_rsi_from_csv(file_path: str, rsi_period: int = 14, tail_rows: int = 100):
     """
@@ -59,13 +474,23 @@ def analyze_rsi_from_csv(file_path: str, rsi_period: int = 14, tail_rows: int =
         if close_column is None:
             raise ValueError(f"Could not find a closing price column ({', '.join(possible_columns)}) in {file_path}.")
 
+        # Only the standard 'Close' column is kept in the indicator store
+        use_store = close_column == 'Close'
+
         # Rename if necessary for consistency (optional)
         if close_column != 'Close':
              df.rename(columns={close_column: 'Close'}, inplace=True)
              close_column = 'Close' # Update the variable after renaming
 
-        # Calculate RSI using the identified column
-        df['RSI'] = calculate_rsi(df[close_column], period=rsi_period)
+        # Read RSI from the indicator store when the file uses the standard 'Close' column,
+        # otherwise calculate it using the identified column
+        if use_store:
+            from utils.indicator_store import IndicatorStore
+            store = IndicatorStore(os.path.dirname(file_path))
+            symbol = os.path.splitext(os.path.basename(file_path))[0]
+            df['RSI'] = store.get(symbol, 'rsi', data_file=file_path, period=rsi_period).to_numpy()
+        else:
+            df['RSI'] = calculate_rsi(df[close_column], period=rsi_period)
 
         print(f"RSI (period={rsi_period}) calculated for {file_path}. Showing the last {tail_rows} results:")
         # Display the specified number of tail rows, including the RSI
@@ -80,6 +505,10 @@ def analyze_rsi_from_csv(file_path: str, rsi_period: int = 14, tail_rows: int =
 
 
 if __name__ == "__main__":
+    # Add parent directory to path to import utils.indicator_store
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
     # Example usage: Analyze RSI for ^TWII.csv
     # Assuming the script is run from the project root or the path is relative to it
     data_file = 'data/twse/^TWII.csv' 